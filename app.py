@@ -2,7 +2,8 @@
 import streamlit as st
 import re # For sanitizing company name for filename
 import time # For potential delays if rate limits are hit often
-from utils import load_openai_api_key
+import json
+from utils import load_openai_api_key, get_near_duplicate_threshold, is_admin_mode, get_task_metrics_summary
 from scraper import scrape_website_data
 from doc_parser import extract_text_from_uploaded_files
 from openai_handler import (
@@ -10,9 +11,27 @@ from openai_handler import (
     generate_linkedin_facebook_content,
     generate_google_search_ads,
     generate_google_display_ads,
-    generate_reasoning_text
+    generate_reasoning_text,
+    find_failed_slices,
+    repair_generated_content
 )
-from excel_generator import create_excel_workbook
+from content_validator import enforce_content_limits
+from diversity import diversity_scores, regenerate_near_duplicates
+from tracing import span
+from profiling import profile_run, profiling_enabled_by_env
+from profile_store import get_or_scrape_profile, get_stored_profile, save_profile, set_profile_pinned, delete_profile
+from excel_generator import IncrementalWorkbook
+from warmup import start_warmup
+from prefetch import (
+    looks_prefetchable_url,
+    start_profile_prefetch,
+    take_profile_prefetch,
+    start_documents_prefetch,
+    take_documents_prefetch,
+    cancel_prefetch,
+    prefetch_status
+)
+from campaign_matrix import build_campaign_variants, generate_campaign_matrix, write_campaign_matrix_output, MAX_CAMPAIGN_VARIANTS, XLSX_MIME
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Marketing Content Generator", layout="wide", initial_sidebar_state="expanded")
@@ -27,6 +46,30 @@ def format_url(url_input):
         return "https://" + url_input
     return url_input
 
+SLICE_LABELS = {
+    "email": "Email", "linkedin": "LinkedIn", "facebook": "Facebook",
+    "google_search": "Google Search", "google_display": "Google Display", "reasoning_text": "Reasoning",
+}
+
+def show_partial_download(placeholder, workbook, file_name):
+    """Replaces the in-progress download button with the workbook as it stands (clicking it doesn't interrupt the run)."""
+    stages = workbook.stages
+    placeholder.download_button(
+        label=f"📥 Download Partial Report ({len(stages)} sheet{'s' if len(stages) != 1 else ''})",
+        data=workbook.to_bytes().getvalue(),
+        file_name=file_name.replace(".xlsx", "_partial.xlsx"),
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        key=f"partial_download_{'_'.join(stages)}_{time.monotonic_ns()}",
+        on_click="ignore",
+        use_container_width=True
+    )
+
+def describe_slice(content_slice):
+    """Human-readable label for a (content_key, part) slice from find_failed_slices."""
+    content_key, part = content_slice
+    label = SLICE_LABELS.get(content_key, content_key)
+    return f"{label} – {part}" if part else label
+
 # --- Main App UI ---
 st.title("🚀 Marketing Content Generator")
 st.markdown("""
@@ -59,6 +102,73 @@ downloadable_asset_url_raw = st.sidebar.text_input(
 )
 
 num_content_pieces = st.sidebar.slider("Number of Content Pieces per Objective (for Email/Social)", 1, 20, 10)
+near_duplicate_threshold = st.sidebar.slider(
+    "Near-Duplicate Similarity Threshold", 0.2, 0.95, get_near_duplicate_threshold(), 0.05,
+    help="Email/social variants at least this similar to an earlier variant are regenerated."
+)
+
+reuse_stored_profile = st.sidebar.checkbox(
+    "Reuse stored client profile", value=True,
+    help="Skip scraping when this domain has a stored profile; it is refreshed in the background if the site changed."
+)
+
+# Campaign matrix: scrape and parse once, then generate every objective / URL / asset combination
+campaign_matrix_mode = st.sidebar.toggle(
+    "🧮 Campaign matrix mode",
+    help="Test several lead objectives, destination URLs and assets for this client in one run."
+)
+if campaign_matrix_mode:
+    matrix_objective_types = st.sidebar.multiselect("Lead Objectives to Test", lead_objective_options, default=lead_objective_options)
+    matrix_objective_urls_raw = st.sidebar.text_area("Lead Objective URLs (one per line)", value=lead_objective_url_raw)
+    matrix_asset_urls_raw = st.sidebar.text_area("Downloadable Asset URLs (one per line, optional)", value=downloadable_asset_url_raw)
+    matrix_as_zip = st.sidebar.radio("Matrix Output", ["One workbook", "ZIP (one workbook per variant)"]) != "One workbook"
+
+# Stored profile editor: edit the JSON and pin it so background refreshes leave it alone
+if client_website_url_raw:
+    stored_record = get_stored_profile(format_url(client_website_url_raw))
+    if stored_record:
+        with st.sidebar.expander(f"📇 Stored profile: {stored_record['domain']}"):
+            st.caption(f"Source: {stored_record['source']} · updated {time.strftime('%Y-%m-%d %H:%M', time.localtime(stored_record['updated_at']))}")
+            edited_profile_json = st.text_area(
+                "Profile JSON", json.dumps(stored_record["profile"], indent=2), height=300,
+                key=f"profile_json_{stored_record['domain']}"
+            )
+            pin_profile = st.checkbox("📌 Pinned", value=stored_record["pinned"], key=f"profile_pin_{stored_record['domain']}")
+            col_save, col_forget = st.columns(2)
+            if col_save.button("Save", use_container_width=True):
+                try:
+                    edited_profile = json.loads(edited_profile_json)
+                except json.JSONDecodeError as e:
+                    st.error(f"Invalid JSON: {e}")
+                else:
+                    if edited_profile != stored_record["profile"]:
+                        save_profile(stored_record["url"], edited_profile, source="manual", pinned=pin_profile)
+                    else:
+                        set_profile_pinned(stored_record["url"], pin_profile)
+                    cancel_prefetch(st.session_state, "profile") # It may hold the profile as it was before the edit
+                    st.rerun()
+            if col_forget.button("Forget", use_container_width=True):
+                delete_profile(stored_record["url"])
+                cancel_prefetch(st.session_state, "profile")
+                st.rerun()
+
+# Admin-only: per-run CPU/memory profiling (also enabled for every run by MCG_PROFILE=1)
+profile_this_run = profiling_enabled_by_env()
+if is_admin_mode():
+    profile_this_run = st.sidebar.toggle("🧪 Profile this run (admin)", value=profile_this_run)
+
+# Speculative prefetch: scrape the site and parse the uploads while the rest of the form is filled in
+prefetch_client_url = format_url(client_website_url_raw)
+if looks_prefetchable_url(prefetch_client_url):
+    start_profile_prefetch(st.session_state, prefetch_client_url, OPENAI_API_KEY, reuse_stored_profile)
+else:
+    cancel_prefetch(st.session_state, "profile")
+if additional_materials:
+    start_documents_prefetch(st.session_state, additional_materials)
+else:
+    cancel_prefetch(st.session_state, "documents")
+if prefetch_status(st.session_state, "profile") == "running":
+    st.sidebar.caption("⏳ Fetching the client website in the background...")
 
 # --- Generate Button ---
 if st.sidebar.button("✨ Generate Content", type="primary", use_container_width=True):
@@ -77,7 +187,18 @@ if st.sidebar.button("✨ Generate Content", type="primary", use_container_width
         st.error("Please enter a valid website URL (e.g., https://www.example.com or www.example.com).")
         valid_inputs = False
         
-    if not lead_objective_url_raw: # Check raw input for presence
+    campaign_variants = []
+    if campaign_matrix_mode:
+        matrix_objective_urls = [format_url(line.strip()) for line in matrix_objective_urls_raw.splitlines() if line.strip()]
+        matrix_asset_urls = [format_url(line.strip()) for line in matrix_asset_urls_raw.splitlines() if line.strip()]
+        campaign_variants = build_campaign_variants(matrix_objective_types, matrix_objective_urls, matrix_asset_urls)
+        if not campaign_variants:
+            st.error("Campaign matrix mode needs at least one lead objective and one lead objective URL.")
+            valid_inputs = False
+        elif len(campaign_variants) > MAX_CAMPAIGN_VARIANTS:
+            st.error(f"The campaign matrix has {len(campaign_variants)} combinations; the maximum is {MAX_CAMPAIGN_VARIANTS}.")
+            valid_inputs = False
+    elif not lead_objective_url_raw: # Check raw input for presence
         st.error("Please provide the URL for the selected lead objective.")
         valid_inputs = False
     elif lead_objective_url and not (lead_objective_url.startswith("http://") or lead_objective_url.startswith("https://")):
@@ -90,138 +211,291 @@ if st.sidebar.button("✨ Generate Content", type="primary", use_container_width
         valid_inputs = False
         
     if valid_inputs:
-        with st.spinner("Hold tight! Generating amazing content... This might take a few minutes... ⏳"):
+        previous_run = st.session_state.get("last_run")
+        with st.spinner("Hold tight! Generating amazing content... This might take a few minutes... ⏳"), \
+                span("run", client=client_website_url, lead_objective=lead_objective_type, pieces=num_content_pieces), \
+                profile_run(profile_this_run, label=client_website_url) as profile_result:
             try:
                 # 1. Scrape Website
                 st.subheader("Step 1: Scraping Website Data...")
-                scraped_data = scrape_website_data(client_website_url, OPENAI_API_KEY)
+                profile_prefetched, prefetched_profile = take_profile_prefetch(st.session_state, client_website_url, reuse_stored_profile)
+                if profile_prefetched and prefetched_profile[0]:
+                    scraped_data, profile_status = prefetched_profile
+                elif reuse_stored_profile:
+                    scraped_data, profile_status = get_or_scrape_profile(client_website_url, OPENAI_API_KEY)
+                else:
+                    scraped_data, profile_status = scrape_website_data(client_website_url, OPENAI_API_KEY), "scraped"
                 if not scraped_data:
                     st.error("Failed to scrape website data. Please check the URL and try again.")
                     st.stop() # Use st.stop() to halt execution cleanly on critical failure
-                st.success(f"Successfully scraped data for: {scraped_data.get('company_name', 'Unknown Company')}")
+                if profile_status == "stored":
+                    st.success(f"Using stored profile for: {scraped_data.get('company_name', 'Unknown Company')}")
+                else:
+                    st.success(f"Successfully scraped data for: {scraped_data.get('company_name', 'Unknown Company')}")
                 with st.expander("View Scraped Data"):
                     st.json(scraped_data)
 
+                company_name_raw_for_file = scraped_data.get("company_name", "client") # Use a distinct var name
+                company_name_for_file = re.sub(r'[^\w\s-]', '', company_name_raw_for_file).strip().replace(' ', '_')
+                if not company_name_for_file: company_name_for_file = "client_content" # Fallback
+                
+                excel_file_name = f"{company_name_for_file}_lead_content.xlsx"
+
                 # 2. Parse Uploaded Documents
                 st.subheader("Step 2: Processing Uploaded Documents...")
                 additional_docs_text = ""
                 if additional_materials:
-                    additional_docs_text = extract_text_from_uploaded_files(additional_materials)
+                    documents_prefetched, additional_docs_text = take_documents_prefetch(st.session_state, additional_materials)
+                    if not documents_prefetched:
+                        additional_docs_text = extract_text_from_uploaded_files(additional_materials)
                     st.success(f"Successfully processed {len(additional_materials)} uploaded document(s).")
                     with st.expander("View Extracted Text from Documents (First 500 chars)"):
                         st.text(additional_docs_text[:500] + "..." if additional_docs_text else "No text extracted.")
                 else:
                     st.info("No additional documents uploaded.")
 
-                # 3. Generate Content (Store all in a dictionary)
-                all_generated_content = {}
-                
-                # Emails
-                st.subheader(f"Step 3.1: Generating {num_content_pieces} Email Versions...")
-                email_content = generate_email_content(
-                    OPENAI_API_KEY, scraped_data, additional_docs_text, 
-                    lead_objective_type, lead_objective_url, downloadable_asset_url, 
-                    num_content_pieces
-                )
-                all_generated_content["email"] = email_content
-                st.success(f"Generated {len(email_content)} email versions.")
-
-                # LinkedIn Ads
-                st.subheader(f"Step 3.2: Generating LinkedIn Ad Versions...")
-                # time.sleep(3) # Optional: Add delay if hitting rate limits frequently
-                linkedin_content = generate_linkedin_facebook_content(
-                    OPENAI_API_KEY, "LinkedIn", scraped_data, additional_docs_text,
-                    lead_objective_type, lead_objective_url, downloadable_asset_url,
-                    num_content_pieces 
-                )
-                all_generated_content["linkedin"] = linkedin_content
-                st.success(f"Generated {len(linkedin_content)} LinkedIn ad versions.")
-
-                # Facebook Ads
-                st.subheader(f"Step 3.3: Generating Facebook Ad Versions...")
-                # time.sleep(3) # Optional: Add delay
-                facebook_content = generate_linkedin_facebook_content(
-                    OPENAI_API_KEY, "Facebook", scraped_data, additional_docs_text,
-                    lead_objective_type, lead_objective_url, downloadable_asset_url,
-                    num_content_pieces
-                )
-                all_generated_content["facebook"] = facebook_content
-                st.success(f"Generated {len(facebook_content)} Facebook ad versions.")
-
-                # Google Search Ads
-                st.subheader(f"Step 3.4: Generating Google Search Ad Copy...")
-                # time.sleep(2) # Optional: Add delay
-                google_search_content = generate_google_search_ads(
-                    OPENAI_API_KEY, scraped_data, additional_docs_text,
-                    lead_objective_type, lead_objective_url, downloadable_asset_url
-                )
-                all_generated_content["google_search"] = google_search_content
-                st.success("Generated Google Search ad copy.")
-                
-                # Google Display Ads
-                st.subheader(f"Step 3.5: Generating Google Display Ad Copy...")
-                # time.sleep(2) # Optional: Add delay
-                google_display_content = generate_google_display_ads(
-                    OPENAI_API_KEY, scraped_data, additional_docs_text,
-                    lead_objective_type, lead_objective_url, downloadable_asset_url
-                )
-                all_generated_content["google_display"] = google_display_content
-                st.success("Generated Google Display ad copy.")
-
-                # Reasoning Text
-                st.subheader(f"Step 3.6: Generating Reasoning Text...")
-                # time.sleep(1) # Optional: Add delay
-                reasoning = generate_reasoning_text(
-                    OPENAI_API_KEY, scraped_data, additional_docs_text,
-                    lead_objective_type, lead_objective_url, downloadable_asset_url
-                )
-                all_generated_content["reasoning_text"] = reasoning
-                # Point 5: Reasoning error (Rate Limit) - Display warning in UI
-                if "Error code: 429" in reasoning and "rate_limit_exceeded" in reasoning:
-                    st.warning(
-                        "⚠️ Reasoning generation hit an API rate limit. "
-                        "The detailed error message has been included in the 'Reasoning' sheet of the Excel file. "
-                        "To resolve this, you may need to check your OpenAI account's rate limits, add a payment method, or wait before trying again. "
-                        "Other content has been generated successfully."
+                if campaign_variants:
+                    # 3-4. Campaign matrix: only generation fans out, one concurrent task per variant
+                    st.subheader(f"Step 3: Generating {len(campaign_variants)} Campaign Variants...")
+                    st.dataframe(campaign_variants, use_container_width=True, hide_index=True)
+                    variant_results = generate_campaign_matrix(
+                        OPENAI_API_KEY, scraped_data, additional_docs_text, campaign_variants,
+                        num_content_pieces, near_duplicate_threshold=near_duplicate_threshold
                     )
-                elif "Error generating reasoning text" in reasoning: # Catch other reasoning errors
-                     st.warning(f"⚠️ Could not fully generate reasoning text. The error has been included in the Excel: {reasoning[:100]}...")
-                else:
-                    st.success("Generated reasoning text.")
+                    for variant, content in variant_results:
+                        failed_count = len(find_failed_slices(content, num_content_pieces))
+                        if failed_count:
+                            st.warning(f"⚠️ {variant['label']} ({variant['lead_objective_type']}): {failed_count} content slice(s) contain errors or placeholders.")
+                    st.success(f"Generated {len(variant_results)} campaign variants.")
 
+                    st.subheader("Step 4: Compiling Campaign Matrix...")
+                    excel_bytes, excel_file_name, download_mime = write_campaign_matrix_output(
+                        variant_results, scraped_data, company_name_for_file, as_zip=matrix_as_zip
+                    )
+                    st.success("Campaign matrix compiled successfully!")
+                    st.session_state["last_run"] = {
+                        "scraped_data": scraped_data,
+                        "company_name_for_file": company_name_for_file,
+                        "excel_file_name": excel_file_name,
+                        "excel_bytes": excel_bytes,
+                        "download_mime": download_mime,
+                    }
+                else:
+                    # Sheets are added to the workbook as each stage finishes; the partial report is downloadable throughout
+                    workbook = IncrementalWorkbook(scraped_data)
+                    partial_download = st.sidebar.empty()
 
-                # 4. Create Excel File
-                st.subheader("Step 4: Compiling Excel Report...")
-                company_name_raw_for_file = scraped_data.get("company_name", "client") # Use a distinct var name
-                company_name_for_file = re.sub(r'[^\w\s-]', '', company_name_raw_for_file).strip().replace(' ', '_')
-                if not company_name_for_file: company_name_for_file = "client_content" # Fallback
+                    # 3. Generate Content (Store all in a dictionary)
+                    all_generated_content = {}
                 
-                excel_file_name = f"{company_name_for_file}_lead_content.xlsx"
+                    # Emails
+                    st.subheader(f"Step 3.1: Generating {num_content_pieces} Email Versions...")
+                    email_content = generate_email_content(
+                        OPENAI_API_KEY, scraped_data, additional_docs_text, 
+                        lead_objective_type, lead_objective_url, downloadable_asset_url, 
+                        num_content_pieces
+                    )
+                    all_generated_content["email"] = email_content
+                    workbook.update_stage("email", email_content)
+                    show_partial_download(partial_download, workbook, excel_file_name)
+                    st.success(f"Generated {len(email_content)} email versions.")
+
+                    # LinkedIn Ads
+                    st.subheader(f"Step 3.2: Generating LinkedIn Ad Versions...")
+                    # time.sleep(3) # Optional: Add delay if hitting rate limits frequently
+                    linkedin_content = generate_linkedin_facebook_content(
+                        OPENAI_API_KEY, "LinkedIn", scraped_data, additional_docs_text,
+                        lead_objective_type, lead_objective_url, downloadable_asset_url,
+                        num_content_pieces 
+                    )
+                    all_generated_content["linkedin"] = linkedin_content
+                    workbook.update_stage("linkedin", linkedin_content)
+                    show_partial_download(partial_download, workbook, excel_file_name)
+                    st.success(f"Generated {len(linkedin_content)} LinkedIn ad versions.")
+
+                    # Facebook Ads
+                    st.subheader(f"Step 3.3: Generating Facebook Ad Versions...")
+                    # time.sleep(3) # Optional: Add delay
+                    facebook_content = generate_linkedin_facebook_content(
+                        OPENAI_API_KEY, "Facebook", scraped_data, additional_docs_text,
+                        lead_objective_type, lead_objective_url, downloadable_asset_url,
+                        num_content_pieces
+                    )
+                    all_generated_content["facebook"] = facebook_content
+                    workbook.update_stage("facebook", facebook_content)
+                    show_partial_download(partial_download, workbook, excel_file_name)
+                    st.success(f"Generated {len(facebook_content)} Facebook ad versions.")
+
+                    # Google Search Ads
+                    st.subheader(f"Step 3.4: Generating Google Search Ad Copy...")
+                    # time.sleep(2) # Optional: Add delay
+                    google_search_content = generate_google_search_ads(
+                        OPENAI_API_KEY, scraped_data, additional_docs_text,
+                        lead_objective_type, lead_objective_url, downloadable_asset_url
+                    )
+                    all_generated_content["google_search"] = google_search_content
+                    workbook.update_stage("google_search", google_search_content)
+                    show_partial_download(partial_download, workbook, excel_file_name)
+                    st.success("Generated Google Search ad copy.")
                 
-                excel_bytes = create_excel_workbook(all_generated_content, scraped_data, company_name_for_file)
-                st.success("Excel report compiled successfully!")
-
-                # 5. Enable Download
-                st.subheader("Step 5: Download Your Report")
-                st.download_button(
-                    label="📥 Download Excel Report",
-                    data=excel_bytes,
-                    file_name=excel_file_name,
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True
-                )
+                    # Google Display Ads
+                    st.subheader(f"Step 3.5: Generating Google Display Ad Copy...")
+                    # time.sleep(2) # Optional: Add delay
+                    google_display_content = generate_google_display_ads(
+                        OPENAI_API_KEY, scraped_data, additional_docs_text,
+                        lead_objective_type, lead_objective_url, downloadable_asset_url
+                    )
+                    all_generated_content["google_display"] = google_display_content
+                    workbook.update_stage("google_display", google_display_content)
+                    show_partial_download(partial_download, workbook, excel_file_name)
+                    st.success("Generated Google Display ad copy.")
+
+                    # Reasoning Text
+                    st.subheader(f"Step 3.6: Generating Reasoning Text...")
+                    # time.sleep(1) # Optional: Add delay
+                    reasoning = generate_reasoning_text(
+                        OPENAI_API_KEY, scraped_data, additional_docs_text,
+                        lead_objective_type, lead_objective_url, downloadable_asset_url
+                    )
+                    all_generated_content["reasoning_text"] = reasoning
+                    workbook.update_stage("reasoning_text", reasoning)
+                    show_partial_download(partial_download, workbook, excel_file_name)
+                    # Point 5: Reasoning error (Rate Limit) - Display warning in UI
+                    if "Error code: 429" in reasoning and "rate_limit_exceeded" in reasoning:
+                        st.warning(
+                            "⚠️ Reasoning generation hit an API rate limit. "
+                            "The detailed error message has been included in the 'Reasoning' sheet of the Excel file. "
+                            "To resolve this, you may need to check your OpenAI account's rate limits, add a payment method, or wait before trying again. "
+                            "Other content has been generated successfully."
+                        )
+                    elif "Error generating reasoning text" in reasoning: # Catch other reasoning errors
+                         st.warning(f"⚠️ Could not fully generate reasoning text. The error has been included in the Excel: {reasoning[:100]}...")
+                    else:
+                        st.success("Generated reasoning text.")
+
+                    # Near-duplicates: regenerate only the flagged variants
+                    st.subheader("Step 3.7: Checking Variant Diversity...")
+                    all_generated_content, regenerated_counts = regenerate_near_duplicates(
+                        OPENAI_API_KEY, all_generated_content, scraped_data, additional_docs_text,
+                        lead_objective_type, lead_objective_url, downloadable_asset_url,
+                        threshold=near_duplicate_threshold
+                    )
+                    if regenerated_counts:
+                        workbook.update(all_generated_content) # Rewrites only the sheets with regenerated variants
+                        show_partial_download(partial_download, workbook, excel_file_name)
+                        st.info("Regenerated near-duplicate variants: " + ", ".join(
+                            f"{SLICE_LABELS[content_key]} ({count})" for content_key, count in regenerated_counts.items()
+                        ))
+                    scores = diversity_scores(all_generated_content, threshold=near_duplicate_threshold)
+                    if scores:
+                        for column, (content_key, score) in zip(st.columns(len(scores)), scores.items()):
+                            column.metric(
+                                f"{SLICE_LABELS[content_key]} Diversity", f"{score['score']:.0%}",
+                                help=f"{score['near_duplicates']} near-duplicate(s) remaining at threshold {near_duplicate_threshold:.2f}"
+                            )
+
+                    # Character limits: one batched rewrite request for violating items only
+                    st.subheader("Step 3.8: Checking Character Limits...")
+                    all_generated_content, limit_report = enforce_content_limits(OPENAI_API_KEY, all_generated_content)
+                    if limit_report["violations"]:
+                        st.info(
+                            f"{limit_report['violations']} field(s) exceeded platform limits: "
+                            f"{limit_report['rewritten']} rewritten by the model, {limit_report['truncated']} shortened at a word boundary."
+                        )
+                    else:
+                        st.success("All content is within platform character limits.")
+
+                    # 4. Create Excel File
+                    st.subheader("Step 4: Compiling Excel Report...")
+                    workbook.update(all_generated_content) # Only sheets changed by the limit check are rewritten
+                    excel_bytes = workbook.to_bytes()
+                    partial_download.empty()
+                    st.success("Excel report compiled successfully!")
+
+                    # 5. Keep the run so the report stays downloadable and failed slices can be repaired
+                    st.session_state["last_run"] = {
+                        "scraped_data": scraped_data,
+                        "additional_docs_text": additional_docs_text,
+                        "lead_objective_type": lead_objective_type,
+                        "lead_objective_url": lead_objective_url,
+                        "downloadable_asset_url": downloadable_asset_url,
+                        "num_content_pieces": num_content_pieces,
+                        "content": all_generated_content,
+                        "company_name_for_file": company_name_for_file,
+                        "excel_file_name": excel_file_name,
+                        "excel_bytes": excel_bytes.getvalue(),
+                        "workbook": workbook,
+                    }
                 st.balloons()
 
             except Exception as e:
                 st.error(f"An unexpected error occurred during content generation: {e}")
                 import traceback
                 st.error(f"Traceback: {traceback.format_exc()}")
+
+        # Profiling report is attached to the run without changing its output
+        if profile_result["report"] and st.session_state.get("last_run") not in (None, previous_run):
+            st.session_state["last_run"]["profile_report"] = profile_result["report"]
     # This else corresponds to 'if valid_inputs:'
     # else:
     #     st.warning("Please correct the input errors above before generating content.") # This message is implicitly handled by individual error messages now.
 
-else:
+elif not st.session_state.get("last_run"):
     st.info("Fill in the details in the sidebar and click 'Generate Content' to start.")
 
+# --- Download & Repair (persists across reruns) ---
+last_run = st.session_state.get("last_run")
+if last_run:
+    st.subheader("Step 5: Download Your Report")
+    st.download_button(
+        label="📥 Download ZIP of Reports" if last_run.get("download_mime") == "application/zip" else "📥 Download Excel Report",
+        data=last_run["excel_bytes"],
+        file_name=last_run["excel_file_name"],
+        mime=last_run.get("download_mime", XLSX_MIME),
+        use_container_width=True
+    )
+
+    if last_run.get("profile_report"):
+        st.download_button(
+            label="🧪 Download Profile Report",
+            data=last_run["profile_report"],
+            file_name=f"{last_run['company_name_for_file']}_profile.txt",
+            mime="text/plain",
+            use_container_width=True
+        )
+
+    # Repair works on a single campaign's content; matrix runs report failed slices per variant instead
+    failed_slices = find_failed_slices(last_run["content"], last_run["num_content_pieces"]) if "content" in last_run else []
+    if failed_slices:
+        st.warning(
+            f"⚠️ {len(failed_slices)} content slice(s) contain errors or placeholders: "
+            + ", ".join(describe_slice(content_slice) for content_slice in failed_slices)
+        )
+        if st.button("🔧 Repair Failed Items", use_container_width=True):
+            with st.spinner("Regenerating only the failed items... ⏳"), \
+                    span("repair_run", client=last_run["scraped_data"].get("company_name")):
+                repaired_content, repaired_slices = repair_generated_content(
+                    OPENAI_API_KEY, last_run["content"], last_run["scraped_data"], last_run["additional_docs_text"],
+                    last_run["lead_objective_type"], last_run["lead_objective_url"], last_run["downloadable_asset_url"],
+                    last_run["num_content_pieces"]
+                )
+                repaired_content, _ = enforce_content_limits(OPENAI_API_KEY, repaired_content)
+                last_run["content"] = repaired_content
+                last_run["workbook"].update(repaired_content) # Only the repaired stages' sheets are rewritten
+                last_run["excel_bytes"] = last_run["workbook"].to_bytes().getvalue()
+                last_run["repaired_slices"] = [describe_slice(content_slice) for content_slice in repaired_slices]
+            st.rerun()
+
+    task_metrics = get_task_metrics_summary()
+    if task_metrics:
+        with st.expander("⏱️ Model Routing: Latency & Cost per Task (since server start)"):
+            st.dataframe(task_metrics, use_container_width=True, hide_index=True)
+
+    if last_run.get("repaired_slices"):
+        st.success("Repaired: " + ", ".join(last_run["repaired_slices"]))
+
 st.sidebar.markdown("---")
-st.sidebar.markdown("Made by M.")
\ No newline at end of file
+st.sidebar.markdown("Made by M.")
+
+# The page is drawn: load heavy libraries and build clients in the background before the first Generate click
+start_warmup(OPENAI_API_KEY)
\ No newline at end of file
@@ -0,0 +1,100 @@
+# async_runner.py
+"""
+One shared asyncio event loop, running in a daemon thread, for all network I/O.
+
+The async pipeline (scraper fetches, LLM calls, generate_*_async) runs on this loop, so concurrent
+calls share a pooled HTTP client and one OpenAI client per API key instead of a thread per call.
+Sync code - the Streamlit app, batch tools and the sync wrappers kept for existing callers - submits
+coroutines with run_sync(); the caller's context (current tracing span) is carried into the coroutine.
+
+    from async_runner import run_sync
+    emails = run_sync(generate_email_content_async(api_key, ...))
+"""
+import asyncio
+import contextvars
+import concurrent.futures
+import threading
+
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+_openai_clients = {} # api_key -> AsyncOpenAI, only touched on the loop thread
+_http_client = None
+
+def get_event_loop():
+    """The shared loop, started on first use."""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="async-runner", daemon=True)
+            _loop_thread.start()
+    return _loop
+
+def in_runner_thread():
+    return _loop_thread is not None and threading.current_thread() is _loop_thread
+
+def submit(coro):
+    """
+    Schedules `coro` on the shared loop in the caller's context. Returns a concurrent.futures.Future;
+    cancelling it cancels the coroutine.
+    """
+    loop = get_event_loop()
+    context = contextvars.copy_context()
+    future = concurrent.futures.Future()
+
+    def on_done(task):
+        if task.cancelled():
+            future.cancel()
+            return
+        try:
+            if task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        except concurrent.futures.InvalidStateError:
+            pass # The caller cancelled the future while the task was finishing
+
+    def start():
+        if future.cancelled():
+            coro.close()
+            return
+        task = loop.create_task(coro, context=context)
+        task.add_done_callback(on_done)
+        # Cancelling the returned future cancels the running task (e.g. a prefetch whose input changed)
+        future.add_done_callback(lambda f: f.cancelled() and loop.call_soon_threadsafe(task.cancel))
+
+    loop.call_soon_threadsafe(start)
+    return future
+
+def run_sync(coro):
+    """Runs `coro` on the shared loop and blocks until it finishes. Must not be called from the loop itself."""
+    if in_runner_thread():
+        coro.close()
+        raise RuntimeError("run_sync() called from the async runner thread; await the coroutine instead")
+    return submit(coro).result()
+
+def call_on_loop(func):
+    """Runs a plain callable on the loop thread and returns its result (e.g. to enable a per-thread profiler)."""
+    async def wrapper():
+        return func()
+    return run_sync(wrapper())
+
+def get_async_openai_client(api_key):
+    """Pooled AsyncOpenAI client for `api_key` (connection pool and retries live in the client)."""
+    client = _openai_clients.get(api_key)
+    if client is None:
+        from openai import AsyncOpenAI # The openai package is slow to import; load it on first use
+        client = _openai_clients[api_key] = AsyncOpenAI(api_key=api_key)
+    return client
+
+def get_async_http_client():
+    """Pooled httpx.AsyncClient for scraper fetches."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _http_client
@@ -0,0 +1,76 @@
+# benchmarks/bench_bulk.py
+"""
+Runs bulk mode (bulk_mode.py) end to end against the local stand-ins: the stub server's Files and
+Batches endpoints answer the batch rounds and the site server serves the client websites. Reports the
+rounds, how many requests went through batches vs. the live API, and the workbooks written.
+
+    python benchmarks/bench_bulk.py --clients 12 --versions 3
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=6)
+    parser.add_argument("--versions", type=int, default=3, help="Content pieces per objective")
+    parser.add_argument("--batch-delay-s", type=float, default=0.0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="mcg-bulk-")
+    os.environ.setdefault("MCG_TRACE_FILE", os.path.join(work_dir, "spans.jsonl"))
+    os.environ["MCG_PROFILE_DB"] = os.path.join(work_dir, "profiles.sqlite3") # Every client is scraped fresh
+
+    from site_server import start_site_server
+    from stub_openai_server import start_stub_openai_server
+    from async_runner import run_sync
+    from bulk_mode import load_clients, run_bulk_async, write_client_workbooks
+
+    site_server = start_site_server(os.path.join(BENCH_DIR, "fixtures", "sites"), 0)
+    stub = start_stub_openai_server(batch_delay_s=args.batch_delay_s)
+    os.environ["OPENAI_BASE_URL"] = stub.base_url
+    site_pages = sorted(os.listdir(os.path.join(BENCH_DIR, "fixtures", "sites")))
+
+    clients_path = os.path.join(work_dir, "clients.json")
+    with open(clients_path, "w", encoding="utf-8") as f:
+        json.dump([{
+            "id": f"client{i:02d}",
+            "url": f"{site_server.base_url}/{site_pages[i % len(site_pages)]}",
+            "lead_objective_url": "https://client.example.com/demo",
+            "downloadable_asset_url": "https://client.example.com/whitepaper.pdf",
+            "num_content_pieces": args.versions,
+        } for i in range(args.clients)], f)
+    clients = load_clients(clients_path)
+
+    log_sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with log_sink:
+        results, report = run_sync(run_bulk_async("sk-benchmark-stub", clients, os.path.join(work_dir, "batches"),
+                                                  poll_interval_s=0.05, progress=lambda message: None))
+        paths = write_client_workbooks(results, clients, os.path.join(work_dir, "out"))
+    wall = time.perf_counter() - start
+
+    print(f"== bulk mode: {args.clients} clients, {args.versions} pieces per objective ==")
+    for r in report["rounds"]:
+        print(f"  round {r['round']}: {r['requests']:4d} requests for {r['clients']} client(s), "
+              f"{r['failed']} failed, {r['missing']} missing")
+    print(f"  batches submitted         {stub.batch_count}")
+    print(f"  requests via batches      {stub.batch_request_count}")
+    print(f"  live requests             {stub.request_count} (profile extraction)")
+    print(f"  workbooks written         {len(paths)} -> {os.path.join(work_dir, 'out')}")
+    print(f"  wall time                 {wall:.2f}s")
+    site_server.shutdown()
+    stub.shutdown()
+
+if __name__ == "__main__":
+    main()
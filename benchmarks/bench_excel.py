@@ -0,0 +1,139 @@
+# benchmarks/bench_excel.py
+"""
+Benchmarks create_excel_workbook for large batches.
+
+Reports build+save time, peak traced memory and how many openpyxl style objects are alive
+after the workbook is built, for both the in-memory and the streaming (write-only) mode, plus the
+time IncrementalWorkbook takes to rewrite one regenerated stage. Pass --ref <git ref> to run the same measurement against the
+excel_generator.py from another commit for a before/after comparison.
+
+    python benchmarks/bench_excel.py --versions 20 --repeat 5 --ref HEAD~1
+"""
+import argparse
+import contextlib
+import gc
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import openpyxl
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from sample_data import make_sample_content, SAMPLE_SCRAPED_DATA
+
+STYLE_CLASSES = (Font, PatternFill, Alignment, Border, Side, NamedStyle)
+
+def _load_excel_generator(ref=None):
+    """Imports excel_generator from the working tree, or from `ref` via git show."""
+    if ref is None:
+        path = os.path.join(REPO_ROOT, "excel_generator.py")
+    else:
+        source = subprocess.run(["git", "show", f"{ref}:excel_generator.py"], cwd=REPO_ROOT,
+                                check=True, capture_output=True, text=True).stdout
+        handle, path = tempfile.mkstemp(suffix=".py")
+        with os.fdopen(handle, "w") as f:
+            f.write(source)
+    spec = importlib.util.spec_from_file_location(f"excel_generator_{ref or 'worktree'}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if ref is not None:
+        os.remove(path)
+    return module
+
+def _count_style_objects():
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, STYLE_CLASSES))
+
+@contextlib.contextmanager
+def _style_objects_at_save(baseline):
+    """
+    Counts live style objects when openpyxl.Workbook.save is called, i.e. with the finished workbook
+    still alive, whatever the module under test does with it afterwards. Works the same for every ref.
+    """
+    counts = []
+    original_save = openpyxl.Workbook.save
+
+    def counting_save(wb, *args, **kwargs):
+        counts.append(_count_style_objects() - baseline)
+        return original_save(wb, *args, **kwargs)
+
+    openpyxl.Workbook.save = counting_save
+    try:
+        yield counts
+    finally:
+        openpyxl.Workbook.save = original_save
+
+def run_benchmark(excel_generator, content, repeat, **workbook_kwargs):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        excel_generator.create_excel_workbook(content, SAMPLE_SCRAPED_DATA, "bench", **workbook_kwargs)
+        timings.append(time.perf_counter() - start)
+
+    # Peak memory and live style objects, each from one build measured separately from the timed runs
+    tracemalloc.start()
+    excel_bytes = excel_generator.create_excel_workbook(content, SAMPLE_SCRAPED_DATA, "bench", **workbook_kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del excel_bytes
+    gc.collect()
+    with _style_objects_at_save(_count_style_objects()) as counts:
+        excel_bytes = excel_generator.create_excel_workbook(content, SAMPLE_SCRAPED_DATA, "bench", **workbook_kwargs)
+    style_objects = counts[0] if counts else None
+
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "peak_mb": peak / 1024 / 1024,
+        "xlsx_kb": len(excel_bytes.getvalue()) / 1024,
+        "style_objects": style_objects,
+    }
+
+def run_stage_rewrite_benchmark(excel_generator, content, repeat):
+    """Time to rewrite one regenerated stage's sheet and reassemble the .xlsx with IncrementalWorkbook."""
+    workbook = excel_generator.IncrementalWorkbook(SAMPLE_SCRAPED_DATA)
+    workbook.update(content)
+    timings = []
+    for i in range(repeat):
+        regenerated = [dict(item, Body=f"{item['Body']} (regenerated {i})") for item in content["email"]]
+        start = time.perf_counter()
+        workbook.update_stage("email", regenerated)
+        workbook.to_bytes()
+        timings.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(timings), "min_s": min(timings)}
+
+def _print_result(label, result):
+    style_objects = result["style_objects"] if result["style_objects"] is not None else "n/a"
+    print(f"{label:<12} median {result['median_s'] * 1000:8.1f} ms | min {result['min_s'] * 1000:8.1f} ms | "
+          f"peak {result['peak_mb']:6.1f} MB | xlsx {result['xlsx_kb']:7.1f} KB | live style objects {style_objects}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--versions", type=int, default=20, help="Versions per objective (emails and social ads)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ref", help="Git ref to compare against (e.g. HEAD~1)")
+    args = parser.parse_args()
+
+    content = make_sample_content(args.versions)
+    rows = sum(len(content[key]) for key in ["email", "linkedin", "facebook"])
+    print(f"create_excel_workbook: {args.versions} versions x 3 objectives x 2 platforms + emails ({rows} table rows)")
+
+    excel_generator = _load_excel_generator()
+    _print_result("worktree", run_benchmark(excel_generator, content, args.repeat))
+    _print_result("write-only", run_benchmark(excel_generator, content, args.repeat, write_only=True))
+    if hasattr(excel_generator, "IncrementalWorkbook"):
+        result = run_stage_rewrite_benchmark(excel_generator, content, args.repeat)
+        print(f"{'email sheet':<12} median {result['median_s'] * 1000:8.1f} ms | min {result['min_s'] * 1000:8.1f} ms")
+    if args.ref:
+        _print_result(args.ref, run_benchmark(_load_excel_generator(args.ref), content, args.repeat))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# benchmarks/bench_startup.py
+"""
+Measures the app's cold start. Every measurement runs in a fresh interpreter:
+
+  - import time of each app module on its own (includes the libraries it pulls in)
+  - time-to-first-paint: streamlit's AppTest runs app.py once with a dummy API key and no input,
+    i.e. until the sidebar and landing page are drawn (warm-up disabled)
+  - which heavy libraries are already loaded at first paint
+  - how long the background warm-up (warmup.py) takes to finish, when the tree has one
+
+Pass --ref <git ref> to measure another commit (checked out into a temporary git worktree) for a
+before/after comparison.
+
+    python benchmarks/bench_startup.py --repeat 3 --ref HEAD~1
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP_MODULES = ["utils", "tracing", "recorder", "scraper", "doc_parser", "openai_handler",
+               "excel_generator", "profile_store", "campaign_matrix"]
+HEAVY_LIBRARIES = ["openai", "httpx", "bs4", "PyPDF2", "pptx", "openpyxl", "requests"]
+
+_IMPORT_CHILD = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+try:
+    __import__(sys.argv[2])
+except ImportError:
+    print("null")
+else:
+    print(time.perf_counter() - start)
+"""
+
+_FIRST_PAINT_CHILD = """
+import json, os, sys, time
+os.environ["MCG_TRACING"] = "0"
+os.environ["MCG_WARMUP"] = "0"
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_loaded = time.perf_counter()
+at = AppTest.from_file(os.path.join(sys.argv[1], "app.py"), default_timeout=120)
+at.secrets["OPENAI_API_KEY"] = "sk-startup-benchmark"
+at.run()
+painted = time.perf_counter()
+print(json.dumps({
+    "streamlit_import_s": streamlit_loaded - start,
+    "first_paint_s": painted - streamlit_loaded,
+    "exceptions": [str(e.value) for e in at.exception],
+    "loaded": [name for name in json.loads(sys.argv[2]) if name in sys.modules],
+}))
+"""
+
+_WARMUP_CHILD = """
+import os, sys, time
+os.environ["MCG_TRACING"] = "0"
+sys.path.insert(0, sys.argv[1])
+try:
+    import warmup
+except ImportError:
+    print("null")
+else:
+    start = time.perf_counter()
+    warmup.start_warmup("sk-startup-benchmark").join()
+    print(time.perf_counter() - start)
+"""
+
+def _run_child(code, tree, *args):
+    result = subprocess.run([sys.executable, "-c", code, tree, *args], cwd=tree,
+                            check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def measure_tree(tree, repeat):
+    imports = {}
+    for module in APP_MODULES:
+        timings = [_run_child(_IMPORT_CHILD, tree, module) for _ in range(repeat)]
+        if None not in timings:
+            imports[module] = statistics.median(timings)
+
+    paints = [_run_child(_FIRST_PAINT_CHILD, tree, json.dumps(HEAVY_LIBRARIES)) for _ in range(repeat)]
+    if paints[0]["exceptions"]:
+        print(f"app.py raised during first paint: {paints[0]['exceptions']}")
+    warmups = [_run_child(_WARMUP_CHILD, tree) for _ in range(repeat)]
+    return {
+        "imports": imports,
+        "streamlit_import_s": statistics.median(p["streamlit_import_s"] for p in paints),
+        "first_paint_s": statistics.median(p["first_paint_s"] for p in paints),
+        "loaded_at_first_paint": paints[0]["loaded"],
+        "warmup_s": statistics.median(warmups) if None not in warmups else None,
+    }
+
+def _print_result(label, result):
+    print(f"== {label} ==")
+    for module, seconds in result["imports"].items():
+        print(f"  import {module:<18} {seconds * 1000:8.1f} ms")
+    print(f"  streamlit import          {result['streamlit_import_s'] * 1000:8.1f} ms")
+    print(f"  time to first paint       {result['first_paint_s'] * 1000:8.1f} ms (after streamlit is imported)")
+    print(f"  heavy libraries loaded at first paint: {', '.join(result['loaded_at_first_paint']) or 'none'}")
+    if result["warmup_s"] is not None:
+        print(f"  background warm-up        {result['warmup_s'] * 1000:8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ref", help="Git ref to compare against (e.g. HEAD~1)")
+    args = parser.parse_args()
+
+    _print_result("worktree", measure_tree(REPO_ROOT, args.repeat))
+    if args.ref:
+        ref_tree = tempfile.mkdtemp(prefix="mcg-startup-")
+        subprocess.run(["git", "worktree", "add", "--detach", ref_tree, args.ref], cwd=REPO_ROOT,
+                       check=True, capture_output=True)
+        try:
+            _print_result(args.ref, measure_tree(ref_tree, args.repeat))
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", ref_tree], cwd=REPO_ROOT, check=True, capture_output=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/fixtures.py
+"""
+Benchmark fixtures: recorded client websites plus generated PDF/PPTX uploads of several sizes.
+
+Documents are generated on the fly (no binaries in the repo) into a scratch directory.
+"""
+import os
+import shutil
+
+from pptx import Presentation
+from pptx.util import Inches
+
+SITES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sites")
+
+# Document sizes: name -> (PDF pages, PPTX slides)
+DOCUMENT_SIZES = {"small": (2, 3), "medium": (15, 12), "large": (60, 40)}
+
+PARAGRAPH = ("Our platform helps operations and revenue teams plan, forecast and report with confidence. "
+             "Customers cut reporting time by half and see results in the first quarter. ")
+
+class FixtureUpload:
+    """Minimal stand-in for Streamlit's UploadedFile (name + getvalue())."""
+
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        with open(path, "rb") as f:
+            self._data = f.read()
+
+    def getvalue(self):
+        return self._data
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, num_pages, lines_per_page=40):
+    """Writes a simple text PDF (Helvetica, one text stream per page) without extra dependencies."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in range(num_pages):
+        lines = [f"Page {page + 1} - line {line + 1}: {PARAGRAPH[:90]}" for line in range(lines_per_page)]
+        stream = "BT /F1 9 Tf 40 800 Td 12 TL " + " ".join(f"({_pdf_escape(line)}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(output)
+
+def write_pptx(path, num_slides):
+    prs = Presentation()
+    for slide_number in range(num_slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[1]) # Title and Content
+        slide.shapes.title.text = f"Slide {slide_number + 1}: Why customers choose us"
+        slide.placeholders[1].text = "\n".join(PARAGRAPH for _ in range(3))
+        textbox = slide.shapes.add_textbox(Inches(1), Inches(6), Inches(8), Inches(1))
+        textbox.text_frame.text = f"Case study {slide_number + 1}: 14% lower costs in year one."
+    prs.save(path)
+
+def write_large_site(path, num_sections=200):
+    """A heavy page (big inline scripts/styles, many sections) to stress BeautifulSoup parsing."""
+    script = "<script>" + "var tracking = {};" * 2000 + "</script>"
+    style = "<style>" + ".c{color:#333;margin:0}" * 2000 + "</style>"
+    sections = "".join(f"<section><h2>Feature {i}</h2><p>{PARAGRAPH * 3}</p><a href='/demo'>Book a Demo</a></section>"
+                       for i in range(num_sections))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"<!DOCTYPE html><html><head><title>Megacorp Platform</title>{style}{script}</head>"
+                f"<body><h1>Megacorp Platform</h1>{sections}</body></html>")
+
+def prepare_fixtures(work_dir):
+    """
+    Copies the recorded sites and generates the large site and the PDF/PPTX uploads into `work_dir`.
+    Returns {"sites_dir": ..., "site_pages": [...], "documents": {size: [paths]}}.
+    """
+    sites_dir = os.path.join(work_dir, "sites")
+    shutil.copytree(SITES_DIR, sites_dir, dirs_exist_ok=True)
+    write_large_site(os.path.join(sites_dir, "megacorp.html"))
+
+    documents = {}
+    for size, (num_pages, num_slides) in DOCUMENT_SIZES.items():
+        pdf_path = os.path.join(work_dir, f"brochure-{size}.pdf")
+        pptx_path = os.path.join(work_dir, f"pitch-deck-{size}.pptx")
+        write_pdf(pdf_path, num_pages)
+        write_pptx(pptx_path, num_slides)
+        documents[size] = [pdf_path, pptx_path]
+
+    site_pages = sorted(name for name in os.listdir(sites_dir) if name.endswith(".html"))
+    return {"sites_dir": sites_dir, "site_pages": site_pages, "documents": documents}
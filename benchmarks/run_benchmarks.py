@@ -0,0 +1,235 @@
+# benchmarks/run_benchmarks.py
+"""
+End-to-end offline benchmark of the content pipeline.
+
+Runs the real pipeline (scrape -> document parsing -> every generate_* call -> diversity and
+limit checks -> create_excel_workbook) against:
+  - a local OpenAI-compatible stub (stub_openai_server.py) with configurable latency,
+    429 rate-limit responses and truncated-JSON responses
+  - a local HTTP server serving recorded client websites (fixtures/sites)
+  - generated PDF/PPTX uploads of several sizes (fixtures.py)
+
+Reports per-stage and end-to-end latency, throughput (clients/minute) and peak traced memory,
+and compares them with a saved baseline.
+
+--record/--replay capture the run's LLM and HTTP traffic into a cassette (recorder.py) and serve it
+back, so CPU-side changes can be compared on identical inputs; --zero-latency replays without waits.
+
+    python benchmarks/run_benchmarks.py --clients 6 --latency-ms 200 --save-baseline
+    python benchmarks/run_benchmarks.py --clients 6 --latency-ms 200          # compares with the baseline
+    python benchmarks/run_benchmarks.py --record /tmp/run.jsonl.gz
+    python benchmarks/run_benchmarks.py --replay /tmp/run.jsonl.gz --zero-latency
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+DEFAULT_BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+CASSETTE_SITE_PORT = 8765 # Fixed so recorded URLs match on replay
+REGRESSION_TOLERANCE = 0.10 # Flag stages more than 10% slower than the baseline
+
+def _timed(stage_timings, stage, func, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        stage_timings.setdefault(stage, []).append(time.perf_counter() - start)
+
+def run_client_pipeline(client, api_key, num_content_pieces, stage_timings):
+    """Runs one client through the same steps, in the same order, as app.py, inside a traced run span."""
+    from tracing import span
+
+    with span("run", client=client["url"]):
+        return _run_client_stages(client, api_key, num_content_pieces, stage_timings)
+
+def _run_client_stages(client, api_key, num_content_pieces, stage_timings):
+    from scraper import scrape_website_data
+    from doc_parser import extract_text_from_uploaded_files
+    from openai_handler import (generate_email_content, generate_linkedin_facebook_content, generate_google_search_ads,
+                                generate_google_display_ads, generate_reasoning_text)
+    from diversity import regenerate_near_duplicates
+    from content_validator import enforce_content_limits
+    from excel_generator import create_excel_workbook
+    from fixtures import FixtureUpload
+
+    objective = ("Demo Booking", client["lead_objective_url"], client["downloadable_asset_url"])
+    scraped_data = _timed(stage_timings, "scrape_website_data", scrape_website_data, client["url"], api_key)
+    uploads = [FixtureUpload(path) for path in client["documents"]]
+    docs_text = _timed(stage_timings, "extract_text_from_uploaded_files", extract_text_from_uploaded_files, uploads)
+
+    content = {}
+    content["email"] = _timed(stage_timings, "generate_email_content", generate_email_content,
+                              api_key, scraped_data, docs_text, *objective, num_content_pieces)
+    for key, platform in [("linkedin", "LinkedIn"), ("facebook", "Facebook")]:
+        content[key] = _timed(stage_timings, f"generate_linkedin_facebook_content[{platform}]", generate_linkedin_facebook_content,
+                              api_key, platform, scraped_data, docs_text, *objective, num_content_pieces)
+    content["google_search"] = _timed(stage_timings, "generate_google_search_ads", generate_google_search_ads,
+                                      api_key, scraped_data, docs_text, *objective)
+    content["google_display"] = _timed(stage_timings, "generate_google_display_ads", generate_google_display_ads,
+                                       api_key, scraped_data, docs_text, *objective)
+    content["reasoning_text"] = _timed(stage_timings, "generate_reasoning_text", generate_reasoning_text,
+                                       api_key, scraped_data, docs_text, *objective)
+    content, _ = _timed(stage_timings, "regenerate_near_duplicates", regenerate_near_duplicates,
+                        api_key, content, scraped_data, docs_text, *objective)
+    content, _ = _timed(stage_timings, "enforce_content_limits", enforce_content_limits, api_key, content)
+    excel_bytes = _timed(stage_timings, "create_excel_workbook", create_excel_workbook,
+                         content, scraped_data, scraped_data.get("company_name", "client"))
+    return len(excel_bytes.getvalue())
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def run_suite(args):
+    from fixtures import prepare_fixtures
+    from site_server import start_site_server
+    from stub_openai_server import start_stub_openai_server
+    from recorder import configure_traffic_mode
+    from utils import get_task_metrics_summary
+
+    if args.record:
+        configure_traffic_mode("record", args.record)
+    elif args.replay:
+        configure_traffic_mode("replay", args.replay, "zero" if args.zero_latency else "original")
+
+    work_dir = tempfile.mkdtemp(prefix="mcg-bench-")
+    os.environ.setdefault("MCG_TRACING", "1")
+    os.environ.setdefault("MCG_TRACE_FILE", os.path.join(work_dir, "spans.jsonl")) # Keep benchmark spans out of traces/
+    fixture_info = prepare_fixtures(work_dir)
+    site_server = start_site_server(fixture_info["sites_dir"], CASSETTE_SITE_PORT if args.record or args.replay else 0)
+    stub = start_stub_openai_server(latency_ms=args.latency_ms, rate_limit_rate=args.rate_limit_rate,
+                                    truncate_rate=args.truncate_rate, seed=args.seed)
+    os.environ["OPENAI_BASE_URL"] = stub.base_url # Picked up by every OpenAI() client the pipeline creates
+
+    sizes = list(fixture_info["documents"])
+    clients = [{
+        "url": f"{site_server.base_url}/{fixture_info['site_pages'][i % len(fixture_info['site_pages'])]}",
+        "documents": fixture_info["documents"][sizes[i % len(sizes)]],
+        "lead_objective_url": "https://client.example.com/demo",
+        "downloadable_asset_url": "https://client.example.com/whitepaper.pdf",
+    } for i in range(args.clients)]
+
+    stage_timings = {}
+    end_to_end = []
+    lock = threading.Lock()
+
+    def run_one(client):
+        timings = {}
+        start = time.perf_counter()
+        run_client_pipeline(client, "sk-benchmark-stub", args.versions, timings)
+        elapsed = time.perf_counter() - start
+        with lock:
+            end_to_end.append(elapsed)
+            for stage, values in timings.items():
+                stage_timings.setdefault(stage, []).extend(values)
+
+    if args.memory:
+        tracemalloc.start()
+    log_sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    wall_start = time.perf_counter()
+    with log_sink:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(run_one, clients))
+    wall = time.perf_counter() - wall_start
+    peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024 if args.memory else None
+    if args.memory:
+        tracemalloc.stop()
+
+    site_server.shutdown()
+    stub.shutdown()
+    print(f"Spans written to {os.environ['MCG_TRACE_FILE']} (view with: python trace_viewer.py --file ...)")
+    return {
+        "config": {key: getattr(args, key) for key in ["clients", "concurrency", "versions", "latency_ms",
+                                                      "rate_limit_rate", "truncate_rate", "seed", "replay", "zero_latency"]},
+        "stages": {stage: {"median_s": statistics.median(values), "p95_s": _percentile(values, 0.95),
+                           "total_s": sum(values), "calls": len(values)}
+                   for stage, values in stage_timings.items()},
+        "end_to_end": {"median_s": statistics.median(end_to_end), "p95_s": _percentile(end_to_end, 0.95)},
+        "wall_s": wall,
+        "throughput_clients_per_min": args.clients / wall * 60,
+        "peak_memory_mb": peak_mb,
+        "tasks": get_task_metrics_summary(),
+        "stub": {"requests": stub.request_count, "rate_limited": stub.rate_limited_count, "truncated": stub.truncated_count},
+    }
+
+def _delta(current, baseline, lower_is_better=True):
+    if not baseline:
+        return ""
+    change = (current - baseline) / baseline
+    worse = change > REGRESSION_TOLERANCE if lower_is_better else change < -REGRESSION_TOLERANCE
+    return f"{change:+7.1%}{'  <-- regression' if worse else ''}"
+
+def print_report(results, baseline=None):
+    baseline_stages = (baseline or {}).get("stages", {})
+    print(f"\n{'stage':<52}{'median ms':>11}{'p95 ms':>10}{'calls':>7}  vs baseline")
+    for stage, stats in results["stages"].items():
+        base = baseline_stages.get(stage, {}).get("median_s")
+        print(f"{stage:<52}{stats['median_s'] * 1000:>11.1f}{stats['p95_s'] * 1000:>10.1f}{stats['calls']:>7}  {_delta(stats['median_s'], base)}")
+
+    base_e2e = (baseline or {}).get("end_to_end", {}).get("median_s")
+    base_tp = (baseline or {}).get("throughput_clients_per_min")
+    base_mem = (baseline or {}).get("peak_memory_mb")
+    print(f"\nend-to-end per client: median {results['end_to_end']['median_s']:.2f} s, "
+          f"p95 {results['end_to_end']['p95_s']:.2f} s  {_delta(results['end_to_end']['median_s'], base_e2e)}")
+    print(f"throughput: {results['throughput_clients_per_min']:.1f} clients/min  "
+          f"{_delta(results['throughput_clients_per_min'], base_tp, lower_is_better=False)}")
+    if results["peak_memory_mb"] is not None:
+        print(f"peak traced memory: {results['peak_memory_mb']:.1f} MB  {_delta(results['peak_memory_mb'], base_mem)}")
+    print(f"\n{'task':<20}{'calls':>6}{'avg s':>8}{'max s':>8}{'over budget':>13}{'est. cost USD':>15}  models")
+    for row in results.get("tasks", []):
+        print(f"{row['Task']:<20}{row['Calls']:>6}{row['Avg latency (s)']:>8.2f}{row['Max latency (s)']:>8.2f}"
+              f"{row['Over budget']:>13}{row['Est. cost (USD)']:>15.4f}  {row['Models']}")
+    print(f"stub: {results['stub']['requests']} requests, {results['stub']['rate_limited']} rate-limited, "
+          f"{results['stub']['truncated']} truncated")
+    if baseline and baseline.get("config") != results["config"]:
+        print("note: baseline was recorded with a different configuration; deltas are not like-for-like.")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1, help="Clients processed in parallel")
+    parser.add_argument("--versions", type=int, default=10, help="Content pieces per objective")
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", metavar="CASSETTE", help="Record LLM/HTTP traffic to this cassette")
+    parser.add_argument("--replay", metavar="CASSETTE", help="Replay LLM/HTTP traffic from this cassette")
+    parser.add_argument("--zero-latency", action="store_true", help="With --replay, skip the recorded latency")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Skip tracemalloc (lower overhead)")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own progress output")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/sample_data.py
+"""Synthetic generated-content payloads shaped like the generate_* outputs, for offline benchmarks."""
+
+SOCIAL_AD_OBJECTIVES = ["Brand Awareness", "Demand Gen", "Demand Capture"]
+
+SAMPLE_SCRAPED_DATA = {
+    "company_name": "Acme Analytics",
+    "tagline": "Decisions at the speed of data",
+    "mission_statement": "Help every team make confident, data-driven decisions.",
+    "industry": "B2B SaaS / Analytics",
+    "products_services": ["Realtime dashboards", "Forecasting", "Data connectors"],
+    "usps_value_proposition": "Set up in minutes, no data engineering required.",
+    "target_audience": "Operations and revenue leaders at mid-market companies",
+    "tone_of_voice": "Confident, friendly, practical",
+    "ctas": ["Book a Demo", "Start Free Trial"],
+}
+
+def _sentence(i, words=40):
+    vocabulary = ["growth", "pipeline", "teams", "insight", "forecast", "faster", "revenue", "customers",
+                  "automate", "reporting", "confidence", "dashboards", "results", "weekly", "decisions"]
+    return " ".join(vocabulary[(i * 7 + k) % len(vocabulary)] for k in range(words)).capitalize() + "."
+
+def make_sample_content(num_versions=20):
+    """All-generated-content dict with `num_versions` emails and per-objective LinkedIn/Facebook ads."""
+    emails = [{
+        "Version #": i + 1, "Objective": "Demo Booking", "Headline": f"Week {i + 1}: {_sentence(i, 6)}",
+        "SubjectLine": _sentence(i, 8)[:70], "Body": "\n".join(_sentence(i + k, 25) for k in range(4)), "CTA": "Book a Demo",
+    } for i in range(num_versions)]
+
+    linkedin, facebook = [], []
+    for o, ad_objective in enumerate(SOCIAL_AD_OBJECTIVES):
+        for k in range(num_versions):
+            version = o * num_versions + k + 1
+            linkedin.append({
+                "Version #": version, "AdName": f"Acme Analytics - {ad_objective} Ad - V{version}", "Objective": ad_objective,
+                "IntroductoryText": _sentence(version, 60)[:500], "ImageCopy": _sentence(version, 10),
+                "Headline": _sentence(version, 8)[:70], "Destination": "https://acme.example.com/demo", "CTAButton": "Request Demo",
+            })
+            facebook.append({
+                "Version #": version, "AdName": f"Acme Analytics - {ad_objective} Ad - V{version}", "Objective": ad_objective,
+                "PrimaryText": _sentence(version, 60)[:500], "ImageCopy": _sentence(version, 10),
+                "Headline": _sentence(version, 3)[:27], "LinkDescription": _sentence(version, 3)[:27],
+                "Destination": "https://acme.example.com/demo", "CTAButton": "Learn More",
+            })
+
+    return {
+        "email": emails,
+        "linkedin": linkedin,
+        "facebook": facebook,
+        "google_search": {"headlines": [_sentence(i, 3)[:30] for i in range(15)], "descriptions": [_sentence(i, 12)[:90] for i in range(4)]},
+        "google_display": {"headlines": [_sentence(i, 3)[:30] for i in range(5)], "descriptions": [_sentence(i, 12)[:90] for i in range(5)]},
+        "reasoning_text": "\n\n".join(_sentence(i, 70) for i in range(3)),
+    }
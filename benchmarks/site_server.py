@@ -0,0 +1,18 @@
+# benchmarks/site_server.py
+"""Local HTTP server that serves recorded client websites for offline scraper benchmarks."""
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass # Keep benchmark output clean
+
+def start_site_server(sites_dir, port=0):
+    """Serves `sites_dir` on a background thread. Returns the server; pages live under server.base_url."""
+    handler = functools.partial(QuietHandler, directory=sites_dir)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
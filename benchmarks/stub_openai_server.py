@@ -0,0 +1,259 @@
+# benchmarks/stub_openai_server.py
+"""
+Local OpenAI-compatible stand-in for /v1/chat/completions, plus the Files and Batches endpoints
+used by bulk_mode.py (upload a JSONL request file, create a batch, poll it, download its output).
+
+Answers every prompt the pipeline sends (profile extraction, emails, LinkedIn/Facebook ads,
+Google assets, limit rewrites, reasoning) with synthetic content of the requested size.
+Latency, 429 rate-limit responses and truncated-JSON responses are configurable so the
+pipeline's retry and fallback paths are exercised too. Batches complete after --batch-delay-s.
+
+    python benchmarks/stub_openai_server.py --port 8900 --latency-ms 400 --rate-limit-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 streamlit run app.py
+"""
+import argparse
+import email.parser
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VOCABULARY = ["growth", "pipeline", "teams", "insight", "forecast", "faster", "revenue", "customers", "automate",
+              "reporting", "confidence", "dashboards", "results", "weekly", "decisions", "clarity", "scale",
+              "onboarding", "security", "savings", "momentum", "partners", "launch", "trusted", "simple"]
+
+def _words(rng, count):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(count)).capitalize()
+
+def _requested_count(prompt, default):
+    match = re.search(r"Generate exactly (\d+)", prompt) or re.search(r"Generate (\d+) (?:unique|additional)", prompt)
+    return int(match.group(1)) if match else default
+
+def build_completion_content(system_prompt, user_prompt, rng):
+    """Synthetic response body (JSON string or text) for one pipeline prompt."""
+    if "extracting structured information" in system_prompt:
+        return json.dumps({
+            "company_name": "Acme Analytics", "tagline": _words(rng, 5), "mission_statement": _words(rng, 14),
+            "industry": "B2B SaaS", "products_services": [_words(rng, 2) for _ in range(4)],
+            "usps_value_proposition": _words(rng, 12), "target_audience": _words(rng, 8),
+            "tone_of_voice": "Friendly, practical", "ctas": ["Book a Demo", "Start Free Trial"],
+        })
+    if "copy editor" in system_prompt:
+        ids = re.findall(r'"id": "([^"]+)"', user_prompt)
+        limits = [int(limit) for limit in re.findall(r'"max_characters": (\d+)', user_prompt)]
+        return json.dumps({"items": [{"id": item_id, "text": _words(rng, 30)[:limit]} for item_id, limit in zip(ids, limits)]})
+    if "email campaigns" in system_prompt:
+        count = _requested_count(user_prompt, 10)
+        return json.dumps({"emails": [{
+            "Objective": "Demo Booking", "Headline": _words(rng, 6), "SubjectLine": _words(rng, 7)[:70],
+            "Body": "\n\n".join(_words(rng, 45) for _ in range(4)), "CTA": "Book a Demo",
+        } for _ in range(count)]})
+    platform_match = re.search(r"specializing in (LinkedIn|Facebook) ads", system_prompt)
+    if platform_match:
+        count = _requested_count(user_prompt, 10)
+        text_key = "IntroductoryText" if platform_match.group(1) == "LinkedIn" else "PrimaryText"
+        ads = []
+        for _ in range(count):
+            ad = {"AdName": f"Acme - {_words(rng, 3)}", text_key: _words(rng, 60)[:500], "ImageCopy": _words(rng, 8),
+                  "Headline": _words(rng, 6), "Destination": "https://acme.example.com/demo", "CTAButton": "Learn More"}
+            if text_key == "PrimaryText":
+                ad["LinkDescription"] = _words(rng, 4)
+            ads.append(ad)
+        return json.dumps({"ads": ads})
+    if "Google" in system_prompt and "Ads copywriter" in system_prompt:
+        asset_match = re.search(r'one key: "(headlines|descriptions)"', user_prompt)
+        if asset_match: # Repair of a single asset list
+            return json.dumps({asset_match.group(1): [_words(rng, 5) for _ in range(_requested_count(user_prompt, 5))]})
+        num_headlines = int(re.search(r"Create (\d+) unique (?:short )?headlines", user_prompt).group(1))
+        num_descriptions = int(re.search(r"Create (\d+) unique descriptions", user_prompt).group(1))
+        # Some copy deliberately runs over the limits, as real responses do
+        return json.dumps({"headlines": [_words(rng, rng.choice([3, 4, 7])) for _ in range(num_headlines)],
+                           "descriptions": [_words(rng, rng.choice([10, 12, 18])) for _ in range(num_descriptions)]})
+    # Reasoning and anything else: plain text
+    return "\n\n".join(_words(rng, 70) for _ in range(3))
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass # Keep benchmark output clean
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_bytes(self, status, body, content_type="application/octet-stream"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.rstrip("/")
+        if path.endswith("/files"):
+            self._send_json(200, _store_file(self.server, *_parse_upload(self.headers.get("Content-Type", ""), body)))
+            return
+        if path.endswith("/batches"):
+            self._send_json(200, _create_batch(self.server, json.loads(body)))
+            return
+        if not path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        request = json.loads(body or b"{}")
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            rng = random.Random(server.seed + server.request_count)
+
+        time.sleep(max(0.0, rng.gauss(server.latency_s, server.latency_s * 0.2)))
+
+        if rng.random() < server.rate_limit_rate:
+            with server.lock:
+                server.rate_limited_count += 1
+            self._send_json(429, {"error": {"message": "Rate limit reached (stub)", "type": "requests",
+                                            "code": "rate_limit_exceeded"}},
+                            headers={"Retry-After": f"{server.retry_after_s:.2f}"})
+            return
+
+        truncate = bool(request.get("response_format")) and rng.random() < server.truncate_rate
+        if truncate:
+            with server.lock:
+                server.truncated_count += 1
+        self._send_json(200, build_chat_completion(request, rng, f"chatcmpl-stub-{server.request_count}", truncate))
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        with self.server.lock:
+            batch = self.server.batches.get(path.rsplit("/", 1)[-1]) if "/batches/" in path else None
+            file_entry = self.server.files.get(path.rsplit("/", 2)[-2]) if path.endswith("/content") else None
+        if batch is not None:
+            self._send_json(200, _batch_status(self.server, batch))
+        elif file_entry is not None:
+            self._send_bytes(200, file_entry["content"])
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+def build_chat_completion(request, rng, completion_id, truncate=False):
+    """Chat completion response object for one /chat/completions request body."""
+    messages = request.get("messages", [])
+    system_prompt = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    user_prompt = next((m["content"] for m in messages if m.get("role") == "user"), "")
+    content = build_completion_content(system_prompt, user_prompt, rng)
+    if truncate:
+        content = content[:len(content) // 2] # Truncated JSON, as when max_tokens cuts a response
+
+    prompt_tokens = (len(system_prompt) + len(user_prompt)) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": completion_id, "object": "chat.completion", "created": int(time.time()),
+        "model": request.get("model", "stub"),
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+# --- Files and Batches ---
+
+def _parse_upload(content_type, body):
+    """(filename, purpose, content) from a multipart/form-data file upload."""
+    message = email.parser.BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body)
+    filename, purpose, content = "upload", "", b""
+    for part in message.get_payload():
+        name = part.get_param("name", header="content-disposition")
+        if name == "file":
+            filename = part.get_filename() or filename
+            content = part.get_payload(decode=True)
+        elif name == "purpose":
+            purpose = part.get_payload(decode=True).decode("utf-8")
+    return filename, purpose, content
+
+def _store_file(server, filename, purpose, content):
+    file_object = {"id": f"file-stub-{uuid.uuid4().hex[:16]}", "object": "file", "bytes": len(content),
+                   "created_at": int(time.time()), "filename": filename, "purpose": purpose, "status": "processed"}
+    with server.lock:
+        server.files[file_object["id"]] = {**file_object, "content": content}
+    return file_object
+
+def _create_batch(server, request):
+    batch = {
+        "id": f"batch-stub-{uuid.uuid4().hex[:16]}", "object": "batch", "endpoint": request["endpoint"],
+        "input_file_id": request["input_file_id"], "completion_window": request["completion_window"],
+        "status": "in_progress", "created_at": int(time.time()), "metadata": request.get("metadata"),
+    }
+    with server.lock:
+        server.batches[batch["id"]] = batch
+        server.batch_count += 1
+    return batch
+
+def _batch_status(server, batch):
+    """Completes the batch on the first poll after --batch-delay-s, answering every request line."""
+    with server.lock:
+        if batch["status"] != "in_progress" or time.time() - batch["created_at"] < server.batch_delay_s:
+            return dict(batch)
+        batch["status"] = "finalizing" # Concurrent polls don't answer it twice
+        input_lines = server.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+    output_lines = []
+    for i, line in enumerate(line for line in input_lines if line.strip()):
+        request_line = json.loads(line)
+        rng = random.Random(server.seed + i)
+        completion = build_chat_completion(request_line["body"], rng, f"chatcmpl-stub-batch-{i}")
+        output_lines.append(json.dumps({
+            "id": f"batch_req_{i}", "custom_id": request_line["custom_id"], "error": None,
+            "response": {"status_code": 200, "request_id": f"req_{i}", "body": completion},
+        }))
+    output_file = _store_file(server, "batch_output.jsonl", "batch_output", ("\n".join(output_lines) + "\n").encode("utf-8"))
+    with server.lock:
+        server.batch_request_count += len(output_lines)
+        batch.update({"status": "completed", "output_file_id": output_file["id"], "completed_at": int(time.time()),
+                      "request_counts": {"total": len(output_lines), "completed": len(output_lines), "failed": 0}})
+        return dict(batch)
+
+def start_stub_openai_server(port=0, latency_ms=0, rate_limit_rate=0.0, truncate_rate=0.0, retry_after_s=0.05, seed=0, batch_delay_s=0.0):
+    """Starts the stub on a background thread. Returns the server; its base URL is server.base_url."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubOpenAIHandler)
+    server.daemon_threads = True
+    server.latency_s = latency_ms / 1000
+    server.rate_limit_rate = rate_limit_rate
+    server.truncate_rate = truncate_rate
+    server.retry_after_s = retry_after_s
+    server.seed = seed
+    server.batch_delay_s = batch_delay_s
+    server.files = {}
+    server.batches = {}
+    server.batch_count = server.batch_request_count = 0
+    server.lock = threading.Lock()
+    server.request_count = server.rate_limited_count = server.truncated_count = 0
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Fraction of JSON responses cut in half")
+    parser.add_argument("--batch-delay-s", type=float, default=2.0, help="Seconds before a batch reports completed")
+    args = parser.parse_args()
+    server = start_stub_openai_server(args.port, args.latency_ms, args.rate_limit_rate, args.truncate_rate,
+                                      batch_delay_s=args.batch_delay_s)
+    print(f"Stub OpenAI server listening on {server.base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
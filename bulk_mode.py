@@ -0,0 +1,381 @@
+# bulk_mode.py
+"""
+Offline bulk mode for nightly refreshes across many clients, where throughput and cost matter and
+latency doesn't.
+
+Instead of one live API call per prompt, every prompt the generate_* functions would send for all
+clients is rendered into one JSONL request file (custom_id "<client id>:<task>:<request hash>", stable
+across runs) and submitted to the Batch API. Once the batch completes, the results are fed back through
+the unchanged pipeline - the same generate_* parsing, near-duplicate check and character-limit check -
+and each client's workbook is written.
+
+Prompts that depend on earlier answers (near-duplicate regeneration, limit rewrites) are handled in
+rounds: each round re-runs every unfinished client's pipeline with all answers so far, and the requests
+it hasn't seen go into the next batch. A client is done when its pass queues nothing. After
+MAX_BATCH_ROUNDS, unanswered requests take the pipeline's normal failure fallbacks.
+
+Client profiles come from the profile store (or a live scrape), as in the app. Request and result files
+stay in --work-dir. Every run asks for fresh copy; --resume instead reuses every successfully answered
+request in the work dir (to finish a run that was interrupted, not for the next night's refresh).
+
+    python bulk_mode.py clients.json --out-dir out/nightly
+    python bulk_mode.py clients.json --out-dir out/nightly --resume   # pick up an interrupted run
+    python bulk_mode.py clients.json --render-only       # write the first request file and stop
+
+clients.json holds a JSON list (or JSON Lines) of clients:
+    {"url": "www.acme.com", "lead_objective_type": "Demo Booking", "lead_objective_url": "acme.com/demo",
+     "downloadable_asset_url": "", "documents": ["briefs/acme.pdf"], "num_content_pieces": 10, "id": "acme"}
+"""
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import json
+import os
+import re
+import sys
+import time
+from async_runner import run_sync, get_async_openai_client
+from recorder import BatchPending, RecordedError, set_batch_session
+from tracing import span, set_span_attributes, log_event
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_ACTIVE_STATUSES = ("validating", "in_progress", "finalizing")
+MAX_BATCH_ROUNDS = 5
+DEFAULT_POLL_INTERVAL_S = 30
+DEFAULT_NUM_CONTENT_PIECES = 10
+CONTENT_KEYS = ["email", "linkedin", "facebook", "google_search", "google_display", "reasoning_text"]
+
+class BatchSession:
+    """
+    Answers one client's LLM calls from finished batch results (see recorder.set_batch_session).
+    Unanswered requests, and requests whose batch item failed (429, 5xx, timeout), are queued in
+    `pending` and raise BatchPending; in the final round they fail like a live call would so the
+    pipeline falls back.
+    """
+
+    def __init__(self, client_id, answers, final=False):
+        self.client_id = client_id
+        self.answers = answers
+        self.final = final
+        self.pending = {}
+
+    def custom_id(self, key, task):
+        return f"{self.client_id}:{task or 'untagged'}:{key[:16]}"
+
+    def resolve(self, key, completion_args, task):
+        custom_id = self.custom_id(key, task)
+        answer = self.answers.get(custom_id)
+        if answer is not None and "error" not in answer:
+            return answer
+        if self.final:
+            raise RecordedError(answer["error"] if answer else f"No batch result for {custom_id} after {MAX_BATCH_ROUNDS} rounds")
+        self.pending[custom_id] = {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": completion_args}
+        raise BatchPending(f"{custom_id} queued for the next batch")
+
+    def checkpoint(self):
+        """Ends the pass after a stage that queued requests; later stages would only see fallbacks."""
+        if self.pending:
+            raise BatchPending(f"{len(self.pending)} request(s) queued for {self.client_id}")
+
+# --- Clients ---
+
+def _format_url(url):
+    if url and not url.startswith(("http://", "https://")):
+        return "https://" + url
+    return url
+
+def _named_upload(path):
+    """File object with the .name/.getvalue() interface doc_parser expects from Streamlit uploads."""
+    with open(path, "rb") as f:
+        upload = io.BytesIO(f.read())
+    upload.name = os.path.basename(path)
+    return upload
+
+def load_clients(path):
+    """Reads the clients file (JSON list or JSON Lines) and fills in defaults and unique client ids."""
+    from profile_store import normalize_domain
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    entries = json.loads(text) if text.lstrip().startswith("[") else [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    clients, seen_ids = [], set()
+    for entry in entries:
+        url = _format_url(entry["url"].strip())
+        client_id = re.sub(r"[^\w.-]+", "_", entry.get("id") or normalize_domain(url)) or "client"
+        unique_id, n = client_id, 2
+        while unique_id in seen_ids: # Several campaigns for one domain
+            unique_id, n = f"{client_id}-{n}", n + 1
+        seen_ids.add(unique_id)
+        clients.append({
+            "id": unique_id,
+            "url": url,
+            "lead_objective_type": entry.get("lead_objective_type", "Demo Booking"),
+            "lead_objective_url": _format_url(entry["lead_objective_url"].strip()),
+            "downloadable_asset_url": _format_url((entry.get("downloadable_asset_url") or "").strip()),
+            "documents": entry.get("documents", []),
+            "num_content_pieces": int(entry.get("num_content_pieces", DEFAULT_NUM_CONTENT_PIECES)),
+        })
+    return clients
+
+async def _prepare_client(api_key, client, reuse_stored_profile):
+    """Profile (store or live scrape) and document text for one client; both are inputs, not batched."""
+    from profile_store import get_or_scrape_profile_async
+    from scraper import scrape_website_data_async
+    from doc_parser import extract_text_from_uploaded_files
+
+    with span("run", client=client["url"], bulk_client=client["id"]):
+        if reuse_stored_profile:
+            client["scraped_data"], _ = await get_or_scrape_profile_async(client["url"], api_key)
+        else:
+            client["scraped_data"] = await scrape_website_data_async(client["url"], api_key)
+        uploads = [_named_upload(path) for path in client["documents"]]
+        client["docs_text"] = await asyncio.to_thread(extract_text_from_uploaded_files, uploads) if uploads else ""
+    return client
+
+# --- Pipeline pass ---
+
+async def _content_pass(api_key, client, session, near_duplicate_threshold):
+    """The app's generation steps for one client; see campaign_matrix.generate_campaign_variant_async."""
+    from openai_handler import (
+        generate_email_content_async,
+        generate_linkedin_facebook_content_async,
+        generate_google_search_ads_async,
+        generate_google_display_ads_async,
+        generate_reasoning_text_async
+    )
+    from diversity import regenerate_near_duplicates_async
+    from content_validator import enforce_content_limits_async
+
+    campaign_args = (client["scraped_data"], client["docs_text"], client["lead_objective_type"],
+                     client["lead_objective_url"], client["downloadable_asset_url"])
+    num_pieces = client["num_content_pieces"]
+    content = dict(zip(CONTENT_KEYS, await asyncio.gather(
+        generate_email_content_async(api_key, *campaign_args, num_pieces),
+        generate_linkedin_facebook_content_async(api_key, "LinkedIn", *campaign_args, num_pieces),
+        generate_linkedin_facebook_content_async(api_key, "Facebook", *campaign_args, num_pieces),
+        generate_google_search_ads_async(api_key, *campaign_args),
+        generate_google_display_ads_async(api_key, *campaign_args),
+        generate_reasoning_text_async(api_key, *campaign_args),
+    )))
+    session.checkpoint()
+    content, _ = await regenerate_near_duplicates_async(api_key, content, *campaign_args, threshold=near_duplicate_threshold)
+    session.checkpoint()
+    content, _ = await enforce_content_limits_async(api_key, content)
+    session.checkpoint()
+    return content
+
+async def _run_pass(api_key, client, answers, round_num, final, near_duplicate_threshold):
+    """Returns (content or None if requests were queued, session)."""
+    session = BatchSession(client["id"], answers, final)
+    set_batch_session(session) # Local to this task's context
+    with span("run", client=client["url"], bulk_client=client["id"], bulk_round=round_num):
+        try:
+            content = await _content_pass(api_key, client, session, near_duplicate_threshold)
+        except BatchPending:
+            content = None
+        set_span_attributes(queued_requests=len(session.pending))
+    return content, session
+
+# --- Batch files and the Batch API ---
+
+def write_request_file(requests, path):
+    """One Batch API request per line, sorted by custom_id so identical inputs give identical files."""
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id in sorted(requests):
+            f.write(json.dumps(requests[custom_id], ensure_ascii=False) + "\n")
+
+def parse_batch_output(text):
+    """Batch output/error JSONL -> {custom_id: {"content", "usage"} or {"error"}}."""
+    answers = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            error = item.get("error") or (response.get("body") or {}).get("error") or f"HTTP {response.get('status_code')}"
+            answers[item["custom_id"]] = {"error": str(error.get("message", error) if isinstance(error, dict) else error)}
+            continue
+        body = response["body"]
+        answers[item["custom_id"]] = {"content": body["choices"][0]["message"]["content"], "usage": body.get("usage") or {}}
+    return answers
+
+def load_answers(work_dir):
+    """
+    Every successful answer in the work dir's earlier result files, so a rerun doesn't pay for them again.
+    Failed items are left out and requested again.
+    """
+    answers = {}
+    for path in sorted(glob.glob(os.path.join(work_dir, "*.results.jsonl"))):
+        with open(path, encoding="utf-8") as f:
+            answers.update((custom_id, answer) for custom_id, answer in parse_batch_output(f.read()).items()
+                           if "error" not in answer)
+    return answers
+
+async def submit_batch_async(api_key, request_path, poll_interval_s=DEFAULT_POLL_INTERVAL_S):
+    """
+    Uploads the request file, creates a batch, polls until it ends and returns its output (and error) JSONL text.
+    A batch that ends expired, cancelled or failed returns whatever it finished; the rest is requested again.
+    """
+    client = get_async_openai_client(api_key)
+    with span("batch_job", requests_file=os.path.basename(request_path)):
+        with open(request_path, "rb") as f:
+            input_file = await client.files.create(file=(os.path.basename(request_path), f.read()), purpose="batch")
+        batch = await client.batches.create(input_file_id=input_file.id, endpoint=BATCH_ENDPOINT,
+                                            completion_window=BATCH_COMPLETION_WINDOW)
+        set_span_attributes(batch_id=batch.id)
+        log_event(f"Submitted batch {batch.id}")
+        while batch.status in BATCH_ACTIVE_STATUSES:
+            await asyncio.sleep(poll_interval_s)
+            batch = await client.batches.retrieve(batch.id)
+        set_span_attributes(status=batch.status)
+        if batch.status != "completed":
+            log_event(f"Batch {batch.id} ended with status {batch.status}; unanswered requests go into the next round")
+
+        output = ""
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                output += (await client.files.content(file_id)).text + "\n"
+        return output
+
+# --- Driver ---
+
+async def run_bulk_async(api_key, clients, work_dir, reuse_stored_profile=True, near_duplicate_threshold=None,
+                         poll_interval_s=DEFAULT_POLL_INTERVAL_S, render_only=False, resume=False, progress=print):
+    """
+    Runs every client through batch rounds. Returns ({client id: content}, report); clients whose profile
+    or documents could not be prepared are left out and listed in report["skipped"]. With render_only, stops after writing the first request file.
+    With resume, answers from earlier runs in work_dir are reused instead of requested again.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    run_id = time.strftime("%Y%m%d-%H%M%S")
+    answers = load_answers(work_dir) if resume else {}
+    report = {"rounds": [], "reused_answers": len(answers), "skipped": []}
+
+    with span("bulk_run", clients=len(clients)):
+        prepared = await asyncio.gather(*[_prepare_client(api_key, client, reuse_stored_profile) for client in clients],
+                                        return_exceptions=True)
+        unfinished = []
+        for client, result in zip(clients, prepared):
+            if isinstance(result, Exception): # e.g. a missing document; the other clients go ahead
+                report["skipped"].append(client["id"])
+                progress(f"Skipping {client['id']}: {result}")
+            elif result["scraped_data"]:
+                unfinished.append(result)
+            else:
+                report["skipped"].append(client["id"])
+                progress(f"Skipping {client['id']}: could not build a client profile from {client['url']}")
+
+        results = {}
+        for round_num in range(1, MAX_BATCH_ROUNDS + 2):
+            if not unfinished:
+                break
+            final = round_num > MAX_BATCH_ROUNDS
+            passes = await asyncio.gather(*[
+                _run_pass(api_key, client, answers, round_num, final, near_duplicate_threshold) for client in unfinished
+            ])
+            queued = {}
+            still_unfinished = []
+            for client, (content, session) in zip(unfinished, passes):
+                if session.pending:
+                    queued.update(session.pending)
+                    still_unfinished.append(client)
+                else:
+                    results[client["id"]] = content
+            unfinished = still_unfinished
+            if not queued:
+                continue
+
+            request_path = os.path.join(work_dir, f"{run_id}-round{round_num}.requests.jsonl")
+            write_request_file(queued, request_path)
+            progress(f"Round {round_num}: {len(queued)} request(s) for {len(unfinished)} client(s) -> {request_path}")
+            if render_only:
+                break
+
+            round_start = time.perf_counter()
+            output = await submit_batch_async(api_key, request_path, poll_interval_s)
+            with open(request_path.replace(".requests.jsonl", ".results.jsonl"), "w", encoding="utf-8") as f:
+                f.write(output)
+            round_answers = parse_batch_output(output)
+            answers.update(round_answers)
+            report["rounds"].append({
+                "round": round_num, "requests": len(queued), "clients": len(unfinished),
+                "failed": sum("error" in answer for answer in round_answers.values()),
+                "missing": len(set(queued) - set(round_answers)),
+                "prompt_tokens": sum(answer.get("usage", {}).get("prompt_tokens", 0) for answer in round_answers.values()),
+                "completion_tokens": sum(answer.get("usage", {}).get("completion_tokens", 0) for answer in round_answers.values()),
+                "wall_s": round(time.perf_counter() - round_start, 2),
+            })
+            progress(f"Round {round_num}: batch finished in {report['rounds'][-1]['wall_s']}s")
+
+        set_span_attributes(rounds=len(report["rounds"]), finished=len(results))
+    return results, report
+
+def write_client_workbooks(results, clients, out_dir, as_zip=False):
+    """Writes one workbook per finished client (or one ZIP of them). Returns the written paths."""
+    from excel_generator import write_excel_workbook, write_workbooks_zip
+
+    os.makedirs(out_dir, exist_ok=True)
+    workbooks = [(f"{client['id']}_lead_content.xlsx", results[client["id"]], client["scraped_data"])
+                 for client in clients if client["id"] in results]
+    if as_zip:
+        path = os.path.join(out_dir, "bulk_workbooks.zip")
+        with open(path, "wb") as f:
+            write_workbooks_zip(workbooks, f)
+        return [path]
+    paths = []
+    for file_name, content, scraped_data in workbooks:
+        path = os.path.join(out_dir, file_name)
+        with open(path, "wb") as f:
+            write_excel_workbook(content, scraped_data, f)
+        paths.append(path)
+    return paths
+
+def _progress(message):
+    print(message, file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clients", help="JSON list or JSON Lines file of clients")
+    parser.add_argument("--out-dir", default=os.path.join("data", "bulk"), help="Where the workbooks are written")
+    parser.add_argument("--work-dir", help="Request/result files (default: <out-dir>/batches)")
+    parser.add_argument("--zip", action="store_true", help="Write one ZIP of all workbooks")
+    parser.add_argument("--rescrape", action="store_true", help="Scrape every site instead of reusing stored profiles")
+    parser.add_argument("--threshold", type=float, help="Near-duplicate similarity threshold")
+    parser.add_argument("--poll-interval-s", type=float, default=DEFAULT_POLL_INTERVAL_S)
+    parser.add_argument("--render-only", action="store_true", help="Write the first request file and stop")
+    parser.add_argument("--resume", action="store_true", help="Reuse answers from earlier runs in the work dir")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's log lines")
+    args = parser.parse_args()
+
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        parser.error("OPENAI_API_KEY is not set")
+    clients = load_clients(args.clients)
+    work_dir = args.work_dir or os.path.join(args.out_dir, "batches")
+
+    # Passes that are waiting on the batch log every queued call as a failure; keep that out of the output
+    log_sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with log_sink:
+        results, report = run_sync(run_bulk_async(
+            api_key, clients, work_dir, reuse_stored_profile=not args.rescrape,
+            near_duplicate_threshold=args.threshold, poll_interval_s=args.poll_interval_s,
+            render_only=args.render_only, resume=args.resume, progress=_progress,
+        ))
+    if args.render_only:
+        return
+
+    for path in write_client_workbooks(results, clients, args.out_dir, as_zip=args.zip):
+        print(f"Wrote {path}")
+    total_requests = sum(r["requests"] for r in report["rounds"])
+    print(f"{len(results)}/{len(clients)} client(s) finished in {len(report['rounds'])} batch round(s), "
+          f"{total_requests} request(s), {report['reused_answers']} reused from {work_dir}")
+    for r in report["rounds"]:
+        print(f"  round {r['round']}: {r['requests']} requests ({r['failed']} failed, {r['missing']} missing), "
+              f"{r['prompt_tokens']} prompt + {r['completion_tokens']} completion tokens, {r['wall_s']}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# campaign_matrix.py
+"""
+Campaign matrix mode: several lead objective / destination URL / asset combinations for one client.
+
+The scrape, document parsing and client profile are shared by every variant; only the generation
+stages fan out, one task per variant, concurrently on the async runner. All LLM calls go through the
+shared in-flight budget (MCG_MAX_CONCURRENT_LLM_CALLS), so a large matrix queues instead of flooding the API.
+"""
+import asyncio
+import io
+import itertools
+import re
+from async_runner import run_sync
+from openai_handler import (
+    generate_email_content_async,
+    generate_linkedin_facebook_content_async,
+    generate_google_search_ads_async,
+    generate_google_display_ads_async,
+    generate_reasoning_text_async
+)
+from diversity import regenerate_near_duplicates_async
+from content_validator import enforce_content_limits_async
+from excel_generator import write_campaign_matrix_workbook, write_workbooks_zip
+from tracing import traced, set_span_attributes, log_event
+
+MAX_CAMPAIGN_VARIANTS = 12
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def build_campaign_variants(lead_objective_types, lead_objective_urls, downloadable_asset_urls):
+    """
+    Every combination of the chosen objectives, objective URLs and asset URLs, labelled V1, V2, ...
+    An empty asset list means "no downloadable asset".
+    """
+    combinations = itertools.product(lead_objective_types, lead_objective_urls, downloadable_asset_urls or [""])
+    return [{
+        "label": f"V{i}",
+        "lead_objective_type": lead_objective_type,
+        "lead_objective_url": lead_objective_url,
+        "downloadable_asset_url": downloadable_asset_url,
+    } for i, (lead_objective_type, lead_objective_url, downloadable_asset_url) in enumerate(combinations, start=1)]
+
+@traced()
+async def generate_campaign_variant_async(api_key, scraped_data, additional_docs_text, variant, num_content_pieces, near_duplicate_threshold=None):
+    """Runs every generation stage for one variant, then its diversity and character-limit checks."""
+    set_span_attributes(variant=variant["label"], lead_objective=variant["lead_objective_type"])
+    campaign_args = (scraped_data, additional_docs_text, variant["lead_objective_type"],
+                     variant["lead_objective_url"], variant["downloadable_asset_url"])
+
+    email, linkedin, facebook, google_search, google_display, reasoning = await asyncio.gather(
+        generate_email_content_async(api_key, *campaign_args, num_content_pieces),
+        generate_linkedin_facebook_content_async(api_key, "LinkedIn", *campaign_args, num_content_pieces),
+        generate_linkedin_facebook_content_async(api_key, "Facebook", *campaign_args, num_content_pieces),
+        generate_google_search_ads_async(api_key, *campaign_args),
+        generate_google_display_ads_async(api_key, *campaign_args),
+        generate_reasoning_text_async(api_key, *campaign_args),
+    )
+    content = {
+        "email": email, "linkedin": linkedin, "facebook": facebook,
+        "google_search": google_search, "google_display": google_display, "reasoning_text": reasoning,
+    }
+
+    content, _ = await regenerate_near_duplicates_async(api_key, content, *campaign_args, threshold=near_duplicate_threshold)
+    content, _ = await enforce_content_limits_async(api_key, content)
+    return content
+
+@traced()
+async def generate_campaign_matrix_async(api_key, scraped_data, additional_docs_text, variants, num_content_pieces, near_duplicate_threshold=None):
+    """Generates all variants concurrently. Returns [(variant, content), ...] in variant order."""
+    set_span_attributes(variants=len(variants))
+    log_event(f"Generating {len(variants)} campaign variant(s)")
+    contents = await asyncio.gather(*[
+        generate_campaign_variant_async(api_key, scraped_data, additional_docs_text, variant,
+                                        num_content_pieces, near_duplicate_threshold)
+        for variant in variants
+    ])
+    return list(zip(variants, contents))
+
+def generate_campaign_matrix(api_key, scraped_data, additional_docs_text, variants, num_content_pieces, near_duplicate_threshold=None):
+    """Sync wrapper around generate_campaign_matrix_async."""
+    return run_sync(generate_campaign_matrix_async(api_key, scraped_data, additional_docs_text, variants,
+                                                   num_content_pieces, near_duplicate_threshold))
+
+def variant_file_name(company_name_for_file, variant):
+    objective_slug = re.sub(r'[^\w]+', '_', variant["lead_objective_type"]).strip('_')
+    return f"{company_name_for_file}_{variant['label']}_{objective_slug}_lead_content.xlsx"
+
+def write_campaign_matrix_output(variant_results, scraped_data, company_name_for_file, as_zip=False):
+    """
+    Packages the matrix as one workbook (a Variants index sheet plus each variant's sheets) or as a ZIP
+    with one workbook per variant. Returns (bytes, file_name, mime).
+    """
+    output = io.BytesIO()
+    if as_zip:
+        write_workbooks_zip(((variant_file_name(company_name_for_file, variant), content, scraped_data)
+                             for variant, content in variant_results), output)
+        return output.getvalue(), f"{company_name_for_file}_campaign_matrix.zip", "application/zip"
+    write_campaign_matrix_workbook(variant_results, scraped_data, output)
+    return output.getvalue(), f"{company_name_for_file}_campaign_matrix.xlsx", XLSX_MIME
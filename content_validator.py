@@ -0,0 +1,162 @@
+# content_validator.py
+import asyncio
+import json
+from async_runner import run_sync
+from openai_handler import _call_openai_api_async, _is_placeholder_value, GOOGLE_AD_SPECS
+from tracing import traced, set_span_attributes, log_event
+from utils import get_task_route
+
+# Per-platform character limits: content key -> field -> max characters.
+# Google asset lists ("headlines"/"descriptions") are checked item by item.
+PLATFORM_LIMITS = {
+    "email": {"SubjectLine": 70},
+    "linkedin": {"AdName": 255, "IntroductoryText": 500, "Headline": 70},
+    "facebook": {"AdName": 255, "PrimaryText": 500, "Headline": 27, "LinkDescription": 27},
+}
+for _content_key, _spec in GOOGLE_AD_SPECS.items():
+    PLATFORM_LIMITS[_content_key] = {"headlines": _spec["headlines"][1], "descriptions": _spec["descriptions"][1]}
+
+REWRITE_ITEM_OVERHEAD_TOKENS = 15 # {"id": ..., "text": ...} punctuation and keys per rewritten item
+REWRITE_OUTPUT_BUDGET_SHARE = 0.8 # Share of the copy_edit output cap a chunk's rewrites may fill
+
+def truncate_at_word_boundary(text, limit):
+    """Shortens text to at most `limit` characters without cutting a word in half (last resort only)."""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit + 1]
+    boundary = cut.rfind(" ")
+    shortened = cut[:boundary] if boundary > 0 else text[:limit] # Single long word: hard cut
+    return shortened.rstrip(" ,;:-–—")
+
+def find_limit_violations(all_generated_content):
+    """
+    Checks every generated field against PLATFORM_LIMITS in a single pass.
+    Returns a list of violations: {"id", "content_key", "index", "field", "text", "limit"}.
+    Placeholder/error items are skipped; they are handled by the repair action instead.
+    """
+    violations = []
+    for content_key, field_limits in PLATFORM_LIMITS.items():
+        content = all_generated_content.get(content_key)
+        if not content:
+            continue
+        if isinstance(content, dict): # Google: {"headlines": [...], "descriptions": [...]}
+            for field, limit in field_limits.items():
+                for index, text in enumerate(content.get(field, [])):
+                    if isinstance(text, str) and len(text) > limit and not _is_placeholder_value(text):
+                        violations.append({"id": f"{content_key}:{field}:{index}", "content_key": content_key,
+                                           "index": index, "field": field, "text": text, "limit": limit})
+        else: # Email/social: list of item dicts
+            for index, item in enumerate(content):
+                if not isinstance(item, dict):
+                    continue
+                for field, limit in field_limits.items():
+                    text = item.get(field)
+                    if isinstance(text, str) and len(text) > limit and not _is_placeholder_value(text):
+                        violations.append({"id": f"{content_key}:{field}:{index}", "content_key": content_key,
+                                           "index": index, "field": field, "text": text, "limit": limit})
+    return violations
+
+def chunk_violations(violations, max_output_tokens):
+    """
+    Splits violations into chunks whose rewritten items fit in one response of `max_output_tokens`,
+    so a long list isn't cut off mid-JSON (which would send every item to truncation).
+    """
+    budget = max_output_tokens * REWRITE_OUTPUT_BUDGET_SHARE
+    chunks, current, current_tokens = [], [], 0
+    for v in violations:
+        # Rewritten text is at most `limit` characters (~3 per token, allowing for emojis) plus the id and JSON keys
+        item_tokens = (v["limit"] + len(v["id"])) / 3 + REWRITE_ITEM_OVERHEAD_TOKENS
+        if current and current_tokens + item_tokens > budget:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(v)
+        current_tokens += item_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+async def _request_limit_rewrites_chunk_async(api_key, violations):
+    system_prompt = "You are a meticulous marketing copy editor. Shorten copy to fit character limits. Output ONLY the JSON object."
+    items_json = json.dumps(
+        [{"id": v["id"], "max_characters": v["limit"], "text": v["text"]} for v in violations],
+        ensure_ascii=False, indent=2
+    )
+    user_prompt = f"""
+    ### Task:
+    Each item below exceeds its character limit. Rewrite each one so it is at most "max_characters" characters long
+    (count every character, including spaces and emojis). Keep the meaning, tone, key message and any call to action.
+    Do not cut words in half and do not end with "...".
+
+    ### Items:
+    {items_json}
+
+    ### Output Format:
+    Return a JSON object with one key "items": a list of objects with keys "id" (unchanged) and "text" (the rewritten copy).
+    """
+    response_data = await _call_openai_api_async(api_key, system_prompt, user_prompt, expecting_json=True, task="copy_edit")
+    items = response_data.get("items", []) if isinstance(response_data, dict) else response_data
+    rewrites = {}
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict) and isinstance(item.get("text"), str):
+            rewrites[str(item.get("id"))] = item["text"].strip()
+    return rewrites
+
+async def request_limit_rewrites_async(api_key, violations):
+    """
+    Sends the violating items to the model in output-sized chunks, concurrently.
+    Returns {violation id: rewritten text}; items of a failed chunk are simply missing.
+    """
+    if not violations:
+        return {}
+    chunks = chunk_violations(violations, get_task_route("copy_edit")["max_tokens"])
+    set_span_attributes(rewrite_chunks=len(chunks))
+    results = await asyncio.gather(*[_request_limit_rewrites_chunk_async(api_key, chunk) for chunk in chunks],
+                                   return_exceptions=True)
+
+    rewrites = {}
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, Exception):
+            log_event(f"Error requesting rewrites for {len(chunk)} item(s), they will be truncated: {result}")
+            continue
+        rewrites.update(result)
+    return rewrites
+
+@traced()
+async def enforce_content_limits_async(api_key, all_generated_content):
+    """
+    Validates all content, re-asks the model once for the violating items only and
+    falls back to word-boundary truncation for anything still over its limit.
+    Returns (content, report) where report holds "violations", "rewritten" and "truncated" counts.
+    """
+    violations = find_limit_violations(all_generated_content)
+    report = {"violations": len(violations), "rewritten": 0, "truncated": 0}
+    set_span_attributes(violations=len(violations))
+    if not violations:
+        return all_generated_content, report
+
+    log_event(f"Found {len(violations)} character-limit violation(s); requesting rewrites...")
+    try:
+        rewrites = await request_limit_rewrites_async(api_key, violations)
+    except Exception as e:
+        log_event(f"Error requesting limit rewrites, falling back to truncation: {e}")
+        rewrites = {}
+
+    for v in violations:
+        new_text = rewrites.get(v["id"])
+        if new_text and len(new_text) <= v["limit"]:
+            report["rewritten"] += 1
+        else:
+            new_text = truncate_at_word_boundary(new_text or v["text"], v["limit"])
+            report["truncated"] += 1
+
+        content = all_generated_content[v["content_key"]]
+        if isinstance(content, dict):
+            content[v["field"]][v["index"]] = new_text
+        else:
+            content[v["index"]][v["field"]] = new_text
+
+    return all_generated_content, report
+
+def enforce_content_limits(api_key, all_generated_content):
+    """Sync wrapper around enforce_content_limits_async."""
+    return run_sync(enforce_content_limits_async(api_key, all_generated_content))
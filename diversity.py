@@ -0,0 +1,147 @@
+# diversity.py
+import re
+from async_runner import run_sync
+from openai_handler import (
+    generate_email_content_async,
+    _generate_social_ads_for_objective_async,
+    _build_base_context_prompt,
+    _is_failed_email,
+    _is_failed_social_ad,
+)
+from utils import get_near_duplicate_threshold
+from tracing import traced, log_event
+
+# Text fields compared for each content type
+SIMILARITY_FIELDS = {
+    "email": ["Headline", "SubjectLine", "Body"],
+    "linkedin": ["IntroductoryText", "ImageCopy", "Headline"],
+    "facebook": ["PrimaryText", "ImageCopy", "Headline", "LinkDescription"],
+}
+SHINGLE_SIZE = 3 # Word n-gram length used for shingling
+
+def _is_failed_item(content_key, item):
+    return _is_failed_email(item) if content_key == "email" else _is_failed_social_ad(item)
+
+def _item_text(item, fields):
+    return " ".join(str(item.get(field) or "") for field in fields)
+
+def _shingles(text, size=SHINGLE_SIZE):
+    """Set of hashed word n-grams for a piece of copy (short texts fall back to a single shingle)."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {hash(tuple(words))} if words else set()
+    return {hash(tuple(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def analyze_diversity(content_key, items, threshold=None):
+    """
+    Compares every pair of variants by shingle overlap.
+    Returns (flagged_indices, diversity_score): a variant is flagged when it is at least `threshold`
+    similar to an earlier variant that survives; the score is 1 - mean pairwise similarity (1.0 = all distinct).
+    Failed/placeholder items are ignored.
+    """
+    threshold = get_near_duplicate_threshold() if threshold is None else threshold
+    fields = SIMILARITY_FIELDS[content_key]
+    candidates = [(i, _shingles(_item_text(item, fields))) for i, item in enumerate(items)
+                  if not _is_failed_item(content_key, item)]
+
+    flagged = []
+    survivors = set()
+    similarity_sum, pair_count = 0.0, 0
+    for i, shingles in candidates:
+        is_duplicate = False
+        for j, other_shingles in candidates:
+            if j >= i:
+                break
+            similarity = _jaccard(shingles, other_shingles)
+            similarity_sum += similarity
+            pair_count += 1
+            if similarity >= threshold and j in survivors:
+                is_duplicate = True
+        if is_duplicate:
+            flagged.append(i)
+        else:
+            survivors.add(i)
+
+    diversity_score = 1.0 - (similarity_sum / pair_count) if pair_count else 1.0
+    return flagged, round(diversity_score, 3)
+
+def diversity_scores(all_generated_content, threshold=None):
+    """Per-sheet {content_key: {"score": float, "near_duplicates": int}} for emails and social ads."""
+    scores = {}
+    for content_key in SIMILARITY_FIELDS:
+        items = all_generated_content.get(content_key)
+        if items:
+            flagged, score = analyze_diversity(content_key, items, threshold)
+            scores[content_key] = {"score": score, "near_duplicates": len(flagged)}
+    return scores
+
+@traced()
+async def regenerate_near_duplicates_async(api_key, all_generated_content, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, threshold=None):
+    """
+    Regenerates only the flagged near-duplicate emails/ads, passing the surviving variants to the
+    model as "avoid these". Each regenerated item takes over the flagged item's slot and Version #.
+    Returns (content, regenerated_counts) with {content_key: number of variants replaced}.
+    """
+    regenerated_counts = {}
+    base_context = _build_base_context_prompt(scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url)
+
+    for content_key, fields in SIMILARITY_FIELDS.items():
+        items = all_generated_content.get(content_key)
+        if not items:
+            continue
+        flagged, _ = analyze_diversity(content_key, items, threshold)
+        if not flagged:
+            continue
+        avoid_content = [_item_text(item, fields) for i, item in enumerate(items)
+                         if i not in flagged and not _is_failed_item(content_key, item)]
+
+        # Emails are one batch; social ads are regenerated per objective so each keeps its objective
+        if content_key == "email":
+            groups = {None: flagged}
+        else:
+            groups = {}
+            for index in flagged:
+                groups.setdefault(items[index].get("Objective"), []).append(index)
+
+        replaced = 0
+        for ad_objective, indices in groups.items():
+            try:
+                if content_key == "email":
+                    log_event(f"Regenerating {len(indices)} near-duplicate email(s)")
+                    new_items = await generate_email_content_async(
+                        api_key, scraped_data, additional_docs_text, lead_objective_type,
+                        lead_objective_url, downloadable_asset_url, len(indices), avoid_content=avoid_content
+                    )
+                else:
+                    platform = "LinkedIn" if content_key == "linkedin" else "Facebook"
+                    log_event(f"Regenerating {len(indices)} near-duplicate {platform} ad(s) for objective: {ad_objective}")
+                    new_items = await _generate_social_ads_for_objective_async(
+                        api_key, platform, base_context, scraped_data,
+                        lead_objective_type, lead_objective_url, downloadable_asset_url,
+                        ad_objective, len(indices), avoid_content=avoid_content
+                    )
+            except Exception as e:
+                log_event(f"Error regenerating near-duplicate {content_key} variants: {e}")
+                continue
+
+            for index, new_item in zip(indices, new_items):
+                if not isinstance(new_item, dict):
+                    continue
+                new_item["Version #"] = items[index].get("Version #")
+                items[index] = new_item
+                avoid_content.append(_item_text(new_item, fields))
+                replaced += 1
+
+        if replaced:
+            regenerated_counts[content_key] = replaced
+
+    return all_generated_content, regenerated_counts
+
+def regenerate_near_duplicates(api_key, all_generated_content, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, threshold=None):
+    """Sync wrapper around regenerate_near_duplicates_async."""
+    return run_sync(regenerate_near_duplicates_async(api_key, all_generated_content, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, threshold=threshold))
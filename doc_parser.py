@@ -1,10 +1,10 @@
 # doc_parser.py
 import io
-from PyPDF2 import PdfReader
-from pptx import Presentation
+from tracing import traced, span, log_event
 
 def extract_text_from_pdf(file_bytes):
     """Extracts text from a PDF file given as bytes."""
+    from PyPDF2 import PdfReader # Parser libraries load with the first upload of their type
     try:
         pdf_file = io.BytesIO(file_bytes)
         reader = PdfReader(pdf_file)
@@ -13,11 +13,12 @@ def extract_text_from_pdf(file_bytes):
             text += page.extract_text() or ""
         return text
     except Exception as e:
-        print(f"Error parsing PDF: {e}")
+        log_event(f"Error parsing PDF: {e}")
         return ""
 
 def extract_text_from_pptx(file_bytes):
     """Extracts text from a PowerPoint file given as bytes."""
+    from pptx import Presentation
     try:
         pptx_file = io.BytesIO(file_bytes)
         prs = Presentation(pptx_file)
@@ -28,9 +29,10 @@ def extract_text_from_pptx(file_bytes):
                     text += shape.text + "\n"
         return text
     except Exception as e:
-        print(f"Error parsing PPTX: {e}")
+        log_event(f"Error parsing PPTX: {e}")
         return ""
 
+@traced()
 def extract_text_from_uploaded_files(uploaded_files):
     """
     Extracts text from a list of Streamlit UploadedFile objects.
@@ -45,12 +47,14 @@ def extract_text_from_uploaded_files(uploaded_files):
         file_name = uploaded_file.name.lower()
         
         if file_name.endswith(".pdf"):
-            print(f"Parsing PDF: {uploaded_file.name}")
-            combined_text += extract_text_from_pdf(file_bytes) + "\n\n"
+            with span("parse_file", file=uploaded_file.name, file_type="pdf", bytes=len(file_bytes)):
+                log_event(f"Parsing PDF: {uploaded_file.name}")
+                combined_text += extract_text_from_pdf(file_bytes) + "\n\n"
         elif file_name.endswith(".pptx"):
-            print(f"Parsing PPTX: {uploaded_file.name}")
-            combined_text += extract_text_from_pptx(file_bytes) + "\n\n"
+            with span("parse_file", file=uploaded_file.name, file_type="pptx", bytes=len(file_bytes)):
+                log_event(f"Parsing PPTX: {uploaded_file.name}")
+                combined_text += extract_text_from_pptx(file_bytes) + "\n\n"
         else:
-            print(f"Unsupported file type: {uploaded_file.name}. Skipping.")
+            log_event(f"Unsupported file type: {uploaded_file.name}. Skipping.")
             
     return combined_text.strip()
\ No newline at end of file
@@ -1,230 +1,142 @@
 # excel_generator.py
+import copy
 import io
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+import json
+import zipfile
+from tracing import traced, span, set_span_attributes, log_event
 
 # Define a gray fill for empty/placeholder cells
 PLACEHOLDER_FILL_COLOR = "D3D3D3" # LightGray
 
-def _apply_styles(ws, header_fill_color="000000", header_font_color="FFFFFF", default_row_height=30): # Added default_row_height
-    """Applies common styling to a worksheet."""
-    header_font = Font(color=header_font_color, bold=True)
-    header_fill = PatternFill(start_color=header_fill_color, end_color=header_fill_color, fill_type="solid")
-    
-    # Point 2: Vertical align middle all cells (default for data)
-    general_alignment = Alignment(horizontal="left", vertical="center", wrap_text=True) 
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True) # Explicit for header
-
+# Columns holding long copy get a wider minimum width
+WIDE_COLUMN_HEADERS = ["body", "introductory text", "primary text", "link description", "text", "headline", "subject line"]
+
+# Table sheets: (content key, sheet title, data row height, [(header, item key), ...])
+TABLE_SHEETS = [
+    ("email", "Email", 45, [
+        ("Version #", "Version #"), ("Objective", "Objective"), ("Headline", "Headline"),
+        ("Subject Line", "SubjectLine"), ("Body", "Body"), ("CTA", "CTA"),
+    ]),
+    ("linkedin", "LinkedIn", 45, [
+        ("Version #", "Version #"), ("Ad Name", "AdName"), ("Objective", "Objective"),
+        ("Introductory Text", "IntroductoryText"), ("Image Copy", "ImageCopy"), ("Headline", "Headline"),
+        ("Destination", "Destination"), ("CTA Button", "CTAButton"),
+    ]),
+    ("facebook", "Facebook", 45, [
+        ("Version #", "Version #"), ("Ad Name", "AdName"), ("Objective", "Objective"),
+        ("Primary Text", "PrimaryText"), ("Image Copy", "ImageCopy"), ("Headline", "Headline"),
+        ("Link Description", "LinkDescription"), ("Destination", "Destination"), ("CTA Button", "CTAButton"),
+    ]),
+]
+
+# Campaign matrix index sheet: one row per variant
+VARIANT_INDEX_COLUMNS = [
+    ("Variant", "label"), ("Lead Objective", "lead_objective_type"),
+    ("Objective URL", "lead_objective_url"), ("Downloadable Asset URL", "downloadable_asset_url"),
+]
+
+# Google sheets: (content key, sheet title, expected headlines, expected descriptions)
+GOOGLE_SHEETS = [
+    ("google_search", "Google Search", 15, 4),
+    ("google_display", "Google Display", 5, 5),
+]
+
+def _register_named_styles(wb):
+    """Registers the shared cell styles once per workbook; cells then reference them by name."""
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+    from openpyxl.styles.fonts import DEFAULT_FONT
     thin_border_side = Side(style='thin')
     cell_border = Border(left=thin_border_side, right=thin_border_side, top=thin_border_side, bottom=thin_border_side)
+    black_fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
+    white_bold_font = Font(color="FFFFFF", bold=True)
+    left_alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
+
+    named_styles = [
+        # Table header row
+        NamedStyle(name="header", font=white_bold_font, fill=black_fill, border=cell_border,
+                   alignment=Alignment(horizontal="center", vertical="center", wrap_text=True)),
+        # Data cells (vertical align middle); "Version #" column is centred
+        NamedStyle(name="data", font=DEFAULT_FONT, border=cell_border, alignment=left_alignment),
+        NamedStyle(name="data_center", font=DEFAULT_FONT, border=cell_border,
+                   alignment=Alignment(horizontal="center", vertical="center", wrap_text=True)),
+        # Google sheets: left-aligned section headers and gray empty/placeholder cells
+        NamedStyle(name="section_header", font=white_bold_font, fill=black_fill, border=cell_border, alignment=left_alignment),
+        NamedStyle(name="placeholder", font=DEFAULT_FONT, border=cell_border, alignment=left_alignment,
+                   fill=PatternFill(start_color=PLACEHOLDER_FILL_COLOR, end_color=PLACEHOLDER_FILL_COLOR, fill_type="solid")),
+        # Reasoning sheet
+        NamedStyle(name="title", font=Font(color="FFFFFF", bold=True, size=14), fill=black_fill, border=cell_border,
+                   alignment=Alignment(horizontal="center", vertical="center", wrap_text=True)),
+        NamedStyle(name="label", font=Font(bold=True), border=cell_border, alignment=left_alignment),
+        NamedStyle(name="subtitle", font=Font(bold=True, size=12), border=cell_border, alignment=left_alignment),
+        NamedStyle(name="long_text", font=DEFAULT_FONT, border=cell_border, alignment=Alignment(horizontal="left", vertical="top", wrap_text=True)),
+    ]
+    for named_style in named_styles:
+        wb.add_named_style(named_style)
+
+def _new_layout(title):
+    """
+    Sheet layout shared by the in-memory and write-only writers: rows of (value, named style) cells
+    plus row heights, column widths and merged ranges, all known before any cell is written.
+    """
+    return {"title": title, "rows": [], "heights": {}, "widths": {}, "merges": []}
+
+def _table_sheet_layout(title, columns, items, default_row_height=30):
+    """Header row plus one row per item; column widths come from the header and the first 4 data rows."""
+    from openpyxl.utils import get_column_letter
+    layout = _new_layout(title)
+    widths = [len(header) for header, _ in columns]
+    layout["rows"].append([(header, "header") for header, _ in columns])
+
+    for row_idx, item in enumerate(items, start=2):
+        # Make cells bigger so text can breathe a bit more
+        if default_row_height:
+            layout["heights"][row_idx] = default_row_height
+        row = []
+        for col_idx, (_, item_key) in enumerate(columns):
+            value = item.get(item_key)
+            # "Version #" is always the first column: centre it
+            row.append((value, "data_center" if col_idx == 0 else "data"))
+            if row_idx <= 5 and value: # Sample a few data rows for the width
+                widths[col_idx] = max(widths[col_idx], len(str(value).split('\n')[0]))
+        layout["rows"].append(row)
+
+    for col_idx, (header, _) in enumerate(columns, start=1):
+        adjusted_width = widths[col_idx - 1] + 8 # Padding for breathing room
+        if header.lower() in WIDE_COLUMN_HEADERS:
+            adjusted_width = max(adjusted_width, 50)
+        layout["widths"][get_column_letter(col_idx)] = min(adjusted_width, 70)
+    return layout
+
+def _google_sheet_layout(title, google_data, num_headlines, num_descriptions):
+    """Headlines and Descriptions sections of a Google Search/Display sheet."""
+    layout = _new_layout(title)
+    sections = [
+        (f"Headlines ({num_headlines} total, Max 30 characters each)", google_data.get("headlines", []), num_headlines, 30),
+        (f"Descriptions ({num_descriptions} total, Max 90 characters each)", google_data.get("descriptions", []), num_descriptions, 45),
+    ]
+
+    for section_idx, (section_title, texts, expected_count, row_height) in enumerate(sections):
+        if section_idx:
+            layout["rows"].append([]) # Add a spacer row
+        layout["heights"][len(layout["rows"]) + 1] = 25
+        layout["rows"].append([(section_title, "section_header")])
+
+        for i in range(expected_count):
+            layout["heights"][len(layout["rows"]) + 1] = row_height
+            text_content = texts[i] if i < len(texts) else "" # Empty if not enough generated
+            # Mark empty or placeholder cells with gray
+            is_placeholder = not text_content or "Placeholder" in text_content or "Error" in text_content
+            layout["rows"].append([(text_content, "placeholder" if is_placeholder else "data")])
+
+    layout["widths"]["A"] = 100
+    return layout
+
+def _reasoning_sheet_layout(scraped_info, reasoning_text_content):
+    layout = _new_layout("Reasoning")
+    rows, heights = layout["rows"], layout["heights"]
+    rows.append([("Scraped Client Data & Generation Reasoning", "title")])
+    layout["merges"].append("A1:B1")
 
-    for row_idx, row_obj in enumerate(ws.iter_rows()): 
-        is_header_row = (row_idx == 0)
-        # Point 1: Make cells bigger so text can breathe a bit more (applied to data rows)
-        if not is_header_row and default_row_height:
-             ws.row_dimensions[row_obj[0].row].height = default_row_height 
-
-        for cell_idx, cell in enumerate(row_obj):
-            cell.border = cell_border
-            if is_header_row:
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment 
-            else: # Data rows
-                cell.alignment = general_alignment 
-                # Point 3: Horizontal and vertical align the number inside "Version #" field.
-                # Assuming "Version #" is always the first column (index 0 for cell_idx)
-                if cell_idx == 0: 
-                    cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    
-    # Adjust column widths (simple auto-fit based on header or sample content)
-    for col_idx, column_cells in enumerate(ws.columns):
-        max_length = 0
-        column_letter = openpyxl.utils.get_column_letter(col_idx + 1)
-        
-        if ws.cell(row=1, column=col_idx + 1).value:
-            max_length = len(str(ws.cell(row=1, column=col_idx + 1).value))
-
-        for i in range(2, min(6, ws.max_row + 1)): # Check a few data rows (start from row 2)
-             cell_value = ws.cell(row=i, column=col_idx + 1).value
-             if cell_value:
-                cell_len = len(str(cell_value).split('\n')[0]) 
-                max_length = max(max_length, cell_len)
-        
-        adjusted_width = (max_length + 8) # Increased padding for breathing room
-        header_val_for_width = ws.cell(row=1, column=col_idx + 1).value
-        if header_val_for_width and str(header_val_for_width).lower() in ["body", "introductory text", "primary text", "link description", "text", "headline", "subject line"]:
-             adjusted_width = max(adjusted_width, 50) 
-        ws.column_dimensions[column_letter].width = min(adjusted_width, 70)
-
-
-def create_excel_workbook(all_content_data, scraped_info, company_name_for_file):
-    """Creates an Excel workbook with all generated content and styling."""
-    wb = openpyxl.Workbook()
-    wb.remove(wb.active) # Remove default sheet
-
-    # --- Email Sheet ---
-    if "email" in all_content_data and all_content_data["email"]:
-        ws_email = wb.create_sheet(title="Email")
-        email_headers = ["Version #", "Objective", "Headline", "Subject Line", "Body", "CTA"]
-        ws_email.append(email_headers)
-        for item in all_content_data["email"]:
-            ws_email.append([
-                item.get("Version #"), item.get("Objective"), item.get("Headline"),
-                item.get("SubjectLine"), item.get("Body"), item.get("CTA")
-            ])
-        _apply_styles(ws_email, default_row_height=45) # Increased row height for emails
-
-    # --- LinkedIn Sheet ---
-    if "linkedin" in all_content_data and all_content_data["linkedin"]:
-        ws_linkedin = wb.create_sheet(title="LinkedIn")
-        linkedin_headers = ["Version #", "Ad Name", "Objective", "Introductory Text", "Image Copy", "Headline", "Destination", "CTA Button"]
-        ws_linkedin.append(linkedin_headers)
-        for item in all_content_data["linkedin"]:
-            ws_linkedin.append([
-                item.get("Version #"), item.get("AdName"), item.get("Objective"), item.get("IntroductoryText"),
-                item.get("ImageCopy"), item.get("Headline"), item.get("Destination"), item.get("CTAButton")
-            ])
-        _apply_styles(ws_linkedin, default_row_height=45) # Increased row height
-
-    # --- Facebook Sheet ---
-    if "facebook" in all_content_data and all_content_data["facebook"]:
-        ws_facebook = wb.create_sheet(title="Facebook")
-        facebook_headers = ["Version #", "Ad Name", "Objective", "Primary Text", "Image Copy", "Headline", "Link Description", "Destination", "CTA Button"]
-        ws_facebook.append(facebook_headers)
-        for item in all_content_data["facebook"]:
-            ws_facebook.append([
-                item.get("Version #"), item.get("AdName"), item.get("Objective"), item.get("PrimaryText"),
-                item.get("ImageCopy"), item.get("Headline"), item.get("LinkDescription"),
-                item.get("Destination"), item.get("CTAButton")
-            ])
-        _apply_styles(ws_facebook, default_row_height=45) # Increased row height
-
-    # --- Common styling for Google Ad Sheets ---
-    google_header_font = Font(color="FFFFFF", bold=True)
-    google_header_fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
-    google_header_alignment = Alignment(horizontal="left", vertical="center", wrap_text=True) # Section headers left aligned
-    google_data_alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
-    thin_border_side = Side(style='thin')
-    google_cell_border = Border(left=thin_border_side, right=thin_border_side, top=thin_border_side, bottom=thin_border_side)
-    placeholder_fill_pattern = PatternFill(start_color=PLACEHOLDER_FILL_COLOR, end_color=PLACEHOLDER_FILL_COLOR, fill_type="solid")
-
-    # --- Google Search Sheet --- Point 6
-    if "google_search" in all_content_data and all_content_data["google_search"]:
-        gs_data = all_content_data["google_search"]
-        ws_gs = wb.create_sheet(title="Google Search")
-        
-        current_row = 1
-        # Headlines Section
-        ws_gs.row_dimensions[current_row].height = 25
-        cell_h_title = ws_gs.cell(row=current_row, column=1, value="Headlines (15 total, Max 30 characters each)")
-        cell_h_title.font = google_header_font
-        cell_h_title.fill = google_header_fill
-        cell_h_title.alignment = google_header_alignment
-        cell_h_title.border = google_cell_border
-        current_row += 1
-
-        headlines = gs_data.get("headlines", [])
-        for i in range(15): # Expect 15 headlines
-            ws_gs.row_dimensions[current_row].height = 30 
-            text_content = headlines[i] if i < len(headlines) else "" # Empty if not enough generated
-            
-            cell = ws_gs.cell(row=current_row, column=1, value=text_content)
-            cell.alignment = google_data_alignment
-            cell.border = google_cell_border
-            if not text_content or "Placeholder" in text_content or "Error" in text_content:
-                cell.fill = placeholder_fill_pattern # Mark empty or placeholder cells with gray
-            current_row += 1
-        
-        current_row += 1 # Add a spacer row
-
-        # Descriptions Section
-        ws_gs.row_dimensions[current_row].height = 25
-        cell_d_title = ws_gs.cell(row=current_row, column=1, value="Descriptions (4 total, Max 90 characters each)")
-        cell_d_title.font = google_header_font
-        cell_d_title.fill = google_header_fill
-        cell_d_title.alignment = google_header_alignment
-        cell_d_title.border = google_cell_border
-        current_row += 1
-
-        descriptions = gs_data.get("descriptions", [])
-        for i in range(4): # Expect 4 descriptions
-            ws_gs.row_dimensions[current_row].height = 45 
-            text_content = descriptions[i] if i < len(descriptions) else "" # Empty if not enough generated
-
-            cell = ws_gs.cell(row=current_row, column=1, value=text_content)
-            cell.alignment = google_data_alignment
-            cell.border = google_cell_border
-            if not text_content or "Placeholder" in text_content or "Error" in text_content:
-                cell.fill = placeholder_fill_pattern # Mark empty or placeholder cells with gray
-            current_row += 1
-        
-        ws_gs.column_dimensions['A'].width = 100 
-
-    # --- Google Display Sheet --- Point 6
-    if "google_display" in all_content_data and all_content_data["google_display"]:
-        gd_data = all_content_data["google_display"]
-        ws_gd = wb.create_sheet(title="Google Display")
-
-        current_row = 1
-        # Headlines Section
-        ws_gd.row_dimensions[current_row].height = 25
-        cell_h_title_gd = ws_gd.cell(row=current_row, column=1, value="Headlines (5 total, Max 30 characters each)")
-        cell_h_title_gd.font = google_header_font
-        cell_h_title_gd.fill = google_header_fill
-        cell_h_title_gd.alignment = google_header_alignment
-        cell_h_title_gd.border = google_cell_border
-        current_row += 1
-
-        headlines_gd = gd_data.get("headlines", [])
-        for i in range(5): # Expect 5 headlines
-            ws_gd.row_dimensions[current_row].height = 30
-            text_content = headlines_gd[i] if i < len(headlines_gd) else "" # Empty if not enough generated
-            
-            cell = ws_gd.cell(row=current_row, column=1, value=text_content)
-            cell.alignment = google_data_alignment
-            cell.border = google_cell_border
-            if not text_content or "Placeholder" in text_content or "Error" in text_content:
-                cell.fill = placeholder_fill_pattern # Mark empty or placeholder cells with gray
-            current_row += 1
-
-        current_row += 1 # Add a spacer row
-
-        # Descriptions Section
-        ws_gd.row_dimensions[current_row].height = 25
-        cell_d_title_gd = ws_gd.cell(row=current_row, column=1, value="Descriptions (5 total, Max 90 characters each)")
-        cell_d_title_gd.font = google_header_font
-        cell_d_title_gd.fill = google_header_fill
-        cell_d_title_gd.alignment = google_header_alignment
-        cell_d_title_gd.border = google_cell_border
-        current_row += 1
-
-        descriptions_gd = gd_data.get("descriptions", [])
-        for i in range(5): # Expect 5 descriptions
-            ws_gd.row_dimensions[current_row].height = 45
-            text_content = descriptions_gd[i] if i < len(descriptions_gd) else "" # Empty if not enough generated
-
-            cell = ws_gd.cell(row=current_row, column=1, value=text_content)
-            cell.alignment = google_data_alignment
-            cell.border = google_cell_border
-            if not text_content or "Placeholder" in text_content or "Error" in text_content:
-                cell.fill = placeholder_fill_pattern # Mark empty or placeholder cells with gray
-            current_row += 1
-        
-        ws_gd.column_dimensions['A'].width = 100
-
-    # --- Reasoning Sheet ---
-    ws_reasoning = wb.create_sheet(title="Reasoning")
-    ws_reasoning.append(["Scraped Client Data & Generation Reasoning"])
-    ws_reasoning.merge_cells('A1:B1') 
-    
-    title_cell = ws_reasoning['A1']
-    title_cell.font = Font(color="FFFFFF", bold=True, size=14)
-    title_cell.fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
-    title_cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    title_cell.border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-    current_row_reasoning = 2 
     scraped_data_map = {
         "Company Name": scraped_info.get('company_name'),
         "Tagline": scraped_info.get('tagline'),
@@ -238,50 +150,256 @@ def create_excel_workbook(all_content_data, scraped_info, company_name_for_file)
     }
 
     for key, value in scraped_data_map.items():
-        ws_reasoning.row_dimensions[current_row_reasoning].height = 35 # Increased height
-        ws_reasoning.cell(row=current_row_reasoning, column=1, value=key).font = Font(bold=True)
-        ws_reasoning.cell(row=current_row_reasoning, column=2, value=str(value))
-        for col in [1,2]:
-            cell = ws_reasoning.cell(row=current_row_reasoning, column=col)
-            cell.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True) # Vertical center
-            cell.border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-        current_row_reasoning += 1
-    
-    ws_reasoning.row_dimensions[current_row_reasoning].height = 15 # Spacer row height
-    ws_reasoning.cell(row=current_row_reasoning, column=1, value="") 
-    current_row_reasoning +=1
-
-    ws_reasoning.row_dimensions[current_row_reasoning].height = 25
-    ws_reasoning.cell(row=current_row_reasoning, column=1, value="Reasoning for Content Generation:").font = Font(bold=True, size=12)
-    ws_reasoning.merge_cells(start_row=current_row_reasoning, start_column=1, end_row=current_row_reasoning, end_column=2)
-    merged_reasoning_header = ws_reasoning.cell(row=current_row_reasoning, column=1)
-    merged_reasoning_header.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
-    merged_reasoning_header.border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-    current_row_reasoning += 1
-    
-    reasoning_text_content = all_content_data.get("reasoning_text", "Reasoning not available.")
-    reasoning_text_cell = ws_reasoning.cell(row=current_row_reasoning, column=1, value=reasoning_text_content)
+        heights[len(rows) + 1] = 35 # Increased height
+        rows.append([(key, "label"), (str(value), "data")])
+
+    heights[len(rows) + 1] = 15 # Spacer row height
+    rows.append([("", None)])
+
+    heights[len(rows) + 1] = 25
+    layout["merges"].append(f"A{len(rows) + 1}:B{len(rows) + 1}")
+    rows.append([("Reasoning for Content Generation:", "subtitle")])
+
     # Calculate required rows for reasoning text to make it breathe
     # Approx 70 chars per line for column B width, 2 lines per 30px height
     num_lines = sum([len(line) // 70 + 1 for line in reasoning_text_content.split('\n')])
     num_rows_for_reasoning = max(6, num_lines // 2 + 1) # at least 6 rows, or more if needed
 
-    ws_reasoning.merge_cells(start_row=current_row_reasoning, start_column=1, end_row=current_row_reasoning + num_rows_for_reasoning -1 , end_column=2) 
-    reasoning_text_cell.alignment = Alignment(horizontal="left", vertical="top", wrap_text=True) # Top align long text
-    
-    # Apply border to all cells in the merged range
-    merged_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-    for r_m in range(current_row_reasoning, current_row_reasoning + num_rows_for_reasoning):
-        ws_reasoning.row_dimensions[r_m].height = 30 # Set consistent height for reasoning rows
-        for c_m in range(1, 3): # Columns A and B
-            ws_reasoning.cell(row=r_m, column=c_m).border = merged_border
-
-
-    ws_reasoning.column_dimensions['A'].width = 30
-    ws_reasoning.column_dimensions['B'].width = 70
+    # Style every cell of the merged range so the border is drawn all round; top align long text
+    first_row = len(rows) + 1
+    layout["merges"].append(f"A{first_row}:B{first_row + num_rows_for_reasoning - 1}")
+    for r_m in range(num_rows_for_reasoning):
+        heights[first_row + r_m] = 30 # Set consistent height for reasoning rows
+        rows.append([(reasoning_text_content if r_m == 0 else None, "long_text"), (None, "long_text")])
+
+    layout["widths"].update({"A": 30, "B": 70})
+    return layout
+
+# Workbook sheet order by content key; the Reasoning sheet is always present
+SHEET_KEYS = [content_key for content_key, *_ in TABLE_SHEETS] + [content_key for content_key, *_ in GOOGLE_SHEETS] + ["reasoning_text"]
+
+def _sheet_layout(content_key, all_content_data, scraped_info):
+    """Layout of the sheet for one content key, or None when that stage has no content yet."""
+    # --- Email, LinkedIn and Facebook Sheets ---
+    for table_key, title, row_height, columns in TABLE_SHEETS:
+        if table_key == content_key:
+            if not all_content_data.get(content_key):
+                return None
+            return _table_sheet_layout(title, columns, all_content_data[content_key], default_row_height=row_height)
+
+    # --- Google Search and Google Display Sheets ---
+    for google_key, title, num_headlines, num_descriptions in GOOGLE_SHEETS:
+        if google_key == content_key:
+            if not all_content_data.get(content_key):
+                return None
+            return _google_sheet_layout(title, all_content_data[content_key], num_headlines, num_descriptions)
 
-    # Save to a BytesIO object
+    # --- Reasoning Sheet ---
+    return _reasoning_sheet_layout(scraped_info, all_content_data.get("reasoning_text", "Reasoning not available."))
+
+def _sheet_layouts(all_content_data, scraped_info):
+    """Yields the layout of every sheet in workbook order."""
+    for content_key in SHEET_KEYS:
+        layout = _sheet_layout(content_key, all_content_data, scraped_info)
+        if layout:
+            yield layout
+
+def build_workbook(all_content_data, scraped_info):
+    """Builds the in-memory openpyxl Workbook with all generated content and styling."""
+    import openpyxl
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active) # Remove default sheet
+    _register_named_styles(wb)
+
+    for layout in _sheet_layouts(all_content_data, scraped_info):
+        ws = wb.create_sheet(title=layout["title"])
+        for row_idx, row in enumerate(layout["rows"], start=1):
+            for col_idx, (value, style) in enumerate(row, start=1):
+                cell = ws.cell(row=row_idx, column=col_idx, value=value)
+                if style:
+                    cell.style = style
+        for row_idx, height in layout["heights"].items():
+            ws.row_dimensions[row_idx].height = height
+        for column_letter, width in layout["widths"].items():
+            ws.column_dimensions[column_letter].width = width
+        for cell_range in layout["merges"]:
+            ws.merge_cells(cell_range)
+    return wb
+
+def _new_write_only_workbook():
+    """
+    Write-only workbook with the named styles registered and every cell format pre-seeded in a fixed order,
+    so style ids - and therefore serialized sheets - don't depend on which sheets are in the workbook.
+    """
+    import openpyxl # openpyxl is only imported once a workbook is actually built
+    wb = openpyxl.Workbook(write_only=True)
+    _register_named_styles(wb)
+    for named_style in wb._named_styles:
+        wb._cell_styles.add(named_style.as_tuple())
+    return wb
+
+def _append_layout(wb, layout):
+    from openpyxl.cell import WriteOnlyCell
+    ws = wb.create_sheet(title=layout["title"])
+    # Write-only sheets need dimensions and merges before the rows are streamed
+    for row_idx, height in layout["heights"].items():
+        ws.row_dimensions[row_idx].height = height
+    for column_letter, width in layout["widths"].items():
+        ws.column_dimensions[column_letter].width = width
+    for cell_range in layout["merges"]:
+        ws.merged_cells.add(cell_range)
+
+    for row in layout["rows"]:
+        cells = []
+        for value, style in row:
+            cell = WriteOnlyCell(ws, value=value)
+            if style:
+                cell.style = style
+            cells.append(cell)
+        ws.append(cells)
+    return ws
+
+@traced()
+def write_excel_workbook(all_content_data, scraped_info, output):
+    """
+    Streams the workbook to `output` (a path or writable binary stream) using openpyxl's write-only mode.
+    Rows are written with precomputed named styles and not kept in memory; the layout matches create_excel_workbook.
+    """
+    wb = _new_write_only_workbook()
+    for layout in _sheet_layouts(all_content_data, scraped_info):
+        _append_layout(wb, layout)
+
+    wb.save(output)
+    return output
+
+@traced()
+def write_campaign_matrix_workbook(variant_results, scraped_info, output):
+    """
+    Streams a campaign matrix into one workbook at `output`: a "Variants" index sheet, then each variant's
+    sheets with its label as a prefix (e.g. "V2 LinkedIn"). `variant_results` is [(variant, all_content_data), ...].
+    """
+    wb = _new_write_only_workbook()
+    _append_layout(wb, _table_sheet_layout("Variants", VARIANT_INDEX_COLUMNS, [variant for variant, _ in variant_results]))
+    for variant, all_content_data in variant_results:
+        for layout in _sheet_layouts(all_content_data, scraped_info):
+            layout["title"] = f"{variant['label']} {layout['title']}"
+            _append_layout(wb, layout)
+    wb.save(output)
+    return output
+
+@traced()
+def write_workbooks_zip(workbooks, output):
+    """
+    Packages many client workbooks into one ZIP at `output` (a path or writable binary stream).
+    `workbooks` is an iterable of (file_name, all_content_data, scraped_info); each workbook is streamed
+    into the archive as soon as it is produced, so earlier ones are not held in memory.
+    Returns the list of file names written.
+    """
+    written = []
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as zf: # .xlsx files are already compressed
+        for file_name, all_content_data, scraped_info in workbooks:
+            with zf.open(file_name, "w", force_zip64=True) as entry:
+                write_excel_workbook(all_content_data, scraped_info, entry)
+            written.append(file_name)
+            log_event(f"Added {file_name} to ZIP export")
+    return written
+
+class IncrementalWorkbook:
+    """
+    Workbook assembled sheet by sheet as the pipeline's stages finish.
+
+    Each sheet is serialized once, when its stage's content arrives or changes, and kept as worksheet XML;
+    to_bytes() zips the cached sheets into a complete .xlsx at any point, so a partial report can be
+    downloaded mid-run and a regenerated stage only rewrites its own sheet. The finished workbook has
+    the same sheets, cells and styles as create_excel_workbook.
+    """
+
+    def __init__(self, scraped_info):
+        self.scraped_info = scraped_info
+        self._content = {}
+        self._signatures = {} # content key -> JSON of the content its cached sheet was written from
+        self._sheets = {} # content key -> (sheet title, worksheet XML bytes)
+        self._skeletons = {} # tuple of sheet titles -> package bytes with empty sheets
+        self.update_stage("reasoning_text", "Reasoning not available.") # Scraped data is known from the start
+
+    @property
+    def stages(self):
+        """Content keys that currently have a sheet, in workbook order."""
+        return [content_key for content_key in SHEET_KEYS if content_key in self._sheets]
+
+    def update_stage(self, content_key, content):
+        """Sets one stage's content and rewrites its sheet if the content changed. Returns True if rewritten."""
+        signature = json.dumps(content, sort_keys=True, default=str)
+        if self._signatures.get(content_key) == signature:
+            return False
+        self._signatures[content_key] = signature
+        self._content[content_key] = copy.deepcopy(content)
+        if content_key == "reasoning_text" and not content:
+            self._content[content_key] = "Reasoning not available."
+
+        layout = _sheet_layout(content_key, self._content, self.scraped_info)
+        if layout is None:
+            self._sheets.pop(content_key, None)
+        else:
+            self._sheets[content_key] = (layout["title"], self._serialize_sheet(layout))
+        return True
+
+    def update(self, all_content_data):
+        """Applies every stage of `all_content_data`; only sheets whose content changed are rewritten."""
+        return [content_key for content_key in SHEET_KEYS
+                if content_key in all_content_data and self.update_stage(content_key, all_content_data[content_key])]
+
+    def _serialize_sheet(self, layout):
+        with span("write_sheet", sheet=layout["title"]):
+            wb = _new_write_only_workbook()
+            _append_layout(wb, layout)
+            buffer = io.BytesIO()
+            wb.save(buffer)
+            with zipfile.ZipFile(buffer) as zf:
+                sheet_xml = zf.read("xl/worksheets/sheet1.xml")
+            set_span_attributes(bytes=len(sheet_xml))
+            return sheet_xml
+
+    def _skeleton(self, titles):
+        """Package (workbook, styles, rels, ...) with empty sheets named `titles`, cached per set of sheets."""
+        if titles not in self._skeletons:
+            wb = _new_write_only_workbook()
+            for title in titles:
+                wb.create_sheet(title=title)
+            buffer = io.BytesIO()
+            wb.save(buffer)
+            self._skeletons[titles] = buffer.getvalue()
+        return self._skeletons[titles]
+
+    @traced("assemble_workbook")
+    def to_bytes(self):
+        """The workbook as it stands (possibly partial) as a BytesIO .xlsx."""
+        sheets = [self._sheets[content_key] for content_key in self.stages]
+        skeleton = self._skeleton(tuple(title for title, _ in sheets))
+        sheet_parts = {f"xl/worksheets/sheet{index}.xml": sheet_xml for index, (_, sheet_xml) in enumerate(sheets, start=1)}
+
+        excel_bytes = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(skeleton)) as source, \
+                zipfile.ZipFile(excel_bytes, "w", compression=zipfile.ZIP_DEFLATED) as target:
+            for item in source.infolist():
+                target.writestr(item, sheet_parts.get(item.filename) or source.read(item.filename))
+        excel_bytes.seek(0)
+        set_span_attributes(sheets=len(sheets), bytes=len(excel_bytes.getvalue()))
+        return excel_bytes
+
+@traced()
+def create_excel_workbook(all_content_data, scraped_info, company_name_for_file, write_only=False):
+    """
+    Creates an Excel workbook with all generated content and styling.
+    With write_only=True the workbook is streamed (see write_excel_workbook) instead of built in memory first.
+    """
     excel_bytes = io.BytesIO()
-    wb.save(excel_bytes)
+    if write_only:
+        write_excel_workbook(all_content_data, scraped_info, excel_bytes)
+    else:
+        wb = build_workbook(all_content_data, scraped_info)
+        # Save to a BytesIO object
+        wb.save(excel_bytes)
     excel_bytes.seek(0)
-    return excel_bytes
\ No newline at end of file
+    set_span_attributes(bytes=len(excel_bytes.getvalue()), write_only=write_only)
+    return excel_bytes
@@ -1,12 +1,23 @@
 # openai_handler.py
+import asyncio
 import json
-from openai import OpenAI
-from utils import get_model_name, get_max_content_tokens
+from async_runner import run_sync
+from recorder import chat_completion_content_async, BatchPending
+from tracing import traced, span, set_span_attributes, log_event
+from utils import get_task_route
 
-def _call_openai_api(api_key, system_prompt, user_prompt, expecting_json=True):
-    """Helper function to call OpenAI API."""
-    client = OpenAI(api_key=api_key)
-    model_name = get_model_name()
+# Objective batches generated for each LinkedIn/Facebook sheet, in sheet order.
+SOCIAL_AD_OBJECTIVES = ["Brand Awareness", "Demand Gen", "Demand Capture"]
+
+# Expected (count, max characters) for each Google asset list.
+GOOGLE_AD_SPECS = {
+    "google_search": {"label": "Google Search", "format": "Responsive Search Ad", "headlines": (15, 30), "descriptions": (4, 90)},
+    "google_display": {"label": "Google Display", "format": "Responsive Display Ad", "headlines": (5, 30), "descriptions": (5, 90)},
+}
+
+async def _call_openai_api_async(api_key, system_prompt, user_prompt, expecting_json=True, task=None):
+    """Helper function to call OpenAI API. `task` selects the model, output cap and temperature (utils.TASK_ROUTES)."""
+    route = get_task_route(task)
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
@@ -14,22 +25,21 @@ def _call_openai_api(api_key, system_prompt, user_prompt, expecting_json=True):
     
     try:
         completion_args = {
-            "model": model_name,
+            "model": route["model"],
             "messages": messages,
-            "temperature": 0.7, # Creative tasks can have higher temperature
-            "max_tokens": get_max_content_tokens() 
+            "temperature": route["temperature"], # Creative tasks can have higher temperature
+            "max_tokens": route["max_tokens"]
         }
         if expecting_json:
             completion_args["response_format"] = {"type": "json_object"}
 
-        response = client.chat.completions.create(**completion_args)
-        content = response.choices[0].message.content
+        content = await chat_completion_content_async(api_key, completion_args, task=task) # Live, or recorded/replayed via recorder.py
 
         if expecting_json:
             try:
                 return json.loads(content)
             except json.JSONDecodeError as e:
-                print(f"JSON Decode Error: {e}\nRaw content: {content}")
+                log_event(f"JSON Decode Error: {e}\nRaw content: {content}")
                 # Fallback: try to extract JSON from a potentially messy string
                 try:
                     # Find the first '{' and last '}'
@@ -45,14 +55,20 @@ def _call_openai_api(api_key, system_prompt, user_prompt, expecting_json=True):
                             json_str_candidate = content[start_index : end_index+1]
                             return json.loads(json_str_candidate)
                 except json.JSONDecodeError:
-                    print("Fallback JSON extraction also failed.")
+                    log_event("Fallback JSON extraction also failed.")
                     raise # Re-raise original error if fallback fails
                 raise # Re-raise original error if initial parsing fails
         return content # For non-JSON responses (like reasoning text)
+    except BatchPending:
+        raise # Not an error: bulk mode queued the request for its next batch
     except Exception as e:
-        print(f"Error calling OpenAI API: {e}")
+        log_event(f"Error calling OpenAI API: {e}")
         raise # Re-raise to be handled by caller
 
+def _call_openai_api(api_key, system_prompt, user_prompt, expecting_json=True, task=None):
+    """Sync wrapper around _call_openai_api_async."""
+    return run_sync(_call_openai_api_async(api_key, system_prompt, user_prompt, expecting_json=expecting_json, task=task))
+
 def _build_base_context_prompt(scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url):
     context = f"""
     ### Client Information:
@@ -77,7 +93,19 @@ def _build_base_context_prompt(scraped_data, additional_docs_text, lead_objectiv
         context += f"- URL for Downloadable Asset Promotion: {downloadable_asset_url}\n"
     return context
 
-def generate_email_content(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, num_emails):
+def _build_avoid_block(avoid_content):
+    """Prompt section listing existing versions the model must not repeat (used when regenerating near-duplicates)."""
+    if not avoid_content:
+        return ""
+    examples = "\n".join(f"- {text[:300]}" for text in avoid_content)
+    return f"""
+    ### Avoid These (versions we already have):
+    The new versions must be clearly different from all of the following in angle, hook, wording and structure.
+    {examples}
+    """
+
+@traced()
+async def generate_email_content_async(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, num_emails, avoid_content=None):
     base_context = _build_base_context_prompt(scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url)
     system_prompt = "You are a creative marketing copywriter specializing in email campaigns. Generate content as a JSON list of objects."
     user_prompt = f"""
@@ -105,11 +133,11 @@ def generate_email_content(api_key, scraped_data, additional_docs_text, lead_obj
         "Body": "Discover how [Company Name] can help you achieve... Our solutions offer [USP]. Click here to [CTA description linked to {lead_objective_url}].",
         "CTA": "Book Your Free Consultation"
     }}
-    
+    {_build_avoid_block(avoid_content)}
     Generate exactly {num_emails} such email objects in the list.
     """
     try:
-        response_data = _call_openai_api(api_key, system_prompt, user_prompt, expecting_json=True)
+        response_data = await _call_openai_api_async(api_key, system_prompt, user_prompt, expecting_json=True, task="long_form_email")
         if isinstance(response_data, list) and all(isinstance(item, dict) for item in response_data):
             # Add "Version #"
             for i, item in enumerate(response_data):
@@ -122,30 +150,42 @@ def generate_email_content(api_key, scraped_data, additional_docs_text, lead_obj
                         for i, item in enumerate(response_data[key]):
                             item["Version #"] = i + 1
                         return response_data[key]
-            print(f"Unexpected JSON structure for emails: {response_data}")
+            log_event(f"Unexpected JSON structure for emails: {response_data}")
             return [] # Fallback
     except Exception as e:
-        print(f"Error generating email content: {e}")
+        log_event(f"Error generating email content: {e}")
         return [] # Return empty list on error
 
-def generate_linkedin_facebook_content(api_key, platform, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, num_pieces_per_objective):
-    base_context = _build_base_context_prompt(scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url)
-    objectives = ["Brand Awareness", "Demand Gen", "Demand Capture"]
-    all_ads = []
-    
+def generate_email_content(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, num_emails, avoid_content=None):
+    """Sync wrapper around generate_email_content_async."""
+    return run_sync(generate_email_content_async(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, num_emails, avoid_content=avoid_content))
+
+def _social_ad_placeholder(platform, ad_objective, version_num, k):
+    """Placeholder ad used when a whole objective batch fails, so the sheet keeps its structure."""
+    placeholder_ad = {
+        "Version #": version_num,
+        "AdName": f"Error generating ad - {ad_objective} - V{k+1}",
+        "Objective": ad_objective,
+    }
+    if platform == "LinkedIn":
+        placeholder_ad.update({"IntroductoryText": "Error", "ImageCopy": "Error", "Headline": "Error", "Destination": "Error", "CTAButton": "Error"})
+    elif platform == "Facebook":
+        placeholder_ad.update({"PrimaryText": "Error", "ImageCopy": "Error", "Headline": "Error", "LinkDescription": "Error", "Destination": "Error", "CTAButton": "Error"})
+    return placeholder_ad
+
+async def _generate_social_ads_for_objective_async(api_key, platform, base_context, scraped_data, lead_objective_type, lead_objective_url, downloadable_asset_url, ad_objective, num_pieces, avoid_content=None):
+    """Generates one objective batch of LinkedIn/Facebook ads. Raises on API errors."""
     # Determine destination URL logic
     # If downloadable_asset_url is provided, it can be used for some CTAs.
     # lead_objective_url is for Demo Booking/Sales Meeting.
     # The LLM should pick the most relevant one based on the ad's specific objective.
-
     system_prompt = f"You are a creative marketing copywriter specializing in {platform} ads. Generate content as a JSON list of objects."
 
-    for i, ad_objective in enumerate(objectives):
-        user_prompt = f"""
+    user_prompt = f"""
         {base_context}
 
         ### Task:
-        Generate {num_pieces_per_objective} unique {platform} ad versions.
+        Generate {num_pieces} unique {platform} ad versions.
         The specific objective for this batch of ads is: "{ad_objective}".
         
         Available destination URLs:
@@ -158,16 +198,16 @@ def generate_linkedin_facebook_content(api_key, platform, scraped_data, addition
         - "AdName": A descriptive ad name (up to 255 characters). Example: "{scraped_data.get('company_name', 'Client')} - {ad_objective} Ad - V{{version_num}}"
         - "Objective": "{ad_objective}"
         """
-        if platform == "LinkedIn":
-            user_prompt += """
+    if platform == "LinkedIn":
+        user_prompt += """
         - "IntroductoryText": Hook in the first 150 chars, max 500 chars. Embed relevant emojis.
         - "ImageCopy": Short text for the accompanying image/visual (max 30 words).
         - "Headline": Ad headline (up to 70 characters).
         - "Destination": The chosen URL (from available URLs) for this ad.
         - "CTAButton": Suggested CTA button text. Options: [Learn More, Download, Register, Request Demo, Sign Up, Get Offer]. Choose one.
             """
-        elif platform == "Facebook":
-            user_prompt += """
+    elif platform == "Facebook":
+        user_prompt += """
         - "PrimaryText": Hook in the first 125 chars, max 500 chars. Embed relevant emojis.
         - "ImageCopy": Short text for the accompanying image/visual (max 30 words).
         - "Headline": Ad headline (up to 27 characters).
@@ -175,52 +215,70 @@ def generate_linkedin_facebook_content(api_key, platform, scraped_data, addition
         - "Destination": The chosen URL (from available URLs) for this ad.
         - "CTAButton": Suggested CTA button text. Options: [Learn More, Download, Book Now, Sign Up, Get Offer, Shop Now]. Choose one.
             """
-        user_prompt += f"""
+    user_prompt += f"""{_build_avoid_block(avoid_content)}
         ### Output Format:
         Return a JSON list where each element is an object representing one ad.
-        Generate exactly {num_pieces_per_objective} such ad objects in the list for the "{ad_objective}" objective.
+        Generate exactly {num_pieces} such ad objects in the list for the "{ad_objective}" objective.
         """
-        try:
-            print(f"Generating {platform} ads for objective: {ad_objective}")
-            response_data = _call_openai_api(api_key, system_prompt, user_prompt, expecting_json=True)
-            
-            current_ads = []
-            if isinstance(response_data, list) and all(isinstance(item, dict) for item in response_data):
-                current_ads = response_data
-            elif isinstance(response_data, dict): # LLM might return a dict with a key like "ads"
-                 for key in response_data:
-                    if isinstance(response_data[key], list):
-                        current_ads = response_data[key]
-                        break
-            
-            if not current_ads:
-                print(f"No ads generated or unexpected format for {platform} - {ad_objective}")
-
-            # Add Version # and ensure Objective is set
-            for k, ad_item in enumerate(current_ads):
-                ad_item["Version #"] = (i * num_pieces_per_objective) + k + 1
-                ad_item["Objective"] = ad_objective # Ensure objective is correctly set
-            all_ads.extend(current_ads)
+    with span("objective_batch", platform=platform, objective=ad_objective, pieces=num_pieces):
+        log_event(f"Generating {platform} ads for objective: {ad_objective}")
+        response_data = await _call_openai_api_async(api_key, system_prompt, user_prompt, expecting_json=True, task="social_ads")
 
-        except Exception as e:
-            print(f"Error generating {platform} content for objective {ad_objective}: {e}")
+    current_ads = []
+    if isinstance(response_data, list) and all(isinstance(item, dict) for item in response_data):
+        current_ads = response_data
+    elif isinstance(response_data, dict): # LLM might return a dict with a key like "ads"
+        for key in response_data:
+            if isinstance(response_data[key], list):
+                current_ads = response_data[key]
+                break
+
+    if not current_ads:
+        log_event(f"No ads generated or unexpected format for {platform} - {ad_objective}")
+
+    for ad_item in current_ads:
+        ad_item["Objective"] = ad_objective # Ensure objective is correctly set
+    return current_ads
+
+def _generate_social_ads_for_objective(api_key, platform, base_context, scraped_data, lead_objective_type, lead_objective_url, downloadable_asset_url, ad_objective, num_pieces, avoid_content=None):
+    """Sync wrapper around _generate_social_ads_for_objective_async."""
+    return run_sync(_generate_social_ads_for_objective_async(api_key, platform, base_context, scraped_data, lead_objective_type, lead_objective_url, downloadable_asset_url, ad_objective, num_pieces, avoid_content=avoid_content))
+
+@traced()
+async def generate_linkedin_facebook_content_async(api_key, platform, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, num_pieces_per_objective):
+    set_span_attributes(platform=platform)
+    base_context = _build_base_context_prompt(scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url)
+    # The objective batches are independent, so they are requested concurrently on the shared loop
+    batches = await asyncio.gather(*[
+        _generate_social_ads_for_objective_async(
+            api_key, platform, base_context, scraped_data,
+            lead_objective_type, lead_objective_url, downloadable_asset_url,
+            ad_objective, num_pieces_per_objective
+        ) for ad_objective in SOCIAL_AD_OBJECTIVES
+    ], return_exceptions=True)
+    all_ads = []
+
+    for i, (ad_objective, current_ads) in enumerate(zip(SOCIAL_AD_OBJECTIVES, batches)):
+        if isinstance(current_ads, Exception):
+            log_event(f"Error generating {platform} content for objective {ad_objective}: {current_ads}")
             # Add placeholder if generation fails for this objective to maintain structure
             for k in range(num_pieces_per_objective):
-                 placeholder_ad = {
-                    "Version #": (i * num_pieces_per_objective) + k + 1,
-                    "AdName": f"Error generating ad - {ad_objective} - V{k+1}",
-                    "Objective": ad_objective,
-                 }
-                 if platform == "LinkedIn":
-                    placeholder_ad.update({"IntroductoryText": "Error", "ImageCopy": "Error", "Headline": "Error", "Destination": "Error", "CTAButton": "Error"})
-                 elif platform == "Facebook":
-                    placeholder_ad.update({"PrimaryText": "Error", "ImageCopy": "Error", "Headline": "Error", "LinkDescription": "Error", "Destination": "Error", "CTAButton": "Error"})
-                 all_ads.append(placeholder_ad)
-                 
+                all_ads.append(_social_ad_placeholder(platform, ad_objective, (i * num_pieces_per_objective) + k + 1, k))
+            continue
+        # Add Version #
+        for k, ad_item in enumerate(current_ads):
+            ad_item["Version #"] = (i * num_pieces_per_objective) + k + 1
+        all_ads.extend(current_ads)
+
     return all_ads
 
+def generate_linkedin_facebook_content(api_key, platform, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, num_pieces_per_objective):
+    """Sync wrapper around generate_linkedin_facebook_content_async."""
+    return run_sync(generate_linkedin_facebook_content_async(api_key, platform, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, num_pieces_per_objective))
 
-def generate_google_search_ads(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url):
+
+@traced()
+async def generate_google_search_ads_async(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url):
     base_context = _build_base_context_prompt(scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url)
     system_prompt = "You are an expert Google Search Ads copywriter. Generate content as a JSON object."
     user_prompt = f"""
@@ -244,23 +302,28 @@ def generate_google_search_ads(api_key, scraped_data, additional_docs_text, lead
     Ensure all character limits are strictly followed.
     """
     try:
-        response_data = _call_openai_api(api_key, system_prompt, user_prompt, expecting_json=True)
+        response_data = await _call_openai_api_async(api_key, system_prompt, user_prompt, expecting_json=True, task="short_form_google")
         if isinstance(response_data, dict) and "headlines" in response_data and "descriptions" in response_data:
-            # Validate counts and lengths (optional, but good practice)
-            response_data["headlines"] = [h[:30] for h in response_data.get("headlines", [])][:15]
-            response_data["descriptions"] = [d[:90] for d in response_data.get("descriptions", [])][:4]
+            # Validate counts; character limits are enforced by content_validator.enforce_content_limits
+            response_data["headlines"] = response_data.get("headlines", [])[:15]
+            response_data["descriptions"] = response_data.get("descriptions", [])[:4]
             # Fill if not enough generated
             while len(response_data["headlines"]) < 15: response_data["headlines"].append("Generated Headline Placeholder")
             while len(response_data["descriptions"]) < 4: response_data["descriptions"].append("Generated Description Placeholder")
             return response_data
         else:
-            print(f"Unexpected JSON structure for Google Search ads: {response_data}")
+            log_event(f"Unexpected JSON structure for Google Search ads: {response_data}")
             return {"headlines": ["Error"]*15, "descriptions": ["Error"]*4} # Fallback
     except Exception as e:
-        print(f"Error generating Google Search ad content: {e}")
+        log_event(f"Error generating Google Search ad content: {e}")
         return {"headlines": ["Error generating headline"]*15, "descriptions": ["Error generating description"]*4}
 
-def generate_google_display_ads(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url):
+def generate_google_search_ads(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url):
+    """Sync wrapper around generate_google_search_ads_async."""
+    return run_sync(generate_google_search_ads_async(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url))
+
+@traced()
+async def generate_google_display_ads_async(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url):
     base_context = _build_base_context_prompt(scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url)
     system_prompt = "You are an expert Google Display Ads copywriter. Generate content as a JSON object."
     user_prompt = f"""
@@ -285,21 +348,26 @@ def generate_google_display_ads(api_key, scraped_data, additional_docs_text, lea
     Ensure all character limits are strictly followed.
     """
     try:
-        response_data = _call_openai_api(api_key, system_prompt, user_prompt, expecting_json=True)
+        response_data = await _call_openai_api_async(api_key, system_prompt, user_prompt, expecting_json=True, task="short_form_google")
         if isinstance(response_data, dict) and "headlines" in response_data and "descriptions" in response_data:
-            response_data["headlines"] = [h[:30] for h in response_data.get("headlines", [])][:5]
-            response_data["descriptions"] = [d[:90] for d in response_data.get("descriptions", [])][:5]
+            response_data["headlines"] = response_data.get("headlines", [])[:5]
+            response_data["descriptions"] = response_data.get("descriptions", [])[:5]
             while len(response_data["headlines"]) < 5: response_data["headlines"].append("Generated Headline Placeholder")
             while len(response_data["descriptions"]) < 5: response_data["descriptions"].append("Generated Description Placeholder")
             return response_data
         else:
-            print(f"Unexpected JSON structure for Google Display ads: {response_data}")
+            log_event(f"Unexpected JSON structure for Google Display ads: {response_data}")
             return {"headlines": ["Error"]*5, "descriptions": ["Error"]*5} # Fallback
     except Exception as e:
-        print(f"Error generating Google Display ad content: {e}")
+        log_event(f"Error generating Google Display ad content: {e}")
         return {"headlines": ["Error generating headline"]*5, "descriptions": ["Error generating description"]*5}
 
-def generate_reasoning_text(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url):
+def generate_google_display_ads(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url):
+    """Sync wrapper around generate_google_display_ads_async."""
+    return run_sync(generate_google_display_ads_async(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url))
+
+@traced()
+async def generate_reasoning_text_async(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url):
     base_context = _build_base_context_prompt(scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url)
     system_prompt = "You are a marketing strategy analyst. Provide a concise reasoning statement."
     user_prompt = f"""
@@ -315,8 +383,182 @@ def generate_reasoning_text(api_key, scraped_data, additional_docs_text, lead_ob
     Keep the tone professional and insightful, suitable for an internal consultancy tool. Do not output JSON, just the text.
     """
     try:
-        reasoning = _call_openai_api(api_key, system_prompt, user_prompt, expecting_json=False)
+        reasoning = await _call_openai_api_async(api_key, system_prompt, user_prompt, expecting_json=False, task="reasoning")
         return reasoning if reasoning else "Error generating reasoning text."
     except Exception as e:
-        print(f"Error generating reasoning text: {e}")
-        return f"Error generating reasoning text: {e}"
\ No newline at end of file
+        log_event(f"Error generating reasoning text: {e}")
+        return f"Error generating reasoning text: {e}"
+
+def generate_reasoning_text(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url):
+    """Sync wrapper around generate_reasoning_text_async."""
+    return run_sync(generate_reasoning_text_async(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url))
+
+# --- Repair of failed / placeholder content ---
+
+def _is_placeholder_value(value):
+    """True for the "Error"/"Placeholder" fillers the generators emit when a call fails."""
+    if not isinstance(value, str) or not value.strip():
+        return True
+    return value == "Error" or value.startswith("Error generating") or "Placeholder" in value
+
+def _is_failed_social_ad(ad_item):
+    if not isinstance(ad_item, dict) or str(ad_item.get("AdName", "")).startswith("Error generating ad"):
+        return True
+    return any(value == "Error" for value in ad_item.values())
+
+def _is_failed_email(email_item):
+    return not isinstance(email_item, dict) or _is_placeholder_value(email_item.get("Body"))
+
+def find_failed_slices(all_generated_content, num_content_pieces):
+    """
+    Lists the slices of a run that hold placeholder/error items or are short of the requested count.
+    Each slice is a (content_key, part) tuple, e.g. ("linkedin", "Demand Gen") or ("google_search", "headlines").
+    """
+    failed = []
+
+    emails = all_generated_content.get("email") or []
+    if len([e for e in emails if not _is_failed_email(e)]) < num_content_pieces:
+        failed.append(("email", None))
+
+    for content_key in ["linkedin", "facebook"]:
+        ads = all_generated_content.get(content_key) or []
+        for ad_objective in SOCIAL_AD_OBJECTIVES:
+            good_ads = [ad for ad in ads if ad.get("Objective") == ad_objective and not _is_failed_social_ad(ad)]
+            if len(good_ads) < num_content_pieces:
+                failed.append((content_key, ad_objective))
+
+    for content_key, spec in GOOGLE_AD_SPECS.items():
+        google_data = all_generated_content.get(content_key) or {}
+        for asset_type in ["headlines", "descriptions"]:
+            expected_count = spec[asset_type][0]
+            items = google_data.get(asset_type, [])
+            if len(items) < expected_count or any(_is_placeholder_value(item) for item in items[:expected_count]):
+                failed.append((content_key, asset_type))
+
+    reasoning = all_generated_content.get("reasoning_text")
+    if not reasoning or str(reasoning).startswith("Error generating reasoning text"):
+        failed.append(("reasoning_text", None))
+
+    return failed
+
+async def _generate_google_asset_list_async(api_key, content_key, base_context, lead_objective_type, lead_objective_url, downloadable_asset_url, asset_type, count, max_chars, existing_items):
+    """Generates `count` new Google headlines or descriptions that complement the ones already kept."""
+    spec = GOOGLE_AD_SPECS[content_key]
+    singular = asset_type[:-1]
+    system_prompt = f"You are an expert {spec['label']} Ads copywriter. Generate content as a JSON object."
+    existing_block = "\n".join(f"- {item}" for item in existing_items) if existing_items else "None"
+    user_prompt = f"""
+    {base_context}
+
+    ### Task:
+    Generate {count} additional {singular}s for a Google {spec['format']}.
+    The ads should drive traffic towards "{lead_objective_type}" at {lead_objective_url}, or promote the downloadable asset if relevant ({downloadable_asset_url}).
+    Each {singular} must be a maximum of {max_chars} characters.
+
+    ### Existing {asset_type} (keep these; do not repeat them):
+    {existing_block}
+
+    ### Output Format:
+    Return a JSON object with one key: "{asset_type}" (a list of {count} strings).
+    Ensure all character limits are strictly followed.
+    """
+    response_data = await _call_openai_api_async(api_key, system_prompt, user_prompt, expecting_json=True, task="short_form_google")
+    items = response_data.get(asset_type, []) if isinstance(response_data, dict) else response_data
+    if not isinstance(items, list):
+        return []
+    return [item for item in items if isinstance(item, str) and item.strip()][:count]
+
+@traced()
+async def repair_generated_content_async(api_key, all_generated_content, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, num_content_pieces):
+    """
+    Regenerates only the failed slices found by find_failed_slices and merges them into a copy of the results.
+    Items that were already good are kept as-is. Returns (repaired_content, repaired_slices).
+    """
+    repaired = dict(all_generated_content)
+    repaired_slices = []
+    base_context = _build_base_context_prompt(scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url)
+
+    for content_key, part in find_failed_slices(all_generated_content, num_content_pieces):
+        try:
+            if content_key == "email":
+                good_emails = [e for e in repaired.get("email") or [] if not _is_failed_email(e)]
+                missing = num_content_pieces - len(good_emails)
+                log_event(f"Repairing {missing} missing email(s)")
+                # The kept emails go in as "avoid these" so the new ones aren't near-duplicates of them
+                new_emails = await generate_email_content_async(
+                    api_key, scraped_data, additional_docs_text, lead_objective_type,
+                    lead_objective_url, downloadable_asset_url, missing,
+                    avoid_content=[e.get("Body") or "" for e in good_emails]
+                )
+                if not new_emails:
+                    continue
+                merged = good_emails + new_emails[:missing]
+                for i, item in enumerate(merged):
+                    item["Version #"] = i + 1
+                repaired["email"] = merged
+
+            elif content_key in ["linkedin", "facebook"]:
+                platform = "LinkedIn" if content_key == "linkedin" else "Facebook"
+                ads = list(repaired.get(content_key) or [])
+                good_ads = [ad for ad in ads if ad.get("Objective") == part and not _is_failed_social_ad(ad)]
+                missing = num_content_pieces - len(good_ads)
+                log_event(f"Repairing {missing} {platform} ad(s) for objective: {part}")
+                text_field = "IntroductoryText" if content_key == "linkedin" else "PrimaryText"
+                new_ads = await _generate_social_ads_for_objective_async(
+                    api_key, platform, base_context, scraped_data,
+                    lead_objective_type, lead_objective_url, downloadable_asset_url,
+                    part, missing, avoid_content=[ad.get(text_field) or "" for ad in good_ads]
+                )
+                if not new_ads:
+                    continue
+                objective_ads = good_ads + new_ads[:missing]
+                # Rebuild the sheet in objective order, keeping every other objective untouched
+                merged = []
+                for i, ad_objective in enumerate(SOCIAL_AD_OBJECTIVES):
+                    batch = objective_ads if ad_objective == part else [ad for ad in ads if ad.get("Objective") == ad_objective]
+                    for k, ad_item in enumerate(batch):
+                        ad_item["Version #"] = (i * num_content_pieces) + k + 1
+                    merged.extend(batch)
+                repaired[content_key] = merged
+
+            elif content_key in GOOGLE_AD_SPECS:
+                expected_count, max_chars = GOOGLE_AD_SPECS[content_key][part]
+                google_data = dict(repaired.get(content_key) or {})
+                items = list(google_data.get(part, []))[:expected_count]
+                items += [""] * (expected_count - len(items))
+                bad_indices = [i for i, item in enumerate(items) if _is_placeholder_value(item)]
+                kept_items = [item for i, item in enumerate(items) if i not in bad_indices]
+                log_event(f"Repairing {len(bad_indices)} {GOOGLE_AD_SPECS[content_key]['label']} {part}")
+                new_items = await _generate_google_asset_list_async(
+                    api_key, content_key, base_context, lead_objective_type, lead_objective_url,
+                    downloadable_asset_url, part, len(bad_indices), max_chars, kept_items
+                )
+                if not new_items:
+                    continue
+                for index, new_item in zip(bad_indices, new_items):
+                    items[index] = new_item
+                google_data[part] = items
+                repaired[content_key] = google_data
+                if len(new_items) < len(bad_indices): # Partly filled; still a failed slice
+                    log_event(f"Only {len(new_items)} of {len(bad_indices)} {GOOGLE_AD_SPECS[content_key]['label']} {part} were regenerated")
+                    continue
+
+            elif content_key == "reasoning_text":
+                log_event("Repairing reasoning text")
+                reasoning = await generate_reasoning_text_async(
+                    api_key, scraped_data, additional_docs_text,
+                    lead_objective_type, lead_objective_url, downloadable_asset_url
+                )
+                if reasoning.startswith("Error generating reasoning text"):
+                    continue
+                repaired["reasoning_text"] = reasoning
+
+            repaired_slices.append((content_key, part))
+        except Exception as e:
+            log_event(f"Error repairing {content_key} ({part}): {e}")
+
+    return repaired, repaired_slices
+
+def repair_generated_content(api_key, all_generated_content, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, num_content_pieces):
+    """Sync wrapper around repair_generated_content_async."""
+    return run_sync(repair_generated_content_async(api_key, all_generated_content, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url, downloadable_asset_url, num_content_pieces))
@@ -0,0 +1,111 @@
+# prefetch.py
+"""
+Speculative prefetch of the inputs of Steps 1 and 2.
+
+As soon as the sidebar holds a plausible client URL (or uploaded files), the scrape + profile
+extraction (or the document parsing) starts on the async runner, keyed by that input. When the input
+changes, the stale prefetch is cancelled and a new one starts. On Generate, the pipeline takes the
+prefetched result if its key still matches the current input, waiting for it if it is still running,
+and falls back to the normal path otherwise.
+
+State lives in the caller's mapping (st.session_state), one entry per kind:
+    state["prefetch_profile"] = {"key": ..., "future": concurrent.futures.Future}
+"""
+import asyncio
+import hashlib
+from urllib.parse import urlparse
+from async_runner import submit
+from tracing import span, log_event
+
+def _state_key(kind):
+    return f"prefetch_{kind}"
+
+def looks_prefetchable_url(url):
+    """Only prefetch URLs that are plausibly complete, not every keystroke-in-progress value."""
+    if not url or not url.startswith(("http://", "https://")):
+        return False
+    host = urlparse(url).hostname or ""
+    return "." in host and not host.endswith(".")
+
+def _start(state, kind, key, coro_factory):
+    entry = state.get(_state_key(kind))
+    if entry and entry["key"] == key:
+        return False # Already prefetched (or prefetching) for this input
+    cancel_prefetch(state, kind)
+
+    async def run():
+        with span("prefetch", kind=kind):
+            return await coro_factory()
+
+    state[_state_key(kind)] = {"key": key, "future": submit(run())}
+    return True
+
+def cancel_prefetch(state, kind):
+    """Cancels and forgets the prefetch of this kind, if any."""
+    entry = state.pop(_state_key(kind), None)
+    if entry and entry["future"].cancel():
+        log_event(f"Cancelled stale {kind} prefetch")
+
+def _take(state, kind, key):
+    """
+    Consumes the prefetch of this kind. Returns (True, result) if it was started for `key` and finished
+    successfully (waiting for it if needed), otherwise (False, None) and the caller runs the normal path.
+    A consumed entry stays in place so later reruns with the same input don't prefetch it again.
+    """
+    entry = state.get(_state_key(kind))
+    if not entry or entry.get("consumed"):
+        return False, None
+    if entry["key"] != key:
+        cancel_prefetch(state, kind)
+        return False, None
+    entry["consumed"] = True
+    try:
+        return True, entry["future"].result()
+    except BaseException as e: # Includes CancelledError
+        log_event(f"{kind.capitalize()} prefetch failed, running it again: {e!r}")
+        return False, None
+
+def prefetch_status(state, kind):
+    """'running', 'ready' or None, for a sidebar hint."""
+    entry = state.get(_state_key(kind))
+    if not entry or entry.get("consumed"):
+        return None
+    return "ready" if entry["future"].done() else "running"
+
+# --- Client profile (Step 1) ---
+
+def _profile_key(url, reuse_stored_profile):
+    return (url, bool(reuse_stored_profile))
+
+def start_profile_prefetch(state, url, api_key, reuse_stored_profile):
+    """Starts Step 1 for `url` in the background. Returns True if a new prefetch was started."""
+    from profile_store import get_or_scrape_profile_async
+    from scraper import scrape_website_data_async
+
+    async def fetch():
+        if reuse_stored_profile:
+            return await get_or_scrape_profile_async(url, api_key)
+        return await scrape_website_data_async(url, api_key), "scraped"
+
+    return _start(state, "profile", _profile_key(url, reuse_stored_profile), fetch)
+
+def take_profile_prefetch(state, url, reuse_stored_profile):
+    """(found, (scraped_data, profile_status)) for the current URL; see _take."""
+    return _take(state, "profile", _profile_key(url, reuse_stored_profile))
+
+# --- Uploaded documents (Step 2) ---
+
+def _documents_key(uploaded_files):
+    # Name plus content hash: re-uploading a different file under the same name is a new input
+    return tuple((f.name, hashlib.sha256(f.getvalue()).hexdigest()) for f in uploaded_files)
+
+def start_documents_prefetch(state, uploaded_files):
+    """Starts Step 2 for the uploaded files in the background. Returns True if a new prefetch was started."""
+    from doc_parser import extract_text_from_uploaded_files
+    uploaded_files = list(uploaded_files)
+    return _start(state, "documents", _documents_key(uploaded_files),
+                  lambda: asyncio.to_thread(extract_text_from_uploaded_files, uploaded_files))
+
+def take_documents_prefetch(state, uploaded_files):
+    """(found, additional_docs_text) for the current uploads; see _take."""
+    return _take(state, "documents", _documents_key(uploaded_files))
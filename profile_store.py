@@ -0,0 +1,190 @@
+# profile_store.py
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+from async_runner import run_sync
+from scraper import (
+    get_website_text_content,
+    get_website_text_content_async,
+    extract_structured_data_from_text,
+    extract_structured_data_from_text_async,
+    build_fallback_profile_async
+)
+from tracing import traced, span, log_event
+
+PROFILE_DB_ENV = "MCG_PROFILE_DB"
+DEFAULT_PROFILE_DB = os.path.join("data", "client_profiles.sqlite3")
+MIN_RECHECK_INTERVAL_S = 3600 # Don't re-fetch a stored site more than once an hour
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    domain TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    profile_json TEXT NOT NULL,
+    fingerprint TEXT,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    source TEXT NOT NULL DEFAULT 'scrape',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    checked_at REAL NOT NULL
+)
+"""
+
+_refresh_lock = threading.Lock()
+_refreshing = set() # Domains with a background refresh in flight
+
+def get_profile_db_path():
+    return os.environ.get(PROFILE_DB_ENV, DEFAULT_PROFILE_DB)
+
+def _connect():
+    path = get_profile_db_path()
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute(_SCHEMA)
+    return conn
+
+def normalize_domain(url):
+    """Lowercased host without scheme, port or leading 'www.' - the store key."""
+    if not url:
+        return ""
+    parsed = urlparse(url if "://" in url else "https://" + url)
+    host = (parsed.hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+def fingerprint_text(text):
+    """Stable hash of the scraped page text; whitespace-insensitive."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+def get_stored_profile(url):
+    """Returns the stored record for the URL's domain as a dict (profile parsed), or None."""
+    domain = normalize_domain(url)
+    if not domain:
+        return None
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM profiles WHERE domain = ?", (domain,)).fetchone()
+    if not row:
+        return None
+    record = dict(row)
+    record["profile"] = json.loads(record.pop("profile_json"))
+    record["pinned"] = bool(record["pinned"])
+    return record
+
+def save_profile(url, profile, fingerprint=None, source="scrape", pinned=None):
+    """Inserts or updates the profile for the URL's domain. pinned=None keeps the current flag."""
+    domain = normalize_domain(url)
+    now = time.time()
+    with _connect() as conn:
+        existing = conn.execute("SELECT pinned, fingerprint FROM profiles WHERE domain = ?", (domain,)).fetchone()
+        if existing is None:
+            conn.execute(
+                "INSERT INTO profiles (domain, url, profile_json, fingerprint, pinned, source, created_at, updated_at, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (domain, url, json.dumps(profile), fingerprint, int(bool(pinned)), source, now, now, now)
+            )
+        else:
+            conn.execute(
+                "UPDATE profiles SET url = ?, profile_json = ?, fingerprint = ?, pinned = ?, source = ?, updated_at = ?, checked_at = ? "
+                "WHERE domain = ?",
+                (url, json.dumps(profile), fingerprint if fingerprint is not None else existing["fingerprint"],
+                 existing["pinned"] if pinned is None else int(bool(pinned)), source, now, now, domain)
+            )
+
+def set_profile_pinned(url, pinned):
+    """Pinned profiles are never overwritten by a background refresh."""
+    with _connect() as conn:
+        conn.execute("UPDATE profiles SET pinned = ? WHERE domain = ?", (int(bool(pinned)), normalize_domain(url)))
+
+def delete_profile(url):
+    with _connect() as conn:
+        conn.execute("DELETE FROM profiles WHERE domain = ?", (normalize_domain(url),))
+
+def _mark_checked(domain):
+    with _connect() as conn:
+        conn.execute("UPDATE profiles SET checked_at = ? WHERE domain = ?", (time.time(), domain))
+
+@traced()
+def refresh_profile_if_changed(url, api_key):
+    """
+    Re-fetches the page and re-runs LLM extraction only when its text fingerprint changed.
+    Returns True if the stored profile was replaced.
+    """
+    domain = normalize_domain(url)
+    record = get_stored_profile(url)
+    if record and record["pinned"]:
+        return False
+    website_text = get_website_text_content(url)
+    if not website_text:
+        return False
+    fingerprint = fingerprint_text(website_text)
+    if record and record["fingerprint"] == fingerprint:
+        _mark_checked(domain)
+        return False
+    log_event(f"Website content changed for {domain}; re-extracting profile.")
+    profile = extract_structured_data_from_text(website_text, api_key)
+    if not profile:
+        _mark_checked(domain)
+        return False
+    # A user may have pinned the profile while extraction was running
+    latest = get_stored_profile(url)
+    if latest and latest["pinned"]:
+        return False
+    save_profile(url, profile, fingerprint=fingerprint, source="scrape")
+    return True
+
+def _refresh_in_background(url, api_key):
+    domain = normalize_domain(url)
+    with _refresh_lock:
+        if domain in _refreshing:
+            return False
+        _refreshing.add(domain)
+
+    def worker():
+        try:
+            with span("profile_refresh", client=url):
+                refresh_profile_if_changed(url, api_key)
+        except Exception as e:
+            log_event(f"Background profile refresh failed for {domain}: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(domain)
+
+    threading.Thread(target=worker, name=f"profile-refresh-{domain}", daemon=True).start()
+    return True
+
+@traced()
+async def get_or_scrape_profile_async(url, api_key):
+    """
+    Returns (profile, status). A stored profile is returned immediately ("stored") and,
+    unless pinned or recently checked, refreshed in the background if the page changed.
+    Otherwise the site is scraped and a successful extraction is stored ("scraped").
+    A title-only fallback ("fallback") is returned but never stored.
+    SQLite calls run in a worker thread so they don't hold up the shared event loop.
+    """
+    record = await asyncio.to_thread(get_stored_profile, url)
+    if record:
+        if not record["pinned"] and time.time() - record["checked_at"] >= MIN_RECHECK_INTERVAL_S:
+            _refresh_in_background(url, api_key)
+        return record["profile"], "stored"
+
+    log_event(f"Scraping website: {url}")
+    website_text = await get_website_text_content_async(url)
+    if not website_text:
+        log_event("Failed to retrieve website content.")
+        return None, "failed"
+    profile = await extract_structured_data_from_text_async(website_text, api_key)
+    if profile:
+        await asyncio.to_thread(save_profile, url, profile, fingerprint=fingerprint_text(website_text), source="scrape")
+        return profile, "scraped"
+    log_event("Failed to extract structured data using LLM.")
+    return await build_fallback_profile_async(url), "fallback"
+
+def get_or_scrape_profile(url, api_key):
+    """Sync wrapper around get_or_scrape_profile_async."""
+    return run_sync(get_or_scrape_profile_async(url, api_key))
@@ -0,0 +1,136 @@
+# profiling.py
+"""
+Opt-in per-run CPU and memory profiling.
+
+Enable with MCG_PROFILE=1 or the admin-only sidebar toggle. The run is wrapped in cProfile and
+tracemalloc; the resulting text report lists time by library (BeautifulSoup, PyPDF2, JSON, openpyxl, ...),
+the top functions by cumulative time and the top allocation sites. Profiling never changes the run's output.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from async_runner import call_on_loop
+
+PROFILE_ENV = "MCG_PROFILE"
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+PROFILING_SKIPPED_REPORT = "Profiling skipped: another run is being profiled.\n"
+
+# cProfile on the loop thread and tracemalloc are process-wide, so only one run is profiled at a time
+_profiling_lock = threading.Lock()
+
+# Library buckets for the "time by library" summary: label -> path fragments of the modules
+LIBRARY_BUCKETS = [
+    ("BeautifulSoup (HTML parsing)", ("bs4", "html/parser", "soupsieve")),
+    ("PyPDF2 (PDF extraction)", ("PyPDF2",)),
+    ("python-pptx (PPTX extraction)", ("pptx",)),
+    ("openpyxl (workbook/styling)", ("openpyxl", "et_xmlfile")),
+    ("JSON encode/decode", ("json",)),
+    ("OpenAI client / HTTP", ("openai", "httpx", "httpcore", "requests", "urllib3", "ssl", "socket", "http/client")),
+]
+APP_DIR = os.path.dirname(os.path.abspath(__file__)).replace("\\", "/")
+
+def profiling_enabled_by_env():
+    return os.environ.get(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes")
+
+def _library_for(filename):
+    normalized = filename.replace("\\", "/")
+    if normalized.startswith(APP_DIR + "/") and "site-packages" not in normalized:
+        return "App code"
+    for label, fragments in LIBRARY_BUCKETS:
+        if any(f"/{fragment}/" in normalized or f"/{fragment}." in normalized for fragment in fragments):
+            return label
+    return "Other (stdlib, Streamlit, waits)"
+
+def _time_by_library(stats):
+    totals = {}
+    for (filename, _, _), (_, _, self_time, _, _) in stats.stats.items():
+        label = _library_for(filename)
+        totals[label] = totals.get(label, 0.0) + self_time
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+def build_report(profilers, snapshot, wall_s, label):
+    """Formats the merged cProfile stats and tracemalloc snapshot as a plain-text report."""
+    out = io.StringIO()
+    stats = pstats.Stats(*profilers, stream=out)
+    out.write(f"Profile report: {label}\n")
+    out.write(f"Wall time: {wall_s:.2f} s | Profiled CPU-side time: {stats.total_tt:.2f} s\n")
+    current, peak = snapshot["current"], snapshot["peak"]
+    out.write(f"Traced memory: current {current / 1024 / 1024:.1f} MB, peak {peak / 1024 / 1024:.1f} MB\n\n")
+
+    out.write("== Self time by library ==\n")
+    for library, seconds in _time_by_library(stats):
+        out.write(f"{seconds:9.3f} s  {library}\n")
+
+    out.write(f"\n== Top {TOP_FUNCTIONS} functions by cumulative time ==\n")
+    stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+    out.write(f"\n== Top {TOP_ALLOCATIONS} allocation sites (live at end of run) ==\n")
+    for stat in snapshot["top"]:
+        frame = stat.traceback[0]
+        out.write(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}\n")
+    return out.getvalue()
+
+@contextmanager
+def profile_run(enabled, label="run"):
+    """
+    Profiles the block when `enabled`. Yields a dict whose "report" key holds the text report
+    after the block exits (None when disabled). The calling thread and the async runner's loop thread
+    (where LLM calls and fetches run) are CPU-profiled. While another run is being profiled the block
+    runs unprofiled and the report says so.
+    """
+    result = {"report": None}
+    if not enabled:
+        yield result
+        return
+    if not _profiling_lock.acquire(blocking=False):
+        result["report"] = PROFILING_SKIPPED_REPORT
+        yield result
+        return
+    try:
+        with _profiled(result, label):
+            yield result
+    finally:
+        _profiling_lock.release()
+
+@contextmanager
+def _profiled(result, label):
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    # Since 3.12 cProfile runs on sys.monitoring: one active profiler per process, covering every thread.
+    # Before that it only sees the thread that enabled it, so the loop thread needs its own.
+    loop_profiler = cProfile.Profile() if sys.version_info < (3, 12) else None
+    profilers = [profiler] + ([loop_profiler] if loop_profiler else [])
+    start = time.perf_counter()
+    profiler.enable()
+    if loop_profiler:
+        try:
+            call_on_loop(loop_profiler.enable)
+        except BaseException:
+            profiler.disable()
+            raise
+    try:
+        yield result
+    finally:
+        if loop_profiler:
+            call_on_loop(loop_profiler.disable)
+        profiler.disable()
+        wall_s = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ]).statistics("lineno")[:TOP_ALLOCATIONS]
+        if not already_tracing:
+            tracemalloc.stop()
+        result["report"] = build_report(profilers, {"current": current, "peak": peak, "top": top}, wall_s, label)
@@ -0,0 +1,218 @@
+# recorder.py
+"""
+Record/replay of LLM and HTTP traffic.
+
+Set MCG_TRAFFIC_MODE=record to capture every chat completion and scraper fetch into a cassette
+(JSON Lines, gzip-compressed when the path ends in .gz), and MCG_TRAFFIC_MODE=replay to serve them
+back deterministically without network access. MCG_REPLAY_TIMING=zero skips the recorded latency.
+
+    MCG_TRAFFIC_MODE=record MCG_CASSETTE=cassettes/acme.jsonl.gz streamlit run app.py
+    MCG_TRAFFIC_MODE=replay MCG_CASSETTE=cassettes/acme.jsonl.gz MCG_REPLAY_TIMING=zero streamlit run app.py
+"""
+import asyncio
+import contextvars
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from async_runner import get_async_openai_client, get_async_http_client
+from tracing import span, set_span_attributes, log_event
+from utils import record_task_metrics, get_max_concurrent_llm_calls
+
+TRAFFIC_MODE_ENV = "MCG_TRAFFIC_MODE" # "record", "replay" or unset for live traffic
+CASSETTE_PATH_ENV = "MCG_CASSETTE"
+REPLAY_TIMING_ENV = "MCG_REPLAY_TIMING" # "original" (default) or "zero"
+DEFAULT_CASSETTE_PATH = os.path.join("cassettes", "run.jsonl.gz")
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when a request was never recorded."""
+
+class RecordedError(Exception):
+    """Replays an exception that the original call raised."""
+
+class BatchPending(Exception):
+    """Raised under a batch session (bulk_mode.py) for a request that was queued for the next batch."""
+
+def _open_cassette(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+class Cassette:
+    """Entries are keyed by a hash of the request; repeated identical requests replay in recorded order."""
+
+    def __init__(self, mode, path, replay_timing="original"):
+        self.mode = mode
+        self.path = path
+        self.replay_timing = replay_timing
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._cursors = {}
+        if mode == "replay":
+            with _open_cassette(path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+            log_event(f"Replaying {sum(len(e) for e in self._entries.values())} recorded call(s) from {path}")
+        elif mode == "record":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            log_event(f"Recording LLM and HTTP traffic to {path}")
+
+    def record(self, kind, key, elapsed_s, summary, response=None, error=None):
+        entry = {"kind": kind, "key": key, "elapsed_s": round(elapsed_s, 4), "summary": summary}
+        if error is not None:
+            entry["error"] = error
+        else:
+            entry["response"] = response
+        with self._lock, _open_cassette(self.path, "a") as f: # Append per call so partial runs are kept
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _next_entry(self, kind, key):
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recorded {kind} call for key {key[:12]} in {self.path}")
+            cursor = self._cursors.get(key, 0)
+            entry = entries[min(cursor, len(entries) - 1)] # Repeat the last one if called more often than recorded
+            self._cursors[key] = cursor + 1
+        return entry
+
+    def _replay_result(self, entry):
+        if "error" in entry:
+            raise RecordedError(entry["error"])
+        return entry["response"]
+
+    def replay(self, kind, key):
+        entry = self._next_entry(kind, key)
+        if self.replay_timing != "zero":
+            time.sleep(entry["elapsed_s"])
+        return self._replay_result(entry)
+
+    async def replay_async(self, kind, key):
+        entry = self._next_entry(kind, key)
+        if self.replay_timing != "zero":
+            await asyncio.sleep(entry["elapsed_s"])
+        return self._replay_result(entry)
+
+_cassette = None
+_configured = False
+_configure_lock = threading.Lock()
+
+def configure_traffic_mode(mode=None, cassette_path=None, replay_timing=None):
+    """Sets the traffic mode programmatically (benchmarks/tools); defaults come from the environment."""
+    global _cassette, _configured
+    mode = mode if mode is not None else os.environ.get(TRAFFIC_MODE_ENV, "").strip().lower()
+    cassette_path = cassette_path or os.environ.get(CASSETTE_PATH_ENV) or DEFAULT_CASSETTE_PATH
+    replay_timing = replay_timing or os.environ.get(REPLAY_TIMING_ENV, "original").strip().lower()
+    with _configure_lock:
+        _cassette = Cassette(mode, cassette_path, replay_timing) if mode in ("record", "replay") else None
+        _configured = True
+    return _cassette
+
+def get_cassette():
+    """Active cassette, or None for live traffic. Configured from the environment on first use."""
+    if not _configured:
+        configure_traffic_mode()
+    return _cassette
+
+_llm_slots = None
+
+def _get_llm_slots():
+    """Semaphore bounding in-flight LLM calls; shared by every run since they all use the one async loop."""
+    global _llm_slots
+    if _llm_slots is None:
+        _llm_slots = asyncio.Semaphore(get_max_concurrent_llm_calls())
+    return _llm_slots
+
+# Bulk mode answers LLM calls from batch results instead of the live API; see bulk_mode.BatchSession
+_batch_session = contextvars.ContextVar("batch_session", default=None)
+
+def set_batch_session(session):
+    """Routes LLM calls made in the current context (and tasks/threads started from it) through `session`."""
+    return _batch_session.set(session)
+
+def _request_key(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+async def chat_completion_content_async(api_key, completion_args, task=None):
+    """Runs a chat completion (or replays it) and returns the message content. Latency/cost are recorded per task."""
+    key = _request_key({"kind": "llm", **completion_args})
+    batch_session = _batch_session.get()
+    if batch_session is not None:
+        with span("llm_call", task=task, model=completion_args.get("model"), batched=True):
+            answer = batch_session.resolve(key, completion_args, task) # Raises BatchPending until the batch has it
+            usage = answer.get("usage") or {}
+            set_span_attributes(prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"),
+                                response_chars=len(answer["content"] or ""))
+            return answer["content"]
+
+    cassette = get_cassette()
+    call_start = time.perf_counter()
+    with span("llm_call", task=task, model=completion_args.get("model"), replayed=bool(cassette and cassette.mode == "replay")):
+        if cassette and cassette.mode == "replay":
+            recorded = await cassette.replay_async("llm", key)
+            usage = recorded.get("usage") or {}
+            content = recorded["content"]
+        else:
+            async with _get_llm_slots():
+                start = time.perf_counter()
+                set_span_attributes(queued_s=round(start - call_start, 4) or None)
+                try:
+                    client = get_async_openai_client(api_key)
+                    response = await client.chat.completions.create(**completion_args)
+                    content = response.choices[0].message.content
+                    usage = {"prompt_tokens": response.usage.prompt_tokens,
+                             "completion_tokens": response.usage.completion_tokens} if response.usage else {}
+                except Exception as e:
+                    if cassette:
+                        cassette.record("llm", key, time.perf_counter() - start, _llm_summary(completion_args), error=str(e))
+                    raise
+                if cassette:
+                    cassette.record("llm", key, time.perf_counter() - start, _llm_summary(completion_args),
+                                    response={"content": content, "usage": usage})
+        cost_usd, over_budget = record_task_metrics(task, completion_args.get("model"), time.perf_counter() - call_start,
+                                                    usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        set_span_attributes(prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"),
+                            response_chars=len(content or ""), cost_usd=cost_usd, over_latency_budget=over_budget or None)
+        if over_budget:
+            log_event(f"{task} call took {time.perf_counter() - call_start:.1f}s, over its latency budget")
+        return content
+
+def _llm_summary(completion_args):
+    user_prompt = next((m["content"] for m in completion_args.get("messages", []) if m.get("role") == "user"), "")
+    return {"model": completion_args.get("model"), "prompt_preview": " ".join(user_prompt.split())[:160]}
+
+async def http_get_async(url, headers=None, timeout=10):
+    """GET (or its replay) for the scraper on the pooled async client. Returns an httpx.Response."""
+    import httpx
+    cassette = get_cassette()
+    key = _request_key({"kind": "http", "url": url, "headers": headers or {}})
+    with span("http_fetch", url=url, replayed=bool(cassette and cassette.mode == "replay")):
+        if cassette and cassette.mode == "replay":
+            try:
+                recorded = await cassette.replay_async("http", key)
+            except RecordedError as e:
+                raise httpx.ConnectError(str(e)) # Scraper handles it like the original failure
+            response = httpx.Response(
+                recorded["status_code"], content=recorded["content"].encode("utf-8"),
+                request=httpx.Request("GET", url),
+            )
+        else:
+            start = time.perf_counter()
+            try:
+                response = await get_async_http_client().get(url, headers=headers, timeout=timeout)
+            except httpx.HTTPError as e:
+                if cassette:
+                    cassette.record("http", key, time.perf_counter() - start, {"url": url}, error=str(e))
+                raise
+            if cassette:
+                cassette.record("http", key, time.perf_counter() - start, {"url": url}, response={
+                    "status_code": response.status_code, "reason": response.reason_phrase, "encoding": response.encoding,
+                    "content": response.content.decode("utf-8", errors="replace"),
+                })
+        set_span_attributes(status_code=response.status_code, bytes=len(response.content))
+        return response
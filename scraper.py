@@ -1,46 +1,64 @@
 # scraper.py
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import json
-from openai import OpenAI
-from utils import get_model_name, get_max_scrape_tokens
+from async_runner import run_sync
+from recorder import chat_completion_content_async, http_get_async
+from tracing import traced, span, log_event
+from utils import get_task_route, get_max_scrape_tokens
 
-def get_website_text_content(url):
+def _extract_visible_text(html_content):
+    from bs4 import BeautifulSoup # Loaded on first scrape, not at app start
+    with span("parse_html", bytes=len(html_content)):
+        soup = BeautifulSoup(html_content, 'html.parser')
+
+        # Remove script and style elements
+        for script_or_style in soup(["script", "style"]):
+            script_or_style.decompose()
+
+        # Get text
+        return soup.get_text(separator=' ', strip=True)
+
+def _extract_title(html_content):
+    from bs4 import BeautifulSoup
+    with span("parse_html", bytes=len(html_content)):
+        title_tag = BeautifulSoup(html_content, 'html.parser').find('title')
+        return title_tag.string.strip() if title_tag and title_tag.string else None
+
+async def get_website_text_content_async(url):
     """Fetches and extracts visible text content from a URL."""
+    import httpx
     try:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        response = requests.get(url, headers=headers, timeout=10)
+        response = await http_get_async(url, headers=headers, timeout=10)
         response.raise_for_status() # Raise an exception for HTTP errors
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script and style elements
-        for script_or_style in soup(["script", "style"]):
-            script_or_style.decompose()
-            
-        # Get text
-        text = soup.get_text(separator=' ', strip=True)
+        # Parsing is CPU-bound; keep it off the event loop so other in-flight calls aren't stalled
+        text = await asyncio.to_thread(_extract_visible_text, response.content)
         
         # Limit text length to avoid excessive token usage for LLM processing
         # A more sophisticated chunking/summarization might be needed for very large pages
         max_len = get_max_scrape_tokens() * 3 # Approx 3 chars per token
         return text[:max_len]
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching URL {url}: {e}")
+    except httpx.HTTPError as e:
+        log_event(f"Error fetching URL {url}: {e}")
         return None
     except Exception as e:
-        print(f"Error parsing content from {url}: {e}")
+        log_event(f"Error parsing content from {url}: {e}")
         return None
 
-def extract_structured_data_from_text(text_content, api_key):
+def get_website_text_content(url):
+    """Sync wrapper around get_website_text_content_async."""
+    return run_sync(get_website_text_content_async(url))
+
+@traced()
+async def extract_structured_data_from_text_async(text_content, api_key):
     """Uses OpenAI to extract structured company information from text."""
     if not text_content:
         return None
 
-    client = OpenAI(api_key=api_key)
-    model_name = get_model_name()
+    route = get_task_route("profile_extraction")
 
     prompt = f"""
     Analyze the following website text content and extract the specified company information.
@@ -63,16 +81,16 @@ def extract_structured_data_from_text(text_content, api_key):
     """ # Truncate again to be safe with prompt length
 
     try:
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=[
+        extracted_json_str = await chat_completion_content_async(api_key, {
+            "model": route["model"],
+            "messages": [
                 {"role": "system", "content": "You are an expert in extracting structured information from website content. Output ONLY the JSON object."},
                 {"role": "user", "content": prompt}
             ],
-            response_format={"type": "json_object"},
-            temperature=0.2 # Lower temperature for more factual extraction
-        )
-        extracted_json_str = response.choices[0].message.content
+            "response_format": {"type": "json_object"},
+            "temperature": route["temperature"], # Lower temperature for more factual extraction
+            "max_tokens": route["max_tokens"]
+        }, task="profile_extraction")
         extracted_data = json.loads(extracted_json_str)
         
         # Ensure all keys are present, defaulting to "Not found" or empty list
@@ -95,52 +113,61 @@ def extract_structured_data_from_text(text_content, api_key):
 
         return extracted_data
     except json.JSONDecodeError as e:
-        print(f"Error decoding JSON from OpenAI response: {e}")
-        print(f"Problematic JSON string: {extracted_json_str}")
+        log_event(f"Error decoding JSON from OpenAI response: {e}")
+        log_event(f"Problematic JSON string: {extracted_json_str}")
         return None
     except Exception as e:
-        print(f"Error calling OpenAI for structured data extraction: {e}")
+        log_event(f"Error calling OpenAI for structured data extraction: {e}")
         return None
 
+def extract_structured_data_from_text(text_content, api_key):
+    """Sync wrapper around extract_structured_data_from_text_async."""
+    return run_sync(extract_structured_data_from_text_async(text_content, api_key))
 
-def scrape_website_data(url, api_key):
+async def build_fallback_profile_async(url):
+    """Fallback when LLM extraction fails: try to get at least the title as company name."""
+    try:
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        response = await http_get_async(url, headers=headers, timeout=10)
+        response.raise_for_status()
+        company_name_from_title = await asyncio.to_thread(_extract_title, response.content) or "Unknown Company"
+        return {
+            "company_name": company_name_from_title,
+            "tagline": "Not found", "mission_statement": "Not found", "industry": "Not found",
+            "products_services": [], "usps_value_proposition": "Not found",
+            "target_audience": "Not found", "tone_of_voice": "Not found", "ctas": []
+        }
+    except Exception:
+        return {
+            "company_name": "Unknown Company",
+            "tagline": "Not found", "mission_statement": "Not found", "industry": "Not found",
+            "products_services": [], "usps_value_proposition": "Not found",
+            "target_audience": "Not found", "tone_of_voice": "Not found", "ctas": []
+        }
+
+@traced()
+async def scrape_website_data_async(url, api_key):
     """
     Scrapes website for company info.
     First, gets all text. Then, uses LLM to extract structured info.
     """
-    print(f"Scraping website: {url}")
-    website_text = get_website_text_content(url)
+    log_event(f"Scraping website: {url}")
+    website_text = await get_website_text_content_async(url)
     if not website_text:
-        print("Failed to retrieve website content.")
+        log_event("Failed to retrieve website content.")
         return None
     
-    print("Extracting structured data using LLM...")
-    structured_data = extract_structured_data_from_text(website_text, api_key)
+    log_event("Extracting structured data using LLM...")
+    structured_data = await extract_structured_data_from_text_async(website_text, api_key)
     
     if structured_data:
-        print("Successfully extracted structured data.")
+        log_event("Successfully extracted structured data.")
     else:
-        print("Failed to extract structured data using LLM.")
-        # Fallback: try to get at least the title as company name
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            title_tag = soup.find('title')
-            company_name_from_title = title_tag.string.strip() if title_tag else "Unknown Company"
-            return {
-                "company_name": company_name_from_title,
-                "tagline": "Not found", "mission_statement": "Not found", "industry": "Not found",
-                "products_services": [], "usps_value_proposition": "Not found",
-                "target_audience": "Not found", "tone_of_voice": "Not found", "ctas": []
-            }
-        except Exception:
-             return {
-                "company_name": "Unknown Company",
-                "tagline": "Not found", "mission_statement": "Not found", "industry": "Not found",
-                "products_services": [], "usps_value_proposition": "Not found",
-                "target_audience": "Not found", "tone_of_voice": "Not found", "ctas": []
-            }
-
-    return structured_data
\ No newline at end of file
+        log_event("Failed to extract structured data using LLM.")
+        return await build_fallback_profile_async(url)
+
+    return structured_data
+
+def scrape_website_data(url, api_key):
+    """Sync wrapper around scrape_website_data_async."""
+    return run_sync(scrape_website_data_async(url, api_key))
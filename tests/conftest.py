@@ -0,0 +1,10 @@
+# tests/conftest.py
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks")) # sample_data
+
+os.environ.setdefault("MCG_TRACING", "0") # Keep test spans out of traces/
@@ -0,0 +1,127 @@
+# tests/test_bulk_mode.py
+import json
+import pytest
+import bulk_mode
+from async_runner import run_sync
+from bulk_mode import BatchSession, parse_batch_output, load_answers, load_clients, MAX_BATCH_ROUNDS
+from recorder import BatchPending, RecordedError
+
+COMPLETION_ARGS = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Write an email"}]}
+
+def _output_line(custom_id, status_code=200, content="Hello", error=None, body_error=None):
+    body = {"error": body_error} if body_error else {"choices": [{"message": {"content": content}}], "usage": {"total_tokens": 7}}
+    return json.dumps({"custom_id": custom_id, "response": {"status_code": status_code, "body": body}, "error": error})
+
+def test_parse_batch_output_reads_content_and_usage():
+    answers = parse_batch_output(_output_line("acme:email:abc") + "\n\n")
+    assert answers == {"acme:email:abc": {"content": "Hello", "usage": {"total_tokens": 7}}}
+
+def test_parse_batch_output_keeps_failures_as_errors():
+    text = "\n".join([
+        _output_line("a", error={"code": "batch_expired", "message": "Batch expired"}),
+        _output_line("b", status_code=429, body_error={"message": "Rate limit reached"}),
+        _output_line("c", status_code=500),
+    ])
+    answers = parse_batch_output(text)
+    assert answers["a"] == {"error": "Batch expired"}
+    assert answers["b"] == {"error": "Rate limit reached"}
+    assert answers["c"] == {"error": "HTTP 500"}
+
+def test_session_returns_successful_answers():
+    session = BatchSession("acme", {})
+    custom_id = session.custom_id("k" * 64, "email")
+    session.answers[custom_id] = {"content": "Hello", "usage": {}}
+    assert session.resolve("k" * 64, COMPLETION_ARGS, "email")["content"] == "Hello"
+    assert session.pending == {}
+
+@pytest.mark.parametrize("answers", [{}, {"acme:email:kkkkkkkkkkkkkkkk": {"error": "Rate limit reached"}}])
+def test_session_requeues_missing_and_failed_answers(answers):
+    session = BatchSession("acme", answers)
+    with pytest.raises(BatchPending):
+        session.resolve("k" * 64, COMPLETION_ARGS, "email")
+    assert list(session.pending) == ["acme:email:kkkkkkkkkkkkkkkk"]
+    assert session.pending["acme:email:kkkkkkkkkkkkkkkk"]["body"] == COMPLETION_ARGS
+    with pytest.raises(BatchPending):
+        session.checkpoint()
+
+def test_final_round_fails_like_a_live_call():
+    session = BatchSession("acme", {"acme:email:kkkkkkkkkkkkkkkk": {"error": "Rate limit reached"}}, final=True)
+    with pytest.raises(RecordedError, match="Rate limit reached"):
+        session.resolve("k" * 64, COMPLETION_ARGS, "email")
+    with pytest.raises(RecordedError, match=f"after {MAX_BATCH_ROUNDS} rounds"):
+        session.resolve("m" * 64, COMPLETION_ARGS, "email")
+    assert session.pending == {}
+
+def test_load_answers_skips_failed_items(tmp_path):
+    (tmp_path / "round1.results.jsonl").write_text("\n".join([
+        _output_line("ok"),
+        _output_line("failed", status_code=429, body_error={"message": "Rate limit reached"}),
+    ]))
+    (tmp_path / "notes.jsonl").write_text(_output_line("ignored"))
+    assert set(load_answers(str(tmp_path))) == {"ok"}
+
+def test_load_clients_gives_unique_ids_and_defaults(tmp_path):
+    path = tmp_path / "clients.jsonl"
+    path.write_text("\n".join(json.dumps({"id": "acme", "url": url, "lead_objective_url": "acme.com/demo"})
+                              for url in ["acme.com", "https://acme.com/pricing"]))
+    clients = load_clients(str(path))
+    assert [c["id"] for c in clients] == ["acme", "acme-2"]
+    assert clients[0]["url"] == "https://acme.com"
+    assert clients[0]["lead_objective_url"] == "https://acme.com/demo"
+    assert clients[0]["lead_objective_type"] == "Demo Booking"
+
+def _fake_pipeline(monkeypatch):
+    """Replaces profile building and the content pass with one email request per client."""
+    async def prepare(api_key, client, reuse_stored_profile):
+        client["scraped_data"], client["docs_text"] = {"company_name": client["id"]}, ""
+        return client
+    async def content_pass(api_key, client, session, near_duplicate_threshold):
+        return {"email": session.resolve("k" * 64, COMPLETION_ARGS, "email")["content"]}
+    monkeypatch.setattr(bulk_mode, "_prepare_client", prepare)
+    monkeypatch.setattr(bulk_mode, "_content_pass", content_pass)
+
+def _clients(tmp_path, ids):
+    path = tmp_path / "clients.json"
+    path.write_text(json.dumps([{"id": client_id, "url": f"{client_id}.com", "lead_objective_url": f"{client_id}.com/demo"}
+                                for client_id in ids]))
+    return load_clients(str(path))
+
+@pytest.mark.parametrize("resume", [False, True])
+def test_earlier_answers_are_only_reused_with_resume(tmp_path, monkeypatch, resume):
+    _fake_pipeline(monkeypatch)
+    work_dir = tmp_path / "batches"
+    work_dir.mkdir()
+    (work_dir / "20250101-000000-round1.results.jsonl").write_text(_output_line("acme:email:kkkkkkkkkkkkkkkk", content="Last night"))
+
+    results, report = run_sync(bulk_mode.run_bulk_async("sk-test", _clients(tmp_path, ["acme"]), str(work_dir),
+                                                        render_only=True, resume=resume, progress=lambda message: None))
+    request_files = list(work_dir.glob("*.requests.jsonl"))
+    if resume:
+        assert results == {"acme": {"email": "Last night"}}
+        assert report["reused_answers"] == 1 and request_files == []
+    else:
+        assert results == {}
+        assert report["reused_answers"] == 0 and len(request_files) == 1
+
+def test_a_client_that_fails_to_prepare_is_skipped(tmp_path, monkeypatch):
+    _fake_pipeline(monkeypatch)
+    work_dir = tmp_path / "batches"
+    work_dir.mkdir()
+    (work_dir / "20250101-000000-round1.results.jsonl").write_text("\n".join(
+        _output_line(f"{client_id}:email:kkkkkkkkkkkkkkkk", content=f"Hi {client_id}") for client_id in ["acme", "globex"]))
+    clients = _clients(tmp_path, ["acme", "initech", "globex"])
+    clients[1]["documents"] = [str(tmp_path / "missing-brief.pdf")]
+    prepare = bulk_mode._prepare_client
+
+    async def prepare_with_real_uploads(api_key, client, reuse_stored_profile):
+        for path in client["documents"]:
+            bulk_mode._named_upload(path) # Raises for the missing file, as in the real _prepare_client
+        return await prepare(api_key, client, reuse_stored_profile)
+    monkeypatch.setattr(bulk_mode, "_prepare_client", prepare_with_real_uploads)
+
+    messages = []
+    results, report = run_sync(bulk_mode.run_bulk_async("sk-test", clients, str(work_dir), resume=True,
+                                                        progress=messages.append))
+    assert results == {"acme": {"email": "Hi acme"}, "globex": {"email": "Hi globex"}}
+    assert report["skipped"] == ["initech"]
+    assert any("initech" in message and "missing-brief.pdf" in message for message in messages)
@@ -0,0 +1,52 @@
+# tests/test_campaign_matrix.py
+import copy
+import campaign_matrix
+import content_validator
+import diversity
+from campaign_matrix import build_campaign_variants, generate_campaign_matrix
+from sample_data import make_sample_content, SAMPLE_SCRAPED_DATA
+
+NUM_VERSIONS = 3
+
+def test_variants_cover_every_combination():
+    variants = build_campaign_variants(["Demo Booking", "Free Trial"], ["https://acme.com/a", "https://acme.com/b"], [])
+    assert [v["label"] for v in variants] == ["V1", "V2", "V3", "V4"]
+    assert variants[3] == {"label": "V4", "lead_objective_type": "Free Trial",
+                           "lead_objective_url": "https://acme.com/b", "downloadable_asset_url": ""}
+
+def test_variant_checks_run_on_the_loop(monkeypatch):
+    """The diversity and limit checks are awaited on the loop; a sync wrapper there would block a worker thread."""
+    def no_run_sync(coro):
+        coro.close()
+        raise AssertionError("run_sync called from a variant")
+    monkeypatch.setattr(diversity, "run_sync", no_run_sync)
+    monkeypatch.setattr(content_validator, "run_sync", no_run_sync)
+
+    sample = make_sample_content(NUM_VERSIONS)
+    sample["email"][2] = dict(sample["email"][0], **{"Version #": 3}) # Near-duplicate of the first email
+    sample["facebook"][0]["Headline"] = "A headline that is far too long for Facebook"
+
+    async def returns(value):
+        return copy.deepcopy(value)
+    monkeypatch.setattr(campaign_matrix, "generate_email_content_async", lambda *args: returns(sample["email"]))
+    monkeypatch.setattr(campaign_matrix, "generate_linkedin_facebook_content_async",
+                        lambda api_key, platform, *args: returns(sample[platform.lower()]))
+    monkeypatch.setattr(campaign_matrix, "generate_google_search_ads_async", lambda *args: returns(sample["google_search"]))
+    monkeypatch.setattr(campaign_matrix, "generate_google_display_ads_async", lambda *args: returns(sample["google_display"]))
+    monkeypatch.setattr(campaign_matrix, "generate_reasoning_text_async", lambda *args: returns(sample["reasoning_text"]))
+
+    async def fresh_emails(*args, avoid_content=None):
+        return [{"Headline": "Fresh angle", "SubjectLine": "Something new", "Body": "Entirely different copy"}]
+    async def rewrites(api_key, violations):
+        return {v["id"]: "Short headline" for v in violations}
+    monkeypatch.setattr(diversity, "generate_email_content_async", fresh_emails)
+    monkeypatch.setattr(content_validator, "_request_limit_rewrites_chunk_async", rewrites)
+
+    variants = build_campaign_variants(["Demo Booking"], ["https://acme.com/a", "https://acme.com/b"], [])
+    results = generate_campaign_matrix("sk-test", SAMPLE_SCRAPED_DATA, "", variants, NUM_VERSIONS, near_duplicate_threshold=0.8)
+
+    assert [variant["label"] for variant, _ in results] == ["V1", "V2"]
+    for _, content in results:
+        assert content["email"][2]["Headline"] == "Fresh angle"
+        assert content["email"][2]["Version #"] == 3
+        assert content["facebook"][0]["Headline"] == "Short headline"
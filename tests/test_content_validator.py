@@ -0,0 +1,47 @@
+# tests/test_content_validator.py
+from content_validator import (
+    truncate_at_word_boundary,
+    find_limit_violations,
+    chunk_violations,
+    REWRITE_ITEM_OVERHEAD_TOKENS,
+    REWRITE_OUTPUT_BUDGET_SHARE
+)
+from sample_data import make_sample_content
+
+def test_truncate_keeps_short_text():
+    assert truncate_at_word_boundary("Book a demo", 27) == "Book a demo"
+
+def test_truncate_cuts_at_word_boundary_and_strips_punctuation():
+    assert truncate_at_word_boundary("Faster forecasts, for every team", 20) == "Faster forecasts"
+    assert truncate_at_word_boundary("Dashboards - built for ops teams", 13) == "Dashboards"
+
+def test_truncate_hard_cuts_a_single_long_word():
+    assert truncate_at_word_boundary("Supercalifragilistic", 5) == "Super"
+
+def test_sample_content_is_within_limits():
+    assert find_limit_violations(make_sample_content(3)) == []
+
+def test_violations_are_found_per_field_and_placeholders_skipped():
+    content = make_sample_content(3)
+    content["facebook"][1]["Headline"] = "A headline that is far too long for Facebook"
+    content["facebook"][2]["Headline"] = "Error generating ad headline placeholder"
+    content["google_search"]["headlines"][7] = "A Google headline over thirty characters"
+
+    violations = find_limit_violations(content)
+    assert [(v["id"], v["limit"]) for v in violations] == [("facebook:Headline:1", 27), ("google_search:headlines:7", 30)]
+    assert violations[0]["text"] == content["facebook"][1]["Headline"]
+
+def test_chunks_stay_within_the_output_budget_and_keep_order():
+    violations = [{"id": f"facebook:Headline:{i}", "limit": 27} for i in range(150)]
+    violations += [{"id": f"linkedin:IntroductoryText:{i}", "limit": 500} for i in range(30)]
+    chunks = chunk_violations(violations, 3000)
+
+    assert len(chunks) > 1
+    assert [v for chunk in chunks for v in chunk] == violations
+    for chunk in chunks:
+        estimated = sum((v["limit"] + len(v["id"])) / 3 + REWRITE_ITEM_OVERHEAD_TOKENS for v in chunk)
+        assert len(chunk) == 1 or estimated <= 3000 * REWRITE_OUTPUT_BUDGET_SHARE
+
+def test_small_violation_lists_are_one_chunk():
+    violations = [{"id": "email:SubjectLine:0", "limit": 70}, {"id": "facebook:Headline:2", "limit": 27}]
+    assert chunk_violations(violations, 3000) == [violations]
@@ -0,0 +1,39 @@
+# tests/test_diversity.py
+from diversity import analyze_diversity, diversity_scores
+from sample_data import make_sample_content
+
+def _email(body, headline="Weekly insight", subject="Your weekly update"):
+    return {"Headline": headline, "SubjectLine": subject, "Body": body, "CTA": "Book a Demo"}
+
+DISTINCT_BODIES = [
+    "Forecast revenue with confidence using dashboards your whole operations team already understands today.",
+    "Connect every data source in minutes and stop waiting on engineering for the reports you need.",
+    "Customers like Northwind cut their weekly reporting time in half within the first month.",
+]
+
+def test_distinct_variants_are_not_flagged():
+    flagged, score = analyze_diversity("email", [_email(body) for body in DISTINCT_BODIES], threshold=0.5)
+    assert flagged == []
+    assert score > 0.8
+
+def test_later_near_duplicate_is_flagged_not_the_original():
+    items = [_email(DISTINCT_BODIES[0]), _email(DISTINCT_BODIES[1]), _email(DISTINCT_BODIES[0] + " Book now.")]
+    flagged, _ = analyze_diversity("email", items, threshold=0.5)
+    assert flagged == [2]
+
+def test_copies_of_a_flagged_variant_are_compared_against_survivors_only():
+    items = [_email(DISTINCT_BODIES[0])] * 3
+    flagged, score = analyze_diversity("email", items, threshold=0.5)
+    assert flagged == [1, 2]
+    assert score == 0.0
+
+def test_failed_items_are_ignored():
+    items = [_email(DISTINCT_BODIES[0]), _email("Error generating email"), _email(DISTINCT_BODIES[0])]
+    flagged, _ = analyze_diversity("email", items, threshold=0.5)
+    assert flagged == [2]
+
+def test_scores_cover_emails_and_social_sheets():
+    scores = diversity_scores(make_sample_content(3), threshold=0.5)
+    assert set(scores) == {"email", "linkedin", "facebook"}
+    for sheet in scores.values():
+        assert 0.0 <= sheet["score"] <= 1.0
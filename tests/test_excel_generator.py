@@ -0,0 +1,87 @@
+# tests/test_excel_generator.py
+import io
+import zipfile
+
+import openpyxl
+
+from excel_generator import IncrementalWorkbook, build_workbook, SHEET_KEYS
+from sample_data import make_sample_content, SAMPLE_SCRAPED_DATA
+
+def _cell_snapshot(ws):
+    """Values and the style attributes the generator sets, for every cell of a sheet."""
+    return [
+        (cell.coordinate, cell.value, cell.font.b, cell.font.sz, cell.font.color and cell.font.color.value,
+         cell.fill.fill_type, cell.fill.fgColor.value, cell.alignment.wrap_text, cell.alignment.horizontal,
+         cell.alignment.vertical, cell.border.bottom.style)
+        for row in ws.iter_rows() for cell in row
+    ]
+
+def _layout_snapshot(ws):
+    widths = {key: dim.width for key, dim in ws.column_dimensions.items() if dim.width}
+    heights = {key: dim.height for key, dim in ws.row_dimensions.items() if dim.height}
+    return widths, heights, ws.freeze_panes
+
+def _assert_same_workbook(expected, actual):
+    assert actual.sheetnames == expected.sheetnames
+    for title in expected.sheetnames:
+        assert _cell_snapshot(actual[title]) == _cell_snapshot(expected[title]), title
+        assert _layout_snapshot(actual[title]) == _layout_snapshot(expected[title]), title
+
+def _reload(workbook):
+    return openpyxl.load_workbook(workbook.to_bytes())
+
+def _built(content):
+    """build_workbook's output after a save/load round trip, like the incremental workbook's."""
+    buffer = io.BytesIO()
+    build_workbook(content, SAMPLE_SCRAPED_DATA).save(buffer)
+    return openpyxl.load_workbook(buffer)
+
+def test_incremental_workbook_matches_build_workbook():
+    content = make_sample_content(3)
+    workbook = IncrementalWorkbook(SAMPLE_SCRAPED_DATA)
+    for content_key in SHEET_KEYS: # Stage by stage, as the app does
+        workbook.update_stage(content_key, content[content_key])
+
+    _assert_same_workbook(_built(content), _reload(workbook))
+
+def test_rewritten_stage_matches_a_fresh_build():
+    content = make_sample_content(3)
+    workbook = IncrementalWorkbook(SAMPLE_SCRAPED_DATA)
+    workbook.update(content)
+    content["email"] = [dict(item, Body=item["Body"] + " Regenerated.") for item in content["email"]]
+
+    assert workbook.update(content) == ["email"]
+    _assert_same_workbook(_built(content), _reload(workbook))
+
+def test_unchanged_stage_is_not_rewritten():
+    content = make_sample_content(2)
+    workbook = IncrementalWorkbook(SAMPLE_SCRAPED_DATA)
+    assert workbook.update_stage("email", content["email"]) is True
+    assert workbook.update_stage("email", content["email"]) is False
+
+def test_partial_workbook_has_only_finished_stages():
+    content = make_sample_content(2)
+    workbook = IncrementalWorkbook(SAMPLE_SCRAPED_DATA)
+    workbook.update_stage("email", content["email"])
+    workbook.update_stage("google_search", content["google_search"])
+
+    assert workbook.stages == ["email", "google_search", "reasoning_text"]
+    assert len(_reload(workbook).sheetnames) == 3
+
+def test_spliced_sheets_are_self_contained_and_readable():
+    """Sheets are spliced into a cached package, so their strings must be inline, not shared."""
+    content = make_sample_content(2)
+    workbook = IncrementalWorkbook(SAMPLE_SCRAPED_DATA)
+    workbook.update_stage("email", content["email"])
+    workbook.update_stage("facebook", content["facebook"])
+
+    with zipfile.ZipFile(workbook.to_bytes()) as zf:
+        assert "xl/sharedStrings.xml" not in zf.namelist()
+        for name in zf.namelist():
+            if name.startswith("xl/worksheets/"):
+                assert b't="s"' not in zf.read(name), name
+
+    ws = _reload(workbook).worksheets[0]
+    assert [cell.value for cell in ws[1]] == ["Version #", "Objective", "Headline", "Subject Line", "Body", "CTA"]
+    assert [row[3].value for row in ws.iter_rows(min_row=2)] == [item["SubjectLine"] for item in content["email"]]
+    assert ws["E3"].value == content["email"][1]["Body"]
@@ -0,0 +1,96 @@
+# tests/test_prefetch.py
+import io
+import threading
+import pytest
+import doc_parser
+from prefetch import (
+    looks_prefetchable_url,
+    start_documents_prefetch,
+    take_documents_prefetch,
+    cancel_prefetch,
+    prefetch_status,
+    _documents_key
+)
+
+def _upload(name, data):
+    upload = io.BytesIO(data)
+    upload.name = name
+    return upload
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Replaces document parsing; returns the list of names parsed per call."""
+    calls = []
+    def extract(uploaded_files):
+        calls.append([f.name for f in uploaded_files])
+        return " | ".join(f.getvalue().decode() for f in uploaded_files)
+    monkeypatch.setattr(doc_parser, "extract_text_from_uploaded_files", extract)
+    return calls
+
+@pytest.mark.parametrize("url,expected", [
+    ("https://acme.com", True),
+    ("http://www.acme.co.uk/about", True),
+    ("https://acme", False),
+    ("https://acme.", False),
+    ("acme.com", False),
+    ("", False),
+    (None, False),
+])
+def test_looks_prefetchable_url(url, expected):
+    assert looks_prefetchable_url(url) == expected
+
+def test_documents_key_uses_name_and_content():
+    key = _documents_key([_upload("brief.txt", b"v1")])
+    assert key == _documents_key([_upload("brief.txt", b"v1")])
+    assert key != _documents_key([_upload("brief.txt", b"v2")])
+    assert key != _documents_key([_upload("other.txt", b"v1")])
+
+def test_prefetch_is_started_once_and_taken(parsed):
+    state = {}
+    assert start_documents_prefetch(state, [_upload("brief.txt", b"v1")])
+    assert not start_documents_prefetch(state, [_upload("brief.txt", b"v1")]) # Same input, a rerun
+    assert take_documents_prefetch(state, [_upload("brief.txt", b"v1")]) == (True, "v1")
+    assert parsed == [["brief.txt"]]
+
+    # A consumed entry is not handed out twice, nor started again
+    assert take_documents_prefetch(state, [_upload("brief.txt", b"v1")]) == (False, None)
+    assert not start_documents_prefetch(state, [_upload("brief.txt", b"v1")])
+    assert prefetch_status(state, "documents") is None
+
+def test_changed_input_cancels_the_stale_prefetch(monkeypatch):
+    release = threading.Event()
+    def slow_extract(uploaded_files):
+        release.wait(5)
+        return "stale"
+    monkeypatch.setattr(doc_parser, "extract_text_from_uploaded_files", slow_extract)
+
+    state = {}
+    start_documents_prefetch(state, [_upload("brief.txt", b"v1")])
+    stale = state["prefetch_documents"]["future"]
+    assert prefetch_status(state, "documents") == "running"
+
+    monkeypatch.setattr(doc_parser, "extract_text_from_uploaded_files", lambda uploaded_files: "fresh")
+    assert start_documents_prefetch(state, [_upload("brief.txt", b"v2")])
+    release.set()
+    assert stale.cancelled()
+    assert take_documents_prefetch(state, [_upload("brief.txt", b"v2")]) == (True, "fresh")
+
+def test_take_with_other_input_falls_back(parsed):
+    state = {}
+    start_documents_prefetch(state, [_upload("brief.txt", b"v1")])
+    assert take_documents_prefetch(state, [_upload("brief.txt", b"v2")]) == (False, None)
+    assert "prefetch_documents" not in state
+
+def test_failed_prefetch_falls_back(monkeypatch):
+    def broken_extract(uploaded_files):
+        raise ValueError("unreadable file")
+    monkeypatch.setattr(doc_parser, "extract_text_from_uploaded_files", broken_extract)
+
+    state = {}
+    start_documents_prefetch(state, [_upload("brief.pdf", b"%PDF")])
+    assert take_documents_prefetch(state, [_upload("brief.pdf", b"%PDF")]) == (False, None)
+
+def test_cancel_without_prefetch_is_a_no_op():
+    state = {}
+    cancel_prefetch(state, "profile")
+    assert state == {}
@@ -0,0 +1,36 @@
+# tests/test_profile_store.py
+import profile_store
+from async_runner import in_runner_thread
+from profile_store import get_or_scrape_profile, get_stored_profile, normalize_domain
+from sample_data import SAMPLE_SCRAPED_DATA
+
+def test_normalize_domain():
+    assert normalize_domain("https://WWW.Acme.com:8443/pricing") == "acme.com"
+    assert normalize_domain("acme.com/demo") == "acme.com"
+    assert normalize_domain("") == ""
+
+def test_profile_is_scraped_once_then_served_from_the_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("MCG_PROFILE_DB", str(tmp_path / "profiles.sqlite3"))
+    scrapes = []
+
+    async def fetch(url):
+        scrapes.append(url)
+        return "Acme Analytics helps teams forecast revenue."
+    async def extract(text, api_key):
+        return dict(SAMPLE_SCRAPED_DATA)
+    monkeypatch.setattr(profile_store, "get_website_text_content_async", fetch)
+    monkeypatch.setattr(profile_store, "extract_structured_data_from_text_async", extract)
+
+    # SQLite work must not run on the shared loop's thread
+    db_threads = []
+    for name in ("get_stored_profile", "save_profile"):
+        def on_worker_thread(*args, _func=getattr(profile_store, name), **kwargs):
+            db_threads.append(in_runner_thread())
+            return _func(*args, **kwargs)
+        monkeypatch.setattr(profile_store, name, on_worker_thread)
+
+    assert get_or_scrape_profile("https://www.acme.com", "sk-test") == (SAMPLE_SCRAPED_DATA, "scraped")
+    assert get_or_scrape_profile("acme.com/about", "sk-test") == (SAMPLE_SCRAPED_DATA, "stored")
+    assert scrapes == ["https://www.acme.com"]
+    assert db_threads == [False, False, False]
+    assert get_stored_profile("acme.com")["source"] == "scrape"
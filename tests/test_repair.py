@@ -0,0 +1,93 @@
+# tests/test_repair.py
+import copy
+
+import openai_handler
+from openai_handler import find_failed_slices, repair_generated_content, SOCIAL_AD_OBJECTIVES
+from sample_data import make_sample_content, SAMPLE_SCRAPED_DATA
+
+NUM_VERSIONS = 3
+CAMPAIGN_ARGS = (SAMPLE_SCRAPED_DATA, "", "Demo Booking", "https://acme.example.com/demo", "")
+
+def test_complete_content_has_no_failed_slices():
+    assert find_failed_slices(make_sample_content(NUM_VERSIONS), NUM_VERSIONS) == []
+
+def test_failed_slices_are_found_per_part():
+    content = make_sample_content(NUM_VERSIONS)
+    content["email"] = content["email"][:2] # Short of the requested count
+    content["linkedin"][NUM_VERSIONS]["Headline"] = "Error" # First "Demand Gen" ad
+    content["google_search"]["headlines"][4] = "Error generating headline"
+    content["google_display"]["descriptions"] = content["google_display"]["descriptions"][:3]
+    content["reasoning_text"] = "Error generating reasoning text: timeout"
+
+    assert find_failed_slices(content, NUM_VERSIONS) == [
+        ("email", None),
+        ("linkedin", "Demand Gen"),
+        ("google_search", "headlines"),
+        ("google_display", "descriptions"),
+        ("reasoning_text", None),
+    ]
+
+def test_repair_replaces_only_failed_social_ads_and_renumbers(monkeypatch):
+    content = make_sample_content(NUM_VERSIONS)
+    content["linkedin"][NUM_VERSIONS + 1] = {"Version #": NUM_VERSIONS + 2, "AdName": "Error generating ad - Demand Gen - V2",
+                                             "Objective": "Demand Gen", "Headline": "Error"}
+    original = copy.deepcopy(content)
+    requests = []
+
+    async def fake_objective_batch(api_key, platform, base_context, scraped_data, lead_objective_type, lead_objective_url,
+                                   downloadable_asset_url, ad_objective, num_pieces, avoid_content=None):
+        requests.append((platform, ad_objective, num_pieces, avoid_content))
+        return [{"AdName": f"New {ad_objective} {k}", "Objective": ad_objective, "Headline": "Fresh"} for k in range(num_pieces)]
+
+    monkeypatch.setattr(openai_handler, "_generate_social_ads_for_objective_async", fake_objective_batch)
+    repaired, repaired_slices = repair_generated_content("sk-test", content, *CAMPAIGN_ARGS, NUM_VERSIONS)
+
+    kept_texts = [original["linkedin"][i]["IntroductoryText"] for i in (NUM_VERSIONS, NUM_VERSIONS + 2)]
+    assert requests == [("LinkedIn", "Demand Gen", 1, kept_texts)]
+    assert repaired_slices == [("linkedin", "Demand Gen")]
+    ads = repaired["linkedin"]
+    assert [ad["Version #"] for ad in ads] == list(range(1, 3 * NUM_VERSIONS + 1))
+    assert [ad["Objective"] for ad in ads] == [o for o in SOCIAL_AD_OBJECTIVES for _ in range(NUM_VERSIONS)]
+    # Good ads keep their place; the new ad goes after the objective's surviving ads
+    demand_gen = ads[NUM_VERSIONS:2 * NUM_VERSIONS]
+    assert demand_gen[0]["AdName"] == original["linkedin"][NUM_VERSIONS]["AdName"]
+    assert demand_gen[1]["AdName"] == original["linkedin"][NUM_VERSIONS + 2]["AdName"]
+    assert demand_gen[2]["AdName"] == "New Demand Gen 0"
+    assert ads[:NUM_VERSIONS] == original["linkedin"][:NUM_VERSIONS]
+    assert repaired["facebook"] == original["facebook"]
+
+def test_repair_tops_up_emails_after_the_good_ones(monkeypatch):
+    content = make_sample_content(NUM_VERSIONS)
+    content["email"][0]["Body"] = "Error generating email"
+    kept = [email["Headline"] for email in content["email"][1:]]
+    avoided = []
+
+    async def fake_emails(api_key, scraped_data, additional_docs_text, lead_objective_type, lead_objective_url,
+                          downloadable_asset_url, num_emails, avoid_content=None):
+        avoided.extend(avoid_content or [])
+        return [{"Headline": f"New {i}", "Body": "Fresh body"} for i in range(num_emails)]
+
+    monkeypatch.setattr(openai_handler, "generate_email_content_async", fake_emails)
+    repaired, repaired_slices = repair_generated_content("sk-test", content, *CAMPAIGN_ARGS, NUM_VERSIONS)
+
+    assert repaired_slices == [("email", None)]
+    assert [email["Headline"] for email in repaired["email"]] == kept + ["New 0"]
+    assert [email["Version #"] for email in repaired["email"]] == [1, 2, 3]
+    assert avoided == [email["Body"] for email in content["email"][1:]] # Kept emails are passed as "avoid these"
+
+def test_short_google_regeneration_is_not_reported_as_repaired(monkeypatch):
+    content = make_sample_content(NUM_VERSIONS)
+    for i in (2, 5, 9):
+        content["google_search"]["headlines"][i] = "Error generating headline"
+
+    async def fake_assets(api_key, content_key, base_context, lead_objective_type, lead_objective_url,
+                          downloadable_asset_url, asset_type, count, max_chars, existing_items):
+        return ["Fresh headline"] * (count - 1)
+
+    monkeypatch.setattr(openai_handler, "_generate_google_asset_list_async", fake_assets)
+    repaired, repaired_slices = repair_generated_content("sk-test", content, *CAMPAIGN_ARGS, NUM_VERSIONS)
+
+    assert repaired_slices == []
+    headlines = repaired["google_search"]["headlines"]
+    assert [headlines[i] for i in (2, 5, 9)] == ["Fresh headline", "Fresh headline", "Error generating headline"]
+    assert find_failed_slices(repaired, NUM_VERSIONS) == [("google_search", "headlines")]
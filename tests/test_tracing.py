@@ -0,0 +1,35 @@
+# tests/test_tracing.py
+import json
+import tracing
+from tracing import span, log_event, MAX_EVENT_MESSAGE_CHARS
+
+def test_export_is_off_unless_enabled(tmp_path, monkeypatch):
+    trace_file = tmp_path / "spans.jsonl"
+    monkeypatch.setenv("MCG_TRACE_FILE", str(trace_file))
+    monkeypatch.delenv("MCG_TRACING", raising=False)
+    with span("run"):
+        pass
+    assert not trace_file.exists()
+
+    monkeypatch.setenv("MCG_TRACING", "1")
+    with span("run"):
+        pass
+    assert [json.loads(line)["name"] for line in trace_file.read_text().splitlines()] == ["run"]
+
+def test_event_messages_are_trimmed_but_printed_in_full(capsys):
+    raw = "x" * (MAX_EVENT_MESSAGE_CHARS * 3)
+    with span("llm_call") as record:
+        log_event(f"Raw content: {raw}")
+    assert len(record["events"][0]["message"]) < MAX_EVENT_MESSAGE_CHARS + 20
+    assert raw in capsys.readouterr().out
+
+def test_trace_file_is_rotated(tmp_path, monkeypatch):
+    trace_file = tmp_path / "spans.jsonl"
+    trace_file.write_text("old\n")
+    monkeypatch.setenv("MCG_TRACE_FILE", str(trace_file))
+    monkeypatch.setenv("MCG_TRACING", "1")
+    monkeypatch.setattr(tracing, "MAX_TRACE_FILE_BYTES", 4)
+    with span("run"):
+        pass
+    assert (tmp_path / "spans.jsonl.1").read_text() == "old\n"
+    assert json.loads(trace_file.read_text())["name"] == "run"
@@ -0,0 +1,83 @@
+# trace_viewer.py
+"""
+Renders a waterfall for one traced run from the JSON Lines span file written by tracing.py.
+
+    python trace_viewer.py                       # latest run
+    python trace_viewer.py --list                # recent runs
+    python trace_viewer.py --trace-id <id> --width 80
+"""
+import argparse
+import json
+import os
+
+from tracing import get_trace_file
+
+def load_spans(trace_file):
+    spans = []
+    with open(trace_file, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                spans.append(json.loads(line))
+    return spans
+
+def _root_spans(spans):
+    return sorted((s for s in spans if s["parent_id"] is None), key=lambda s: s["start"])
+
+def render_waterfall(spans, trace_id, width=60):
+    """Returns the waterfall lines for one trace: indented span names, a timeline bar and the duration."""
+    trace_spans = [s for s in spans if s["trace_id"] == trace_id]
+    if not trace_spans:
+        return [f"No spans found for trace {trace_id}"]
+    children = {}
+    for s in trace_spans:
+        children.setdefault(s["parent_id"], []).append(s)
+    trace_start = min(s["start"] for s in trace_spans)
+    total = max(s["end"] for s in trace_spans) - trace_start or 1e-9
+
+    lines = []
+    def walk(parent_id, depth):
+        for s in sorted(children.get(parent_id, []), key=lambda s: s["start"]):
+            offset = int((s["start"] - trace_start) / total * width)
+            length = max(1, int(s["duration_s"] / total * width))
+            bar = " " * offset + "█" * min(length, width - offset)
+            details = " ".join(f"{k}={v}" for k, v in s["attributes"].items() if k != "client")
+            label = ("  " * depth + s["name"])[:44]
+            status = "  ERROR" if s["status"] == "error" else ""
+            lines.append(f"{label:<44} |{bar:<{width}}| {s['duration_s']:8.3f}s {details}{status}")
+            walk(s["span_id"], depth + 1)
+    walk(None, 0)
+    # Orphans (parent span not exported, e.g. interrupted run)
+    known = {s["span_id"] for s in trace_spans}
+    for parent_id in children:
+        if parent_id is not None and parent_id not in known:
+            walk(parent_id, 0)
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", default=get_trace_file())
+    parser.add_argument("--trace-id")
+    parser.add_argument("--list", action="store_true")
+    parser.add_argument("--width", type=int, default=60)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"No trace file at {args.file}")
+        return
+    spans = load_spans(args.file)
+    roots = _root_spans(spans)
+    if args.list:
+        for root in roots[-20:]:
+            print(f"{root['trace_id']}  {root['name']:<12} {root['duration_s']:8.2f}s  {root['attributes'].get('client', '')}")
+        return
+    trace_id = args.trace_id or (roots[-1]["trace_id"] if roots else None)
+    if trace_id is None:
+        print("No runs recorded yet.")
+        return
+    root = next((r for r in roots if r["trace_id"] == trace_id), None)
+    if root:
+        print(f"Trace {trace_id}  {root['name']}  client={root['attributes'].get('client', '-')}  {root['duration_s']:.2f}s")
+    print("\n".join(render_waterfall(spans, trace_id, args.width)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# tracing.py
+"""
+Lightweight structured tracing: nested spans (run -> stage -> LLM call / fetch / file parse)
+with attributes such as client, platform, objective, tokens and bytes.
+
+Span export is opt-in (MCG_TRACING=1): finished spans are then appended to a local JSON Lines file
+(MCG_TRACE_FILE, default traces/spans.jsonl, rotated to .1 once it reaches MAX_TRACE_FILE_BYTES) and,
+when MCG_OTLP_ENDPOINT is set (e.g. http://localhost:4318/v1/traces), each finished run is also
+posted to an OTLP/HTTP JSON collector. log_event() replaces print(): it records an event (trimmed to
+MAX_EVENT_MESSAGE_CHARS) on the current span and prints the full line tagged with the run's client.
+Render a run with: python trace_viewer.py
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_FILE_ENV = "MCG_TRACE_FILE"
+OTLP_ENDPOINT_ENV = "MCG_OTLP_ENDPOINT"
+TRACING_ENV = "MCG_TRACING" # "1" enables span export (console output is always on)
+DEFAULT_TRACE_FILE = os.path.join("traces", "spans.jsonl")
+MAX_TRACE_FILE_BYTES = 50 * 1024 * 1024
+MAX_EVENT_MESSAGE_CHARS = 500 # Events can quote raw LLM output; keep the span files small
+SERVICE_NAME = "marketing-content-generator"
+
+# Attributes copied from a parent span to its children so every line can be tied to its client
+INHERITED_ATTRIBUTES = ("client",)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+_pending_otlp = {} # trace_id -> finished spans waiting for their root span
+
+def _tracing_enabled():
+    return os.environ.get(TRACING_ENV, "0") == "1"
+
+def get_trace_file():
+    return os.environ.get(TRACE_FILE_ENV) or DEFAULT_TRACE_FILE
+
+@contextmanager
+def span(name, **attributes):
+    """Opens a child of the current span (or a new trace) for the duration of the block."""
+    parent = _current_span.get()
+    for key in INHERITED_ATTRIBUTES:
+        if parent and key in parent["attributes"] and key not in attributes:
+            attributes[key] = parent["attributes"][key]
+    record = {
+        "trace_id": parent["trace_id"] if parent else os.urandom(16).hex(),
+        "span_id": os.urandom(8).hex(),
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        "start": time.time(),
+        "attributes": {key: value for key, value in attributes.items() if value is not None},
+        "events": [],
+        "status": "ok",
+    }
+    token = _current_span.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)[:500]
+        raise
+    finally:
+        record["duration_s"] = round(time.perf_counter() - start, 6)
+        record["end"] = record["start"] + record["duration_s"]
+        _current_span.reset(token)
+        _export(record)
+
+def traced(name=None, **static_attributes):
+    """Decorator form of span() for pipeline stages (sync or async)."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name or func.__name__, **static_attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__, **static_attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def set_span_attributes(**attributes):
+    """Adds attributes (e.g. tokens, bytes) to the current span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current["attributes"].update({key: value for key, value in attributes.items() if value is not None})
+
+def log_event(message, **attributes):
+    """Records `message` as an event on the current span and prints it tagged with the span's client."""
+    current = _current_span.get()
+    if current is not None:
+        stored = message if len(message) <= MAX_EVENT_MESSAGE_CHARS else message[:MAX_EVENT_MESSAGE_CHARS] + "... [trimmed]"
+        current["events"].append({"time": time.time(), "message": stored, "attributes": attributes})
+        client = current["attributes"].get("client")
+        print(f"[{client}] {message}" if client else message)
+    else:
+        print(message)
+
+def _export(record):
+    if not _tracing_enabled():
+        return
+    trace_file = get_trace_file()
+    with _export_lock:
+        os.makedirs(os.path.dirname(trace_file) or ".", exist_ok=True)
+        if os.path.exists(trace_file) and os.path.getsize(trace_file) >= MAX_TRACE_FILE_BYTES:
+            os.replace(trace_file, trace_file + ".1") # Keeps one previous file
+        with open(trace_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+        endpoint = os.environ.get(OTLP_ENDPOINT_ENV)
+        if not endpoint:
+            return
+        _pending_otlp.setdefault(record["trace_id"], []).append(record)
+        if record["parent_id"] is not None:
+            return
+        spans = _pending_otlp.pop(record["trace_id"])
+    # Root span finished: ship the whole trace without blocking the run
+    threading.Thread(target=_post_otlp, args=(endpoint, spans), daemon=True).start()
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_attributes(attributes):
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+def to_otlp_json(spans):
+    """Converts span records to an OTLP/HTTP JSON ExportTraceServiceRequest body."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+        "scopeSpans": [{"scope": {"name": "tracing"}, "spans": [{
+            "traceId": record["trace_id"],
+            "spanId": record["span_id"],
+            **({"parentSpanId": record["parent_id"]} if record["parent_id"] else {}),
+            "name": record["name"],
+            "kind": 1, # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(int(record["start"] * 1e9)),
+            "endTimeUnixNano": str(int(record["end"] * 1e9)),
+            "attributes": _otlp_attributes(record["attributes"]),
+            "events": [{"timeUnixNano": str(int(event["time"] * 1e9)), "name": event["message"],
+                        "attributes": _otlp_attributes(event["attributes"])} for event in record["events"]],
+            "status": {"code": 2, "message": record.get("error", "")} if record["status"] == "error" else {"code": 1},
+        } for record in spans]}],
+    }]}
+
+def _post_otlp(endpoint, spans):
+    import requests
+    try:
+        requests.post(endpoint, json=to_otlp_json(spans), timeout=5).raise_for_status()
+    except Exception as e:
+        print(f"Error exporting spans to OTLP collector {endpoint}: {e}")
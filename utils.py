@@ -1,6 +1,9 @@
 # utils.py
 import streamlit as st
 import os
+import json
+import threading
+from tracing import log_event
 
 # --- Constants ---
 # Use gpt-4o-mini as gpt-4.1-nano is not a standard public model name.
@@ -8,6 +11,31 @@ import os
 OPENAI_MODEL_NAME = "gpt-4o-mini"
 MAX_TOKENS_WEBSITE_SCRAPE_ASSIST = 4000 # Max tokens for LLM to process for website data extraction
 MAX_CONTENT_TOKENS = 2000 # Max tokens for content generation calls, adjust as needed
+NEAR_DUPLICATE_THRESHOLD = 0.5 # Shingle (Jaccard) similarity above which two variants count as near-duplicates
+MAX_CONCURRENT_LLM_CALLS = 8 # Shared budget of in-flight LLM calls across all runs in this process
+MAX_CONCURRENT_LLM_CALLS_ENV = "MCG_MAX_CONCURRENT_LLM_CALLS"
+
+# Per-task model routing: model, output cap, temperature and a latency budget (seconds) for each task type.
+# Override per task with a [MODEL_ROUTES.<task>] table in secrets.toml or the MCG_MODEL_ROUTES env var (JSON),
+# e.g. MCG_MODEL_ROUTES='{"short_form_google": {"model": "gpt-4.1-nano"}}'.
+TASK_ROUTES = {
+    "profile_extraction": {"model": OPENAI_MODEL_NAME, "max_tokens": 1000, "temperature": 0.2, "latency_budget_s": 15},
+    "long_form_email": {"model": OPENAI_MODEL_NAME, "max_tokens": 8000, "temperature": 0.7, "latency_budget_s": 90},
+    "social_ads": {"model": OPENAI_MODEL_NAME, "max_tokens": 4000, "temperature": 0.7, "latency_budget_s": 45},
+    "short_form_google": {"model": OPENAI_MODEL_NAME, "max_tokens": 800, "temperature": 0.7, "latency_budget_s": 15},
+    "reasoning": {"model": OPENAI_MODEL_NAME, "max_tokens": 600, "temperature": 0.7, "latency_budget_s": 20},
+    "copy_edit": {"model": OPENAI_MODEL_NAME, "max_tokens": 3000, "temperature": 0.3, "latency_budget_s": 30},
+}
+MODEL_ROUTES_ENV = "MCG_MODEL_ROUTES"
+
+# USD per 1M (input, output) tokens, used to estimate the cost of each task
+MODEL_PRICES_PER_1M_TOKENS = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
 
 # --- Functions ---
 def load_openai_api_key():
@@ -35,4 +63,92 @@ def get_max_scrape_tokens():
 
 def get_max_content_tokens():
     """Returns max tokens for content generation LLM calls."""
-    return MAX_CONTENT_TOKENS
\ No newline at end of file
+    return MAX_CONTENT_TOKENS
+
+def get_near_duplicate_threshold():
+    """Returns the default similarity threshold for near-duplicate detection."""
+    return NEAR_DUPLICATE_THRESHOLD
+
+def get_max_concurrent_llm_calls():
+    """Returns the shared in-flight LLM call budget (MCG_MAX_CONCURRENT_LLM_CALLS overrides the default)."""
+    try:
+        return max(1, int(os.environ.get(MAX_CONCURRENT_LLM_CALLS_ENV, MAX_CONCURRENT_LLM_CALLS)))
+    except ValueError:
+        return MAX_CONCURRENT_LLM_CALLS
+
+def is_admin_mode():
+    """True when ADMIN_MODE = true is set in Streamlit secrets (unlocks admin-only tools such as profiling)."""
+    try:
+        return bool(st.secrets.get("ADMIN_MODE", False))
+    except Exception:
+        return False
+
+# --- Per-task model routing ---
+_route_overrides = None
+_task_metrics = {}
+_task_metrics_lock = threading.Lock()
+
+def _load_route_overrides():
+    """Task route overrides from secrets.toml ([MODEL_ROUTES.<task>]) and MCG_MODEL_ROUTES (JSON), env wins."""
+    overrides = {}
+    try:
+        for task, route in dict(st.secrets.get("MODEL_ROUTES", {})).items():
+            overrides.setdefault(task, {}).update(dict(route))
+    except Exception:
+        pass # No secrets file (e.g. benchmarks and batch tools)
+    env_routes = os.environ.get(MODEL_ROUTES_ENV)
+    if env_routes:
+        try:
+            for task, route in json.loads(env_routes).items():
+                overrides.setdefault(task, {}).update(route)
+        except (json.JSONDecodeError, AttributeError) as e:
+            log_event(f"Ignoring invalid {MODEL_ROUTES_ENV}: {e}")
+    return overrides
+
+def get_task_route(task):
+    """Returns {"model", "max_tokens", "temperature", "latency_budget_s"} for a task type, with config overrides applied."""
+    global _route_overrides
+    if _route_overrides is None:
+        _route_overrides = _load_route_overrides()
+    route = dict(TASK_ROUTES.get(task, {"model": get_model_name(), "max_tokens": get_max_content_tokens(),
+                                        "temperature": 0.7, "latency_budget_s": None}))
+    route.update(_route_overrides.get(task, {}))
+    return route
+
+def estimate_cost_usd(model, prompt_tokens, completion_tokens):
+    """Estimated USD cost of one call, or None if the model's price is unknown."""
+    prices = MODEL_PRICES_PER_1M_TOKENS.get(model)
+    if not prices or prompt_tokens is None or completion_tokens is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+def record_task_metrics(task, model, latency_s, prompt_tokens=None, completion_tokens=None):
+    """Records one call's measured latency and estimated cost for its task. Returns (cost_usd, over_budget)."""
+    cost_usd = estimate_cost_usd(model, prompt_tokens, completion_tokens)
+    budget = get_task_route(task).get("latency_budget_s") if task else None
+    over_budget = bool(budget) and latency_s > budget
+    with _task_metrics_lock:
+        metrics = _task_metrics.setdefault(task or "untagged", {
+            "calls": 0, "total_latency_s": 0.0, "max_latency_s": 0.0, "over_budget": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "models": set(),
+        })
+        metrics["calls"] += 1
+        metrics["total_latency_s"] += latency_s
+        metrics["max_latency_s"] = max(metrics["max_latency_s"], latency_s)
+        metrics["over_budget"] += int(over_budget)
+        metrics["prompt_tokens"] += prompt_tokens or 0
+        metrics["completion_tokens"] += completion_tokens or 0
+        metrics["cost_usd"] += cost_usd or 0.0
+        metrics["models"].add(model)
+    return cost_usd, over_budget
+
+def get_task_metrics_summary():
+    """Per-task rows (calls, avg/max latency, tokens, cost, models) for display, sorted by total latency."""
+    with _task_metrics_lock:
+        rows = [{
+            "Task": task, "Calls": m["calls"], "Models": ", ".join(sorted(m["models"])),
+            "Avg latency (s)": round(m["total_latency_s"] / m["calls"], 2), "Max latency (s)": round(m["max_latency_s"], 2),
+            "Over budget": m["over_budget"], "Prompt tokens": m["prompt_tokens"],
+            "Completion tokens": m["completion_tokens"], "Est. cost (USD)": round(m["cost_usd"], 4),
+        } for task, m in _task_metrics.items()]
+    return sorted(rows, key=lambda row: row["Avg latency (s)"] * row["Calls"], reverse=True)
\ No newline at end of file
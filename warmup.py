@@ -0,0 +1,66 @@
+# warmup.py
+"""
+Background warm-up, started by app.py once the page has been drawn.
+
+The stages import their heavy libraries lazily (openai, httpx, BeautifulSoup, PyPDF2, python-pptx,
+openpyxl), so the first paint doesn't wait for them. Warm-up then pays those costs ahead of the first
+Generate click: it imports the libraries, starts the async runner with its pooled HTTP and OpenAI
+clients, and runs the HTML parser and the workbook writer once on tiny inputs.
+It runs at most once per process; MCG_WARMUP=0 disables it.
+"""
+import io
+import os
+import threading
+import time
+from tracing import span, set_span_attributes, log_event
+
+WARMUP_ENV = "MCG_WARMUP"
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+def warmup_enabled_by_env():
+    return os.environ.get(WARMUP_ENV, "1").strip().lower() not in ("0", "false", "no")
+
+def _warm_clients(api_key):
+    from async_runner import call_on_loop, get_async_http_client, get_async_openai_client
+    call_on_loop(lambda: (get_async_http_client(), get_async_openai_client(api_key) if api_key else None))
+
+def _warm_html_parser():
+    from scraper import _extract_visible_text
+    _extract_visible_text(b"<html><head><title>warm-up</title></head><body><p>warm-up</p></body></html>")
+
+def _warm_document_parsers():
+    from PyPDF2 import PdfReader # noqa: F401
+    from pptx import Presentation # noqa: F401
+
+def _warm_workbook_writer():
+    from excel_generator import write_excel_workbook
+    write_excel_workbook({}, {}, io.BytesIO())
+
+def _run_warmup(api_key):
+    steps = [
+        ("clients", lambda: _warm_clients(api_key)),
+        ("html_parser", _warm_html_parser),
+        ("document_parsers", _warm_document_parsers),
+        ("workbook_writer", _warm_workbook_writer),
+    ]
+    with span("warmup"):
+        for step_name, step in steps:
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                log_event(f"Warm-up step {step_name} failed: {e}")
+            set_span_attributes(**{f"{step_name}_s": round(time.perf_counter() - start, 4)})
+
+def start_warmup(api_key):
+    """Starts the warm-up thread once per process. Returns the thread, or None when disabled."""
+    global _warmup_thread
+    if not warmup_enabled_by_env():
+        return None
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_run_warmup, args=(api_key,), name="warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread